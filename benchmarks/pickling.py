@@ -0,0 +1,86 @@
+"""
+Compares Torrent pickling (bencoded data), objects graph pickling
+and shared memory handles for torrents with many files.
+
+    python benchmarks/pickling.py --files 100000 --workers 4
+
+"""
+import argparse
+import pickle
+from multiprocessing import get_context
+from time import perf_counter
+
+from torrentool.api import Torrent
+from torrentool.shared import SharedTorrent
+
+
+def make_torrent(files_count: int) -> Torrent:
+    return Torrent({'info': {
+        'name': 'many',
+        'piece length': 262144,
+        'pieces': bytes(20) * (files_count // 100 + 1),
+        'files': [
+            {'length': num * 1000, 'path': [f'dir{num % 100}', f'file_{num}.bin']}
+            for num in range(files_count)
+        ],
+    }})
+
+
+def get_name(torrent) -> str:
+    # Info dictionary is decoded on access for lazily reconstructed torrents.
+    if torrent is None:
+        return ''
+
+    if isinstance(torrent, SharedTorrent):
+        torrent = torrent.torrent
+
+    elif isinstance(torrent, dict):
+        torrent = Torrent(torrent)
+
+    return torrent.name
+
+
+def measure(title: str, obj, workers: int, repeat: int = 5):
+    started = perf_counter()
+
+    for _ in range(repeat):
+        dumped = pickle.dumps(obj)
+
+    dumps_time = (perf_counter() - started) / repeat
+
+    started = perf_counter()
+
+    for _ in range(repeat):
+        pickle.loads(dumped)
+
+    loads_time = (perf_counter() - started) / repeat
+
+    with get_context('spawn').Pool(workers) as pool:
+        pool.map(get_name, [None] * workers)  # Warm up.
+        started = perf_counter()
+        pool.map(get_name, [obj] * workers * repeat, chunksize=1)
+        transfer_time = (perf_counter() - started) / repeat
+
+    print(
+        f'{title:<18}: {len(dumped) / 1048576:>8.2f} MiB, dumps {dumps_time * 1000:>8.1f} ms, '
+        f'loads {loads_time * 1000:>8.1f} ms, {workers} workers {transfer_time * 1000:>8.1f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=100000, help='Number of files in torrent.')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    torrent = make_torrent(args.files)
+
+    # Objects graph is what default pickling of Torrent used to produce.
+    measure('objects graph', torrent._struct, args.workers)
+    measure('bencoded', torrent, args.workers)
+
+    with SharedTorrent(torrent) as shared:
+        measure('shared memory', shared, args.workers)
+
+
+if __name__ == '__main__':
+    main()
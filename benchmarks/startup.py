@@ -0,0 +1,56 @@
+"""
+Measures CLI command run time with and without a warm daemon process.
+
+    python benchmarks/startup.py --runs 50
+
+"""
+import argparse
+import subprocess
+import sys
+from os import environ
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+
+TORRENT_PATH = Path(__file__).parent.parent / 'tests' / 'datafixtures' / 'test_dir.torrent'
+
+
+def measure(title: str, args: list, runs: int, env: dict):
+    started = perf_counter()
+
+    for _ in range(runs):
+        subprocess.run(args, env=env, stdout=subprocess.DEVNULL, check=True)
+
+    print(f'{title:<12}: {(perf_counter() - started) / runs * 1000:>7.1f} ms per run')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=50)
+    args = parser.parse_args()
+
+    command = [sys.executable, '-c', 'from torrentool.daemon import main; main()']
+    env = dict(environ)
+
+    measure('interpreter', [sys.executable, '-c', 'pass'], args.runs, env)
+    measure('import', [sys.executable, '-c', 'import torrentool.cli'], args.runs, env)
+    measure('info', command + ['torrent', 'info', str(TORRENT_PATH)], args.runs, env)
+
+    with TemporaryDirectory() as tmp_dir:
+        socket_path = f'{tmp_dir}/daemon.sock'
+        daemon = subprocess.Popen(command + ['daemon', '--socket', socket_path], stdout=subprocess.DEVNULL)
+
+        try:
+            while not Path(socket_path).exists():
+                sleep(0.05)
+
+            env['TORRENTOOL_DAEMON'] = socket_path
+            measure('info daemon', command + ['torrent', 'info', str(TORRENT_PATH)], args.runs, env)
+
+        finally:
+            daemon.terminate()
+            daemon.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Measures WebseedServer requests per second and throughput.
+
+    python benchmarks/webseed.py --size 256 --connections 8
+
+"""
+import argparse
+import asyncio
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Thread
+from time import perf_counter
+
+from torrentool.api import Torrent
+from torrentool.webseed import WebseedServer
+
+
+async def fetch(port: int, name: str, size: int, block: int, requests: int) -> int:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    received = 0
+
+    for num in range(requests):
+        start = (num * block) % max(size - block, 1)
+        writer.write(f'GET /{name} HTTP/1.1\r\nRange: bytes={start}-{start + block - 1}\r\n\r\n'.encode())
+        head = await reader.readuntil(b'\r\n\r\n')
+        length = int(head.split(b'Content-Length: ')[1].split(b'\r\n')[0])
+        received += len(await reader.readexactly(length))
+
+    writer.close()
+
+    return received
+
+
+async def measure(port: int, name: str, size: int, block: int, connections: int, requests: int):
+    started = perf_counter()
+    received = sum(await asyncio.gather(*[
+        fetch(port, name, size, block, requests) for _ in range(connections)]))
+    elapsed = perf_counter() - started
+
+    print(
+        f'block {block:>9} B: {connections * requests / elapsed:>9.0f} req/s, '
+        f'{received / elapsed / 1048576:>9.1f} MiB/s')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--size', type=int, default=256, help='Data file size in MiB.')
+    parser.add_argument('--connections', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per connection.')
+    args = parser.parse_args()
+
+    with TemporaryDirectory() as tmp_dir:
+        size = args.size * 1048576
+        data_path = Path(tmp_dir) / 'data.bin'
+
+        with open(data_path, 'wb') as f:
+            for _ in range(args.size):
+                f.write(bytes(range(256)) * 4096)
+
+        server = WebseedServer(max_requests=args.requests)
+        server.add(Torrent.create_from(data_path), tmp_dir)
+
+        loop = asyncio.new_event_loop()
+        port = loop.run_until_complete(server.start(port=0)).sockets[0].getsockname()[1]
+        Thread(target=loop.run_forever, daemon=True).start()
+
+        for block in (16384, 262144, 4194304):
+            asyncio.run(measure(port, data_path.name, size, block, args.connections, args.requests))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 import sys
 import os
-from setuptools import setup
+from setuptools import setup, Extension
 from torrentool import VERSION
 
 
@@ -27,6 +27,11 @@ setup(
     include_package_data=True,
     zip_safe=False,
 
+    ext_modules=[] if os.environ.get('TORRENTOOL_NO_EXTENSIONS') else [
+        # Optional: pure-Python implementation is used if build fails.
+        Extension('torrentool._bencode', sources=['torrentool/_bencode.c'], optional=True),
+    ],
+
     install_requires=[],
     extras_require={'cli': ['click']},
     setup_requires=[] + PYTEST_RUNNER,
@@ -37,7 +42,7 @@ setup(
     ],
 
     entry_points={
-        'console_scripts': ['torrentool = torrentool.cli:main'],
+        'console_scripts': ['torrentool = torrentool.daemon:main'],
     },
 
     test_suite='tests',
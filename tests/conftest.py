@@ -1,5 +1,23 @@
 import pytest
 
+from torrentool.bencode import Bencode
+from torrentool.exceptions import BencodeError
+
+
+@pytest.fixture(params=['python', 'c'])
+def bencode_backend(request):
+    backend_initial = Bencode.get_backend()
+
+    try:
+        Bencode.set_backend(request.param)
+
+    except BencodeError:
+        pytest.skip('Compiled bencode backend is not available.')
+
+    yield request.param
+
+    Bencode.set_backend(backend_initial)
+
 
 @pytest.fixture
 def torr_test_file(datafix_dir):
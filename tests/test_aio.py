@@ -0,0 +1,67 @@
+import asyncio
+from threading import Event
+
+import pytest
+
+from torrentool.aio import HashingTask
+from torrentool.exceptions import HashingCancelled
+
+
+def job(*, progress, cancel, steps=3, started: Event = None):
+    for step in range(1, steps + 1):
+        progress(step, steps)
+
+        if started is not None:
+            started.set()
+            cancel.wait(5)
+
+        if cancel.is_set():
+            raise HashingCancelled('Hashing is cancelled.')
+
+    return 'done'
+
+
+def test_hashing_task():
+
+    async def run():
+        task = HashingTask(job)
+        progress = [item async for item in task]
+
+        assert await task == 'done'
+        assert task.done()
+        assert task.progress == (3, 3)
+        assert progress[-1] == (3, 3)
+        assert [item async for item in task] == [(3, 3)]
+
+    asyncio.run(run())
+
+
+def test_hashing_task_cancel():
+    started = Event()
+    cancelled = Event()
+
+    def job_cancelled(**kwargs):
+        try:
+            return job(started=started, **kwargs)
+
+        except HashingCancelled:
+            cancelled.set()
+            raise
+
+    async def run():
+        task = HashingTask(job_cancelled)
+        waiting = asyncio.ensure_future(task)
+        await asyncio.sleep(0)  # Let it start awaiting.
+
+        while not started.is_set():
+            await asyncio.sleep(0.01)
+
+        waiting.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        assert task.done()
+
+    asyncio.run(run())
+    assert cancelled.wait(5)
@@ -0,0 +1,9 @@
+from torrentool.archives import get_archive_name
+
+
+def test_get_archive_name():
+    assert get_archive_name('/data/set.tar.gz') == 'set'
+    assert get_archive_name('set.v1.ZIP') == 'set.v1'
+    assert get_archive_name('set.tgz') == 'set'
+    assert get_archive_name('.tar') == '.tar'
+    assert get_archive_name('set.bin') == 'set.bin'
@@ -1,7 +1,13 @@
+import asyncio
+
 import pytest
 
-from torrentool.api import Bencode
-from torrentool.exceptions import BencodeDecodingError, BencodeEncodingError
+from torrentool.api import Bencode, DecodeLimits, RawBencoded
+from torrentool.exceptions import BencodeError, BencodeDecodingError, BencodeEncodingError
+from torrentool.bencode import BACKEND_ENV_VAR, _set_env_backend
+from torrentool.filelist import FileList
+
+pytestmark = pytest.mark.usefixtures('bencode_backend')
 
 enc = lambda v: v.encode()
 
@@ -22,6 +28,101 @@ def test_non_utf_string():
     assert decode(bogus, byte_keys={'some'}) == 'J�ban Rosszban [2005] Bor�t�.jpg'
 
 
+def test_decode_text_keys():
+    data = b'd4:infod4:name3:abc5:pathsl1:a2:\xffbee4:rawsl1:xee'
+
+    assert decode(data, text_keys=set()) == {'info': {'name': b'abc', 'paths': [b'a', b'\xffb']}, 'raws': [b'x']}
+    assert decode(data, text_keys={'name', 'paths'}) == {
+        'info': {'name': 'abc', 'paths': ['a', '�b']}, 'raws': [b'x']}
+
+
+def test_decode_list_factories():
+    data = (
+        b'd4:infod5:filesld6:lengthi1e4:pathl1:a1:beed6:lengthi2e4:pathl1:a1:ceee'
+        b'4:listl5:filesee5:filesli1eee')
+
+    decoded = decode(data, list_factories={'files': FileList})
+    files = decoded['info']['files']
+
+    assert isinstance(files, FileList)
+    assert files == [{'length': 1, 'path': ['a', 'b']}, {'length': 2, 'path': ['a', 'c']}]
+    assert files._table == ['a', 'b', 'c']
+    # Lists under other keys and items of lists are not affected.
+    assert decoded['info']['list'] == ['files']
+    assert isinstance(decoded['files'], FileList)
+    assert decoded['files'] == [1]
+
+    assert decode(data) == decode(data, list_factories={})
+
+
+def test_decode_raw_keys():
+    data = b'd4:infod4:name3:abc5:pathsl1:a2:\xffbee3:rawl1:xe4:zerod1:bi1e1:ai2eee'
+    decoded = decode(data, raw_keys={'info', 'zero'})
+
+    assert decoded['raw'] == ['x']
+    assert decoded['info'] == b'd4:name3:abc5:pathsl1:a2:\xffbee'
+    assert isinstance(decoded['info'], RawBencoded)
+
+    # Unsorted keys are kept as is.
+    assert decoded['zero'] == b'd1:bi1e1:ai2ee'
+    assert Bencode.encode(decoded) == data
+
+    assert decode(b'li1ed1:ali2ee1:b1:cee', raw_keys={'a'}) == [1, {'a': b'li2ee', 'b': 'c'}]
+
+    for bogus in (b'd1:ali1e', b'd1:a5:abce', b'd1:a1x:e', b'd1:ai1', b'd1:a1', b'd1:aee', b'd1:axe'):
+        with pytest.raises(BencodeDecodingError):
+            decode(bogus, raw_keys={'a'})
+
+
+def test_decode_intern():
+    data = b'ld4:pathl1:a1:beed4:pathl1:a1:ceee'
+    decoded = decode(data, intern=True)
+
+    assert decoded == [{'path': ['a', 'b']}, {'path': ['a', 'c']}]
+    assert decoded[0]['path'][0] is decoded[1]['path'][0]
+    assert next(iter(decoded[0])) is next(iter(decoded[1]))
+
+    decoded = decode(data, intern=True, text_keys=set())
+    assert decoded[0]['path'][0] == b'a'
+    assert decoded[0]['path'][0] is decoded[1]['path'][0]
+
+
+def test_encode_sequence():
+    files = FileList([{'length': 1, 'path': ['a']}])
+    assert Bencode.encode({'files': files}) == b'd5:filesld6:lengthi1e4:pathl1:aeeee'
+
+
+def test_adecode():
+    assert asyncio.run(Bencode.adecode(b'd1:ai1ee')) == {'a': 1}
+
+
+def test_extract(torr_test_dir):
+    data = b'd8:announce3:url4:infod5:filesld6:lengthi1eee4:name3:abc12:piece lengthi4e6:pieces2:\xff\xffe1:zi1ee'
+
+    assert Bencode.extract(data, ['info.name', ('info', 'piece length'), 'info.pieces', 'announce', 'info.x']) == {
+        'info.name': 'abc',
+        ('info', 'piece length'): 4,
+        'info.pieces': b'\xff\xff',
+        'announce': 'url',
+    }
+    assert Bencode.extract(data, ['info', 'info.name', 'z'], raw=True) == {
+        'info': data[22:-7],
+        'info.name': b'3:abc',
+        'z': b'i1e',
+    }
+    assert Bencode.extract(data, []) == {}
+
+    # Scanning stops as soon as values are found.
+    assert Bencode.extract(data[:30] + b'x', ['announce']) == {'announce': 'url'}
+
+    for bogus in (b'', b'le', b'di1ei1ee', b'd1:a', b'd1:ai1e', b'd1:ad1:bi1e'):
+        with pytest.raises(BencodeDecodingError):
+            Bencode.extract(bogus, ['a.b', 'c'])
+
+    data = open(torr_test_dir, 'rb').read()
+    assert Bencode.extract(data, ['info.name', 'comment']) == {'info.name': 'torrtest', 'comment': 'примечание'}
+
+
 def test_read_file_dir(torr_test_dir, struct_torr_dir):
     decoded = Bencode.read_file(torr_test_dir)
     assert decoded == struct_torr_dir
@@ -60,6 +161,76 @@ def test_decode_errors():
     with pytest.raises(BencodeDecodingError):
         Bencode.read_string('u:some')
 
+    for bogus in ('i', 'i12', '5:spam', '4', 'l4:spam', 'd', 'ixe', '1x:a', 'dli1eei1ee', 'di1ei2ee'):
+        with pytest.raises(BencodeDecodingError):
+            decode(bogus)
+
+    for bogus, number in ((b'i1xe', '1x'), (b'i' + b'1' * 20 + b'\xffe', '1' * 20 + '\ufffd')):
+        with pytest.raises(BencodeDecodingError) as e:
+            decode(bogus)
+        assert f'Unable to interpret `{number}` as a number.' in f'{e.value}'
+
+
+def test_decode_limits(torr_test_dir, struct_torr_dir):
+    limits = DecodeLimits(max_depth=5, max_int_digits=10, max_str_len=100, max_items=60, max_size=1000)
+    assert Bencode.read_file(torr_test_dir, limits=limits) == struct_torr_dir
+
+    def check(data, message, **kwargs):
+        with pytest.raises(BencodeDecodingError) as e:
+            decode(data, limits=DecodeLimits(**kwargs))
+        assert message in f'{e.value}'
+
+    check('llllee', 'depth exceeds the limit of 2', max_depth=2)
+    assert decode('llee', limits=DecodeLimits(max_depth=2)) == [[]]
+
+    check('i1234e', 'exceeds the limit of 3 digits', max_int_digits=3)
+    check('i-1234e', 'exceeds the limit of 3 digits', max_int_digits=3)
+    check('i' + '9' * 10000, 'exceeds the limit of 3 digits', max_int_digits=3)
+    assert decode('i-123e', limits=DecodeLimits(max_int_digits=3)) == -123
+
+    check('5:abcde', 'length 5 exceeds the limit of 4', max_str_len=4)
+    check('99999999999:a', 'length exceeds the limit of 4', max_str_len=4)
+    assert decode('4:abcd', limits=DecodeLimits(max_str_len=4)) == 'abcd'
+
+    check('li1ei2ei3ee', 'Items number exceeds the limit of 3', max_items=3)
+    assert decode('li1ei2ee', limits=DecodeLimits(max_items=3)) == [1, 2]
+
+    check('4:abcd', 'Data size 6 exceeds the limit of 5 bytes', max_size=5)
+
+    # Keys which are not strings.
+    check('dli1eei1ee', 'Dictionary key at offset 1 is not a string', max_depth=5)
+    check('d1:ai1ei2ei3ee', 'Dictionary key at offset 7 is not a string', max_items=10)
+    check('ddee1:ae', 'Dictionary key at offset 1 is not a string', max_size=100)
+    check(b'd1:a1:x1:\xff1:ye', 'Unable to sort dictionary keys', max_size=100)
+
+    with pytest.raises(BencodeDecodingError) as e:
+        Bencode.read_file(torr_test_dir, limits=DecodeLimits(max_size=10))
+    assert 'File size exceeds' in f'{e.value}'
+
+
+def test_decode_strict(torr_test_dir, struct_torr_dir):
+    assert Bencode.read_file(torr_test_dir, strict=True) == struct_torr_dir
+    assert decode('d1:ai1e1:bl0:i-1eee', strict=True) == {'a': 1, 'b': ['', -1]}
+
+    def check(data, message, offset):
+        with pytest.raises(BencodeDecodingError) as e:
+            decode(data, strict=True)
+        assert message in f'{e.value}'
+        assert e.value.offset == offset
+
+    check('d1:bi1e1:ai2ee', 'offset 7: unsorted dictionary key', 7)
+    check('d1:ai1e1:ai2ee', 'offset 7: duplicate dictionary key', 7)
+    check('di1ei2ee', 'dictionary key is not a string', 1)
+    check('d1:ae', 'dictionary key has no value', 4)
+    check('i-0e', '`-0` is not a canonical number', 1)
+    check('li04ee', '`04` is not a canonical number', 2)
+    check('ie', '`` is not a canonical number', 1)
+    check('04:spam', '`04` is not a canonical number', 0)
+    check('4:spami1e', 'offset 6: trailing data', 6)
+
+    # Bogus strings are not altered.
+    assert decode(b'd1:a1:\xffe', byte_keys={'b'}, strict=True) == {'a': b'\xff'}
+
 
 def test_encode_simple():
     assert encode('spam') == enc('4:spam')
@@ -101,3 +272,29 @@ def test_encode_complex(struct_torr_file, struct_torr_dir, torr_test_file, torr_
 def test_encode_errors():
     with pytest.raises(BencodeEncodingError):
         Bencode.encode(object())
+
+    with pytest.raises(BencodeEncodingError):
+        Bencode.encode({b'key': 1})
+
+
+def test_encode_other_types():
+    assert encode({'a': {1, 2}}) in {enc('d1:ali1ei2eee'), enc('d1:ali2ei1eee')}
+    assert encode(True) == enc('i1e')
+    assert encode(2 ** 80) == enc('i1208925819614629174706176e')
+
+
+def test_backend(monkeypatch):
+    with pytest.raises(BencodeError):
+        Bencode.set_backend('unknown')
+
+    backend_initial = Bencode.get_backend()
+    monkeypatch.setenv(BACKEND_ENV_VAR, 'unknown')
+
+    try:
+        with pytest.warns(RuntimeWarning, match='Unknown bencode backend'):
+            _set_env_backend()
+
+        assert Bencode.get_backend() == 'python'
+
+    finally:
+        Bencode.set_backend(backend_initial)
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from torrentool.cli import start
+
+
+def invoke(*args):
+    return CliRunner().invoke(start, list(args), obj={})
+
+
+def test_edit(tmp_path):
+    info = b'4:infod6:lengthi1e4:name1:a12:piece lengthi16384e6:pieces20:' + b'x' * 20 + b'e'
+    contents = (
+        b'd8:announce3:abc7:comment8:\xff\xfe latin10:created by3:\xe9t\xe9' +
+        info + b'10:x-custom.k1:\x80e')
+
+    filepath = tmp_path / 'a.torrent'
+    filepath.write_bytes(contents)
+    broken = tmp_path / 'b.torrent'
+    broken.write_bytes(b'd8:announce')
+
+    result = invoke('torrent', 'edit', str(tmp_path), '--tracker', 'udp://x', '--workers', '1')
+
+    # Other fields are written back as is.
+    assert filepath.read_bytes() == contents.replace(b'3:abc', b'7:udp://x')
+
+    assert result.exit_code == 1
+    assert 'Torrents edited: 1' in result.output
+    assert f'Failed {broken}' in result.output
+
+
+def test_dupes(tmp_path, torr_test_dir):
+    (tmp_path / 'a.torrent').write_bytes(Path(torr_test_dir).read_bytes())
+    (tmp_path / 'broken.torrent').write_bytes(b'd8:announce')
+
+    result = invoke('torrent', 'dupes', str(tmp_path))
+
+    assert result.exit_code == 0
+    assert f'Skipped {tmp_path / "broken.torrent"}' in result.output
+    assert 'Torrents indexed: 1' in result.output
+
+
+def test_crossseed(tmp_path, datafix_dir, torr_test_dir):
+    torrents_path = tmp_path / 'torrents'
+    torrents_path.mkdir()
+    (torrents_path / 'a.torrent').write_bytes(Path(torr_test_dir).read_bytes())
+    (torrents_path / 'broken.torrent').write_bytes(b'd8:announce')
+    (torrents_path / 'no_pieces.torrent').write_bytes(
+        b'd4:infod5:filesld6:lengthi4e4:pathl8:root.txteee4:name1:xee')
+
+    result = invoke('torrent', 'crossseed', str(torrents_path), str(datafix_dir / 'torrtest'))
+
+    assert result.exit_code == 0
+    assert f'Skipped {torrents_path / "broken.torrent"}' in result.output
+    assert f'Skipped {torrents_path / "no_pieces.torrent"}: Invalid piece length' in result.output
+
+
+def test_create_tee(tmp_path, datafix_dir):
+    result = invoke(
+        'torrent', 'create', str(datafix_dir / 'torrtest'), '--dest', str(tmp_path),
+        '--tee', str(tmp_path / 'copy.bin'))
+
+    assert result.exit_code == 2
+    assert '--tee requires stdin source' in result.output
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,107 @@
+from hashlib import sha1
+from os import path
+
+import pytest
+
+from torrentool.api import Torrent
+from torrentool.crossseed import CrossSeedMatcher, make_links
+from torrentool.exceptions import TorrentError
+
+
+def make_torrent(name, files, piece_length=4):
+    data = b''.join(contents for _, contents in files)
+    pieces = b''.join(
+        sha1(data[idx:idx + piece_length]).digest() for idx in range(0, len(data), piece_length))
+
+    return Torrent({'info': {
+        'name': name,
+        'piece length': piece_length,
+        'pieces': pieces,
+        'files': [{'length': len(contents), 'path': [fname]} for fname, contents in files],
+    }})
+
+
+def test_matcher(tmp_path):
+    data_path = tmp_path / 'data'
+    (data_path / 'sub').mkdir(parents=True)
+    (data_path / 'sub' / 'renamed.bin').write_bytes(b'0123456789abcdef')
+    (data_path / 'decoy.bin').write_bytes(b'0123456789abcdeX')
+    (data_path / 'small.txt').write_bytes(b'xyz')
+
+    full = make_torrent('full', [('a.bin', b'0123456789abcdef'), ('small.txt', b'xyz'), ('empty', b'')])
+    other = make_torrent('other', [('a.bin', b'0000000000000000')])
+    missing = make_torrent('missing', [('a.bin', b'0123456789abcdef'), ('z', b'12345')])
+
+    matcher = CrossSeedMatcher(data_path, samples=3)
+    matches = list(matcher.match_many([full, other, missing, Torrent()]))
+    assert len(matches) == 1
+
+    match = matches[0]
+    assert match.info_hash == full.info_hash
+    assert match.links == [
+        (str(data_path / 'sub' / 'renamed.bin'), path.join('full', 'a.bin'), True),
+        (str(data_path / 'small.txt'), path.join('full', 'small.txt'), False),
+    ]
+
+    assert matcher._get_samples(0, 10) == [0, 4, 9]
+    assert matcher._get_samples(3, 4) == [3]
+    assert matcher._get_samples(3, 3) == []
+
+    dest_path = tmp_path / 'seeding'
+    created = make_links(match, dest_path)
+    assert len(created) == 2
+    assert (dest_path / 'full' / 'a.bin').read_bytes() == b'0123456789abcdef'
+    assert (dest_path / 'full' / 'a.bin').stat().st_nlink == 2
+    assert make_links(match, dest_path) == []
+
+    dest_path = tmp_path / 'seeding_sym'
+    make_links(match, dest_path, symlinks=True)
+    assert (dest_path / 'full' / 'small.txt').is_symlink()
+
+
+def test_matcher_sources_used_once(tmp_path):
+    (tmp_path / 'one.txt').write_bytes(b'xyz')
+
+    torrent = make_torrent('t', [('a.txt', b'xyz'), ('b.txt', b'abc')])
+    assert CrossSeedMatcher(tmp_path).match(torrent) is None
+
+    (tmp_path / 'two.txt').write_bytes(b'abc')
+    match = CrossSeedMatcher(tmp_path).match(torrent)
+    assert {source for source, _, _ in match.links} == {str(tmp_path / 'one.txt'), str(tmp_path / 'two.txt')}
+
+
+def test_make_links_unsafe(tmp_path):
+    data_path = tmp_path / 'data'
+    data_path.mkdir()
+    (data_path / 'a.bin').write_bytes(b'xyz')
+
+    dest_path = tmp_path / 'seeding'
+
+    for parts in (['..', '..', 'a.bin'], ['.', 'a.bin'], ['x/', '/a.bin'], ['/tmp/a.bin']):
+        torrent = Torrent({'info': {
+            'name': 'unsafe', 'piece length': 4, 'pieces': sha1(b'xyz').digest(),
+            'files': [{'length': 3, 'path': parts}],
+        }})
+        match = CrossSeedMatcher(data_path).match(torrent)
+
+        with pytest.raises(TorrentError):
+            make_links(match, dest_path)
+
+    assert not dest_path.exists()
+
+    # Symbolic link leading outside.
+    dest_path.mkdir()
+    (dest_path / 'unsafe').symlink_to(tmp_path)
+    match = CrossSeedMatcher(data_path).match(make_torrent('unsafe', [('a.bin', b'xyz')]))
+
+    with pytest.raises(TorrentError):
+        make_links(match, dest_path)
+
+
+def test_matcher_no_piece_length(tmp_path):
+    (tmp_path / 'a.bin').write_bytes(b'xyz')
+    torrent = make_torrent('a', [('a.bin', b'xyz')])
+    del torrent._struct['info']['piece length']
+
+    with pytest.raises(TorrentError):
+        CrossSeedMatcher(tmp_path).match(torrent)
@@ -0,0 +1,155 @@
+import socket
+import subprocess
+import sys
+from os import getcwd
+from tempfile import mkdtemp
+from threading import Thread
+from time import sleep
+
+import click
+
+from torrentool.daemon import forward, serve
+
+
+def get_imported(module: str) -> set:
+    # Modules imported by a module on top of those imported on interpreter startup.
+    code = f'import sys; initial = set(sys.modules); import {module}; print(" ".join(set(sys.modules) - initial))'
+    return set(subprocess.check_output([sys.executable, '-c', code]).decode().split())
+
+
+def test_startup_imports():
+    # Heavy modules are imported by commands which need them.
+    imported = get_imported('torrentool.cli')
+
+    assert 'click' in imported
+    assert not imported & {'torrentool.api', 'torrentool.torrent', 'tarfile', 'zipfile', 'concurrent.futures'}
+
+    assert 'click' not in get_imported('torrentool.daemon')
+
+
+def test_daemon(capsys):
+
+    @click.command()
+    @click.argument('value')
+    def command(value):
+        click.echo(f'{value} in {getcwd()}')
+
+        if value == 'fail':
+            raise click.exceptions.Exit(3)
+
+    socket_path = f'{mkdtemp()}/daemon.sock'
+
+    assert forward(socket_path, ['a']) is None
+
+    Thread(target=serve, args=(socket_path, command), daemon=True).start()
+
+    for _ in range(50):
+        code = forward(socket_path, ['a'])
+
+        if code is not None:
+            break
+
+        sleep(0.05)
+
+    assert code == 0
+    assert capsys.readouterr().out == f'a in {getcwd()}\n'
+
+    assert forward(socket_path, ['fail']) == 3
+    assert forward(socket_path, []) == 2
+    assert 'Missing argument' in capsys.readouterr().err
+
+
+def test_daemon_stdin(capsys):
+
+    @click.group()
+    def group():
+        pass
+
+    @group.command()
+    @click.argument('source', type=click.Path(allow_dash=True))
+    @click.option('--tracker', default=None)
+    def create(source, tracker):
+        click.echo(f'{source} {tracker}')
+
+    @group.command()
+    def watch():
+        click.echo('watching')
+
+    socket_path = f'{mkdtemp()}/daemon.sock'
+    Thread(target=serve, args=(socket_path, group), daemon=True).start()
+
+    for _ in range(50):
+        code = forward(socket_path, ['create', 'a', '--tracker', '-'])
+
+        if code is not None:
+            break
+
+        sleep(0.05)
+
+    # Option value is not stdin.
+    assert code == 0
+    assert capsys.readouterr().out == 'a -\n'
+
+    # Commands reading from stdin are to be run locally.
+    assert forward(socket_path, ['create', '-']) is None
+    assert forward(socket_path, ['create', '--tracker', 'x', '--', '-']) is None
+
+    # Long-running commands are run locally too.
+    assert forward(socket_path, ['watch']) is None
+    assert capsys.readouterr().out == ''
+
+
+def test_daemon_bad_requests():
+
+    @click.command()
+    def command():
+        click.echo('done')
+
+    socket_path = f'{mkdtemp()}/daemon.sock'
+    Thread(target=serve, args=(socket_path, command), daemon=True).start()
+
+    def send(data: bytes) -> bytes:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(socket_path)
+            conn.sendall(data)
+            conn.shutdown(socket.SHUT_WR)
+            return conn.recv(65536)
+
+    for _ in range(50):
+        try:
+            send(b'{}')
+            break
+
+        except OSError:
+            sleep(0.05)
+
+    for data in (b'{}', b'[]', b'{"args": [1], "cwd": "/", "color": false}', b'{"args": []}'):
+        assert send(data) == b''
+
+    # Daemon is still serving.
+    assert forward(socket_path, []) == 0
+
+
+def test_forward_broken_response():
+    socket_path = f'{mkdtemp()}/daemon.sock'
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(socket_path)
+    server.listen()
+
+    def respond():
+        # Dies in the middle of a response.
+        conn, _ = server.accept()
+
+        with conn:
+            conn.recv(65536)
+            conn.sendall(b'{"stdout": "partial')
+
+    thread = Thread(target=respond)
+    thread.start()
+
+    try:
+        assert forward(socket_path, ['a']) is None
+
+    finally:
+        thread.join()
+        server.close()
@@ -0,0 +1,85 @@
+from hashlib import sha1
+
+from torrentool.api import Torrent
+from torrentool.dedup import DuplicatesIndex, get_file_signatures
+
+
+def make_torrent(name, files, piece_length=4):
+    data = b''.join(contents for _, contents in files)
+    pieces = b''.join(
+        sha1(data[idx:idx + piece_length]).digest() for idx in range(0, len(data), piece_length))
+
+    return Torrent({'info': {
+        'name': name,
+        'piece length': piece_length,
+        'pieces': pieces,
+        'files': [{'length': len(contents), 'path': [fname]} for fname, contents in files],
+    }})
+
+
+def test_file_signatures():
+    torrent = make_torrent('one', [('a', b'12345678'), ('b', b'xy'), ('c', b'abcdefgh')])
+    signatures = get_file_signatures(torrent)
+
+    # `b` is too small to be signed.
+    assert [name for _, name in signatures] == ['one/a', 'one/c']
+
+    renamed = make_torrent('two', [('z', b'12345678')])
+    assert get_file_signatures(renamed)[0][0] == signatures[0][0]
+
+    assert get_file_signatures(Torrent()) == []
+
+
+def test_index(tmp_path):
+    full = make_torrent('full', [('a', b'12345678'), ('b', b'abcdefgh')])
+    part = make_torrent('part', [('renamed', b'12345678')])
+    other = make_torrent('other', [('x', b'00000000')])
+    small = make_torrent('small', [('s', b'xyz')])
+    small_copy = make_torrent('small_copy', [('s2', b'xyz')])
+
+    index_path = tmp_path / 'dupes.idx'
+
+    with DuplicatesIndex(index_path) as index:
+        assert index.add_many([full, part, other, small, small_copy]) == 5
+        assert not index.add(full)
+
+    with DuplicatesIndex(index_path) as index:
+        duplicates = {(match.info_hash, match.other_hash): match for match in index.get_duplicates()}
+        assert len(duplicates) == 2
+
+        match = duplicates[(part.info_hash, full.info_hash)]
+        assert match.kind == 'subset'
+        assert match.shared_files == 1
+        assert match.shared_pieces == 2
+
+        match = duplicates[(small.info_hash, small_copy.info_hash)]
+        assert match.kind == 'same'
+        assert match.shared_files == 0
+        assert match.shared_pieces == 1
+
+        matches = index.get_matches(make_torrent('new', [('b', b'abcdefgh'), ('c', b'0123')]))
+        assert len(matches) == 1
+        assert matches[0].other_hash == full.info_hash
+        assert matches[0].kind == 'overlap'
+
+        assert index.get_matches(full)[0].other_hash == part.info_hash
+
+
+def test_duplicates_common_pieces():
+    zeros = bytes(4)
+    torrents = [make_torrent(f't{idx}', [('z', zeros), ('u', b'%04d' % idx)]) for idx in range(5)]
+
+    with DuplicatesIndex() as index:
+        index.add_many(torrents)
+
+        assert len(list(index.get_duplicates())) == 10
+        assert list(index.get_duplicates(max_holders=4)) == []
+
+        # The same cut-off applies to lookups.
+        assert len(index.get_matches(torrents[0])) == 4
+        assert index.get_matches(torrents[0], max_holders=4) == []
+
+        # Not indexed torrent is one more holder.
+        other = make_torrent('other', [('z', zeros), ('v', b'vvvv')])
+        assert len(index.get_matches(other, max_holders=6)) == 5
+        assert index.get_matches(other, max_holders=5) == []
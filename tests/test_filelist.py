@@ -0,0 +1,55 @@
+import pytest
+
+from torrentool.filelist import FileList
+
+
+def test_filelist():
+    entries = [
+        {'length': 1, 'path': ['dir', 'a']},
+        {'length': 2, 'path': ['dir', 'b'], 'attr': 'x'},
+        {'length': 3, 'path': ['c']},
+    ]
+    files = FileList(entries)
+
+    assert len(files) == 3
+    assert files == entries
+    assert list(files) == entries
+    assert files[1] == entries[1]
+    assert files[-1] == entries[2]
+    assert files[1:] == entries[1:]
+    assert files._table == ['dir', 'a', 'b', 'c']
+
+    with pytest.raises(IndexError):
+        files[3]
+
+    files.append({'length': 0, 'path': ['dir', 'a']})
+    assert files[3] == {'length': 0, 'path': ['dir', 'a']}
+    assert len(files._table) == 4
+
+    assert FileList() == []
+    assert files != entries
+
+
+def test_filelist_read_only():
+    files = FileList([{'length': 1, 'path': ['a']}])
+
+    with pytest.raises(TypeError):
+        files[0] = {'length': 2, 'path': ['b']}
+
+    with pytest.raises(TypeError):
+        del files[0]
+
+
+def test_filelist_irregular():
+    entries = [
+        {'length': 1, 'path': ['a']},
+        {'length': 'x', 'path': ['b']},
+        {'path': 'c'},
+        {'length': 2, 'path': ['d', 1]},
+        'broken',
+        {'length': 3, 'path': ['a', 'e']},
+    ]
+    files = FileList(entries)
+
+    assert len(files) == 6
+    assert files == entries
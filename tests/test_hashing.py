@@ -0,0 +1,263 @@
+from hashlib import sha1
+from threading import Lock
+from time import sleep
+
+import pytest
+
+from torrentool import hashing
+from torrentool.hashing import (
+    DeviceSlots, PieceHasher, HashingCheckpoint, IOPolicy, hash_files, read_file, verify_files, split_aligned)
+
+
+def test_piece_hasher():
+    data = bytes(range(256)) * 5
+    expected = b''.join(sha1(data[idx:idx + 100]).digest() for idx in range(0, len(data), 100))
+
+    for chunk_size in (1, 7, 100, 333, 5000):
+        hasher = PieceHasher(100)
+
+        for idx in range(0, len(data), chunk_size):
+            hasher.update(data[idx:idx + chunk_size])
+
+        assert hasher.pieces_count == 12
+        assert hasher.finish() == expected
+
+
+def test_hash_files_checkpoint(tmp_path):
+    data = b''
+    files = []
+
+    for idx, size in enumerate((150, 10, 300)):
+        contents = bytes([idx]) * size
+        fpath = tmp_path / f'{idx}.bin'
+        fpath.write_bytes(contents)
+        files.append((str(fpath), size))
+        data += contents
+
+    expected = b''.join(sha1(data[idx:idx + 64]).digest() for idx in range(0, len(data), 64))
+    assert hash_files(files, 64) == expected
+
+    checkpoint_path = tmp_path / 'hashing.checkpoint'
+
+    def get_checkpoint():
+        return HashingCheckpoint(checkpoint_path, files=files, piece_size=64)
+
+    # Store a fake progress to make sure hashing is resumed from it.
+    fake_pieces = b'x' * 20 * 3
+    get_checkpoint().save(fake_pieces)
+
+    assert get_checkpoint().load() == fake_pieces
+    assert HashingCheckpoint(checkpoint_path, files=files, piece_size=32).load() == b''
+
+    assert hash_files(files, 64, checkpoint=get_checkpoint()) == fake_pieces + expected[60:]
+    assert not checkpoint_path.exists()
+
+    # Source has changed.
+    get_checkpoint().save(fake_pieces)
+    (tmp_path / '1.bin').write_bytes(b'y' * 11)
+    files[1] = (files[1][0], 11)
+    assert get_checkpoint().load() == b''
+
+    # Progress is stored periodically.
+    checkpoint = HashingCheckpoint(checkpoint_path, files=files, piece_size=64, interval=0)
+    checkpoint.update(b'z' * 20)
+    assert get_checkpoint().load() == b'z' * 20
+
+    # New digests are appended, a partial trailing digest is dropped.
+    size_header = checkpoint_path.stat().st_size - 20
+    checkpoint.update(b'z' * 40)
+    assert checkpoint_path.stat().st_size == size_header + 40
+
+    with open(checkpoint_path, 'ab') as f:
+        f.write(b'partial')
+
+    checkpoint = get_checkpoint()
+    assert checkpoint.load() == b'z' * 40
+    checkpoint.save(b'z' * 60)
+    assert checkpoint_path.stat().st_size == size_header + 60
+    assert get_checkpoint().load() == b'z' * 60
+
+
+def test_zeros():
+    data = b'a' * 50 + bytes(400) + b'b' * 30
+
+    hasher = PieceHasher(100)
+    hasher.update(data)
+    expected = hasher.finish()
+
+    assert expected == b''.join(sha1(data[idx:idx + 100]).digest() for idx in range(0, len(data), 100))
+
+    hasher = PieceHasher(100)
+    hasher.update(data[:50])
+    hasher.update_zeros(400)
+    hasher.update(data[450:])
+    assert hasher.finish() == expected
+
+
+def test_sparse_file(tmp_path):
+    piece_size = 65536
+    fpath = tmp_path / 'sparse.img'
+
+    with open(fpath, 'wb') as f:
+        f.write(b'head')
+        f.seek(piece_size * 10)
+        f.write(b'middle')
+        f.truncate(piece_size * 20 + 3)
+
+    data = fpath.read_bytes()
+    size = len(data)
+
+    chunks = list(read_file(fpath, holes=True))
+    assert sum(chunk if isinstance(chunk, int) else len(chunk) for chunk in chunks) == size
+    assert b''.join(bytes(chunk) if isinstance(chunk, int) else chunk for chunk in chunks) == data
+
+    assert b''.join(read_file(fpath, offset=2, length=10)) == data[2:12]
+
+    expected = b''.join(sha1(data[idx:idx + piece_size]).digest() for idx in range(0, size, piece_size))
+    assert hash_files([(str(fpath), size)], piece_size) == expected
+
+
+def test_io_policy(tmp_path, monkeypatch):
+    data = bytes(range(256)) * 4
+    fpath = tmp_path / 'data.bin'
+    fpath.write_bytes(data)
+    files = [(str(fpath), len(data))]
+
+    assert [len(chunk) for chunk in read_file(fpath, policy=IOPolicy(block_size=300))] == [300, 300, 300, 124]
+
+    expected = hash_files(files, 100)
+    policy = IOPolicy(block_size=64, readahead=128, drop_cache=True, rate_limit=10240)
+
+    # Clock is stopped: the whole data is read at once.
+    sleeps = []
+    monkeypatch.setattr(hashing, 'monotonic', lambda: 0)
+    monkeypatch.setattr(hashing, 'sleep', sleeps.append)
+
+    assert hash_files(files, 100, io_policy=policy) == expected
+    assert max(sleeps) == pytest.approx(0.1)
+
+    assert verify_files(files, 100, expected, io_policy=policy) == []
+
+
+def test_throttle(monkeypatch):
+    now = 0.0
+    sleeps = []
+
+    def sleep_(delay):
+        nonlocal now
+        sleeps.append(delay)
+        now += delay
+
+    monkeypatch.setattr(hashing, 'monotonic', lambda: now)
+    monkeypatch.setattr(hashing, 'sleep', sleep_)
+
+    throttle = hashing.Throttle(100)
+
+    throttle.consume(50)
+    assert sleeps == [0.5]
+
+    # Idle time is made use of.
+    now += 1
+    throttle.consume(100)
+    assert sleeps == [0.5]
+
+    throttle.consume(100)
+    assert sleeps == [0.5, 1.0]
+
+
+def test_verify_files(tmp_path):
+    files = []
+
+    for idx, size in enumerate((150, 10, 300)):
+        fpath = tmp_path / f'{idx}.bin'
+        fpath.write_bytes(bytes([idx]) * size)
+        files.append((str(fpath), size))
+
+    pieces = hash_files(files, 64)
+    assert verify_files(files, 64, pieces) == []
+
+    # Damage a single piece.
+    with open(files[2][0], 'r+b') as f:
+        f.seek(200)
+        f.write(b'x')
+
+    assert verify_files(files, 64, pieces) == [5]
+
+    # Wrong size and missing files invalidate all their pieces.
+    (tmp_path / '1.bin').write_bytes(b'y')
+    assert verify_files(files, 64, pieces) == [2, 5]
+
+    (tmp_path / '0.bin').unlink()
+    assert verify_files(files, 64, pieces) == [0, 1, 2, 5]
+
+    assert verify_files(files, 64, pieces[:20]) == [0, 1, 2, 3, 4, 5, 6, 7]
+
+
+def test_hash_files_workers(tmp_path):
+    files = []
+
+    for idx, size in enumerate((100, 28, 64, 10, 54, 3)):
+        fpath = tmp_path / f'{idx}.bin'
+        fpath.write_bytes(bytes([idx + 1]) * size)
+        files.append((str(fpath), size))
+
+    files.insert(4, (None, 10))
+
+    groups = split_aligned(files, 64)
+    assert [[size for _, size in group] for group in groups] == [[100, 28], [64], [10, 10, 54, 3]]
+
+    expected = hash_files(files, 64)
+    assert hash_files(files, 64, workers=3) == expected
+    assert verify_files(files, 64, expected) == []
+
+
+def test_device_slots(tmp_path, monkeypatch):
+    files = []
+
+    for idx in range(4):
+        fpath = tmp_path / f'{idx}.bin'
+        fpath.write_bytes(bytes([idx]) * 100)
+        files.append((str(fpath), 100))
+
+    stat_orig = hashing.stat
+
+    class FakeStat:
+        # Files 0 and 1 are on one device, 2 and 3 on another.
+        def __init__(self, fpath):
+            self.st_size = stat_orig(fpath).st_size
+            self.st_mtime_ns = stat_orig(fpath).st_mtime_ns
+            self.st_dev = int(fpath[-5]) // 2
+
+    monkeypatch.setattr(hashing, 'stat', FakeStat)
+
+    lock = Lock()
+    reading = {}
+    reading_max = {}
+
+    read_file_orig = hashing.read_file
+
+    def read_file(fpath, **kwargs):
+        device = FakeStat(fpath).st_dev
+
+        with lock:
+            reading[device] = reading.get(device, 0) + 1
+            reading_max[device] = max(reading_max.get(device, 0), reading[device])
+
+        sleep(0.02)
+        yield from read_file_orig(fpath, **kwargs)
+
+        with lock:
+            reading[device] -= 1
+
+    monkeypatch.setattr(hashing, 'read_file', read_file)
+
+    expected = hash_files(files, 100)
+    reading_max.clear()
+
+    slots = DeviceSlots()
+    assert hash_files(files, 100, workers=4, device_slots=slots) == expected
+    assert reading_max == {0: 1, 1: 1}
+
+    reading_max.clear()
+    assert verify_files(files, 100, expected, device_slots=slots) == []
+    assert verify_files([(str(tmp_path / 'missing.bin'), 100)], 100, expected[:20], device_slots=slots) == [0]
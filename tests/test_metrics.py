@@ -0,0 +1,84 @@
+from os.path import getsize
+from urllib.request import urlopen
+
+import pytest
+
+from torrentool import metrics
+from torrentool.api import Bencode, Torrent
+from torrentool.exceptions import BencodeDecodingError
+
+
+@pytest.fixture
+def metrics_enabled():
+    metrics.reset()
+    metrics.enable()
+
+    yield metrics
+
+    metrics.disable()
+    metrics.reset()
+
+
+def test_disabled(torr_test_file):
+    metrics.reset()
+    Torrent.from_file(torr_test_file)
+    assert metrics.FILES_PARSED.value == 0
+
+
+def test_metrics(metrics_enabled, torr_test_file, datafix_dir, tmp_path):
+    torrent = Torrent.from_file(torr_test_file)
+
+    with pytest.raises(BencodeDecodingError):
+        Bencode.decode(b'd1:a')
+
+    assert metrics.FILES_PARSED.value == 1
+    assert metrics.BYTES_DECODED.value == getsize(torr_test_file)
+    assert metrics.DECODE_ERRORS.value == 1
+    assert metrics.PHASE_DECODE.count == 1
+
+    torrent = Torrent.create_from(datafix_dir / 'torrtest', padding=True)
+    torrent.verify(datafix_dir / 'torrtest')
+
+    assert metrics.BYTES_READ.value == 2 * torrent.total_size - 2 * sum(
+        file.length for file in torrent.files if file.is_padding)
+    assert metrics.PIECES_HASHED.value == 2 * len(torrent.pieces)
+    assert 0 < metrics.PHASE_READ.count <= metrics.PHASE_HASH.count
+
+    rendered = metrics.render()
+
+    assert rendered.count('# TYPE torrentool_phase_seconds histogram') == 1
+    assert 'torrentool_decode_errors_total 1\n' in rendered
+    assert 'torrentool_phase_seconds_count{phase="decode"} 1\n' in rendered
+    assert 'torrentool_phase_seconds_bucket{phase="decode",le="+Inf"} 1\n' in rendered
+
+    server = metrics.serve(port=0)
+
+    try:
+        with urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics') as response:
+            assert response.read().decode() == metrics.render()
+
+    finally:
+        server.shutdown()
+
+    filepath = tmp_path / 'metrics.prom'
+
+    with metrics.TextfileExporter(filepath, interval=100):
+        pass
+
+    assert filepath.read_text() == metrics.render()
+
+
+def test_histogram():
+    histogram = metrics.Histogram('test', 'Test.', buckets=(1, 2))
+    metrics._registry.remove(histogram)
+
+    for value in (0.5, 1, 1.5, 3):
+        histogram.observe(value)
+
+    assert histogram.get_samples() == [
+        'test_bucket{le="1"} 2',
+        'test_bucket{le="2"} 3',
+        'test_bucket{le="+Inf"} 4',
+        'test_sum 6.0',
+        'test_count 4',
+    ]
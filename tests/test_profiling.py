@@ -0,0 +1,26 @@
+from pstats import Stats
+
+from torrentool.api import Torrent
+from torrentool.profiling import Profiler
+
+
+def test_profiler(torr_test_dir, tmp_path):
+    stats_path = tmp_path / 'stats.prof'
+
+    with Profiler(stats_path=stats_path, trace_memory=True) as profiler:
+        torrents = [Torrent.from_file(torr_test_dir) for _ in range(100)]
+
+    assert len(torrents) == 100
+    assert profiler.peak > 0
+    assert Stats(str(stats_path)).total_calls
+
+    summary = '\n'.join(profiler.get_summary())
+
+    assert 'Top functions' in summary
+    assert 'Peak traced memory' in summary
+    assert 'bencode.py' in summary
+
+    with Profiler() as profiler:
+        pass
+
+    assert profiler.get_summary() == []
@@ -0,0 +1,76 @@
+from hashlib import sha1
+
+import pytest
+
+from torrentool.api import Torrent
+from torrentool.exceptions import TorrentError
+from torrentool.reader import PieceReader
+
+
+def test_reader(tmp_path):
+    data_path = tmp_path / 'data'
+    data_path.mkdir()
+
+    contents = [b'0123456789', b'', b'abc', b'ABCDEFGHIJKLMNOPQRST']
+    for idx, chunk in enumerate(contents):
+        (data_path / f'{idx}.bin').write_bytes(chunk)
+
+    data = b''.join(contents)
+    torrent = Torrent.create_from(data_path)
+
+    with PieceReader(torrent, tmp_path, block_size=4, cache_size=12, max_open_files=2) as reader:
+        assert reader.total_size == len(data)
+
+        for index, digest in enumerate(torrent.pieces):
+            piece = reader.get_piece(index)
+            assert isinstance(piece, memoryview)
+            assert sha1(piece).digest() == digest
+
+        for offset in range(len(data)):
+            for length in (1, 3, 5, 17, 100):
+                assert bytes(reader.read(offset, length)) == data[offset:offset + length]
+
+        assert bytes(reader.get_block(0, 11, 4)) == data[11:15]
+
+        stats = reader.stats
+        assert stats.hits and stats.misses and stats.evictions
+        assert len(reader._blocks) == 3
+        assert 0 < stats.hit_ratio < 1
+        assert len(reader._handles) == 2
+
+        with pytest.raises(TorrentError):
+            reader.get_piece(len(torrent.pieces))
+
+        with pytest.raises(TorrentError):
+            reader.read(-1, 2)
+
+        for offset, length in ((-1, 2), (0, -1), (torrent.piece_length, 1)):
+            with pytest.raises(ValueError):
+                reader.get_block(0, offset, length)
+
+        with pytest.raises(ValueError):
+            # The last piece is shorter.
+            reader.get_block(len(torrent.pieces) - 1, len(data) % torrent.piece_length, 1)
+
+    (data_path / '3.bin').write_bytes(b'short')
+
+    with PieceReader(torrent, tmp_path) as reader:
+        with pytest.raises(TorrentError):
+            reader.read(20, 10)
+
+    (data_path / '3.bin').unlink()
+
+    with PieceReader(torrent, tmp_path) as reader:
+        with pytest.raises(TorrentError):
+            reader.read(20, 10)
+
+
+def test_reader_unsafe(tmp_path):
+    for parts in (['..', 'secret'], ['a', '/etc/passwd'], ['.', 'a']):
+        torrent = Torrent({'info': {
+            'name': 'unsafe', 'piece length': 4, 'pieces': b'x' * 20,
+            'files': [{'length': 1, 'path': ['ok']}, {'length': 3, 'path': parts}],
+        }})
+
+        with pytest.raises(TorrentError):
+            PieceReader(torrent, tmp_path)
@@ -0,0 +1,61 @@
+from threading import Lock
+from time import sleep
+
+import pytest
+
+from torrentool.scheduler import HashingScheduler, get_device
+
+
+def test_get_device(tmp_path):
+    assert get_device(tmp_path / 'missing' / 'file') == get_device(tmp_path)
+
+
+def test_readers_per_device(tmp_path):
+    lock = Lock()
+    running = []
+    running_max = []
+
+    def job(value):
+        with lock:
+            running.append(value)
+            running_max.append(len(running))
+        sleep(0.02)
+        with lock:
+            running.remove(value)
+        return value * 2
+
+    for readers, expected in ((1, 1), (2, 2)):
+        running_max.clear()
+
+        with HashingScheduler(readers_per_device=readers, workers=4) as scheduler:
+            futures = [scheduler.submit(tmp_path, job, idx) for idx in range(5)]
+
+        assert [future.result() for future in futures] == [0, 2, 4, 6, 8]
+        assert max(running_max) == expected
+
+    def fail():
+        raise ValueError('bad')
+
+    with HashingScheduler() as scheduler:
+        future = scheduler.submit(tmp_path, fail)
+
+    with pytest.raises(ValueError):
+        future.result()
+
+    scheduler = HashingScheduler()
+    futures = [scheduler.submit(tmp_path, sleep, 0.02) for _ in range(3)]
+    scheduler.shutdown(cancel_pending=True)
+    assert futures[-1].cancelled()
+
+
+def test_create_verify(datafix_dir, tmp_path):
+    sources = [datafix_dir / 'torrtest', datafix_dir / 'torrtest' / 'root.txt']
+
+    with HashingScheduler(workers=2) as scheduler:
+        torrents = [future.result() for future in [scheduler.submit_create(src) for src in sources]]
+        assert [torrent.name for torrent in torrents] == ['torrtest', 'root.txt']
+
+        verified = [scheduler.submit_verify(torrent, src) for torrent, src in zip(torrents, sources)]
+        assert [future.result() for future in verified] == [[], []]
+
+        assert scheduler.submit_verify(torrents[0], tmp_path / 'missing').result() == [0]
@@ -0,0 +1,63 @@
+from torrentool.api import Torrent
+from torrentool.shards import split_files, write_manifest
+
+
+def make_files(*specs):
+    return [(path, size, path.split('/')) for path, size in specs]
+
+
+def get_paths(shards):
+    return [[file[0] for file in shard] for shard in shards]
+
+
+def test_split_files():
+    files = make_files(
+        ('a.txt', 10),
+        ('d1/b.txt', 30),
+        ('d1/c.txt', 30),
+        ('d1/s/d.txt', 20),
+        ('d2/e.txt', 50),
+        ('d3/big.bin', 500),
+        ('z.txt', 5),
+    )
+
+    assert split_files([], max_size=10) == []
+    assert get_paths(split_files(files)) == [[file[0] for file in files]]
+
+    # Directories are kept whole when they fit.
+    assert get_paths(split_files(files, max_size=100)) == [
+        ['a.txt', 'd1/b.txt', 'd1/c.txt', 'd1/s/d.txt'],
+        ['d2/e.txt'],
+        ['d3/big.bin'],  # Larger than the limit.
+        ['z.txt'],
+    ]
+
+    # Directories too large are split along subdirectories.
+    assert get_paths(split_files(files, max_size=60)) == [
+        ['a.txt', 'd1/b.txt'],
+        ['d1/c.txt', 'd1/s/d.txt'],
+        ['d2/e.txt'],
+        ['d3/big.bin'],
+        ['z.txt'],
+    ]
+
+    assert get_paths(split_files(files, max_files=3)) == [
+        ['a.txt'],
+        ['d1/b.txt', 'd1/c.txt', 'd1/s/d.txt'],
+        ['d2/e.txt', 'd3/big.bin', 'z.txt'],
+    ]
+
+    for max_size, max_files in ((1, None), (None, 1)):
+        assert get_paths(split_files(files, max_size=max_size, max_files=max_files)) == [
+            [file[0]] for file in files]
+
+
+def test_write_manifest(tmp_path):
+    torrents = [
+        Torrent({'info': {'name': 'one', 'length': 1}}),
+        Torrent({'info': {'name': 'two', 'length': 2}}),
+    ]
+    manifest = tmp_path / 'shards.manifest'
+    write_manifest(torrents, manifest)
+
+    assert manifest.read_text().splitlines() == [torrent.get_magnet() for torrent in torrents]
@@ -0,0 +1,35 @@
+import pickle
+from multiprocessing import get_context
+
+import pytest
+
+from torrentool.api import Torrent
+from torrentool.exceptions import TorrentError
+from torrentool.shared import SharedTorrent
+
+pytest.importorskip('multiprocessing.shared_memory')
+
+
+def get_files(shared):
+    return shared.torrent.files
+
+
+def test_shared_torrent(torr_test_dir):
+    torrent = Torrent.from_file(torr_test_dir)
+
+    with SharedTorrent(torrent) as shared:
+        assert shared.torrent is torrent
+
+        unpickled = pickle.loads(pickle.dumps(shared))
+        assert len(pickle.dumps(shared)) < 200
+        assert unpickled.torrent.info_hash == torrent.info_hash
+
+        with get_context('spawn').Pool(1) as pool:
+            assert pool.map(get_files, [shared]) == [torrent.files]
+
+    unpickled = pickle.loads(pickle.dumps(shared))
+
+    with pytest.raises(TorrentError):
+        unpickled.torrent
+
+    shared.unlink()  # Already freed.
@@ -1,12 +1,28 @@
+import asyncio
 from datetime import datetime
+from hashlib import sha1
+from io import BytesIO
+import tarfile
+import zipfile
+from os import chmod, stat
 from os.path import normpath, join
+import pickle
+from shutil import copytree
+from stat import S_IMODE
 from tempfile import mkdtemp
+from threading import Event
 from uuid import uuid4
 
 import pytest
 
-from torrentool.api import Torrent
-from torrentool.exceptions import TorrentError, BencodeDecodingError
+from torrentool.api import Torrent, IOPolicy, RawBencoded
+from torrentool.filelist import FileList
+from torrentool.hashing import DeviceSlots, Throttle
+from torrentool.reader import PieceReader
+from torrentool.torrent import TorrentFile
+from torrentool.exceptions import TorrentError, BencodeDecodingError, HashingCancelled
+
+pytestmark = pytest.mark.usefixtures('bencode_backend')
 
 
 def test_create(datafix_dir, struct_torr_dir, struct_torr_file):
@@ -29,6 +45,141 @@ def test_create(datafix_dir, struct_torr_dir, struct_torr_file):
     assert get_fpaths(info) == get_fpaths(expected_info)
 
 
+def test_create_from_archive(datafix_dir, tmp_path):
+    src_path = datafix_dir / 'torrtest'
+    expected = Torrent.create_from(src_path)._struct['info']
+
+    tar_path = tmp_path / 'data.tar.gz'
+    with tarfile.open(tar_path, 'w:gz') as archive:
+        archive.add(str(src_path), 'torrtest')
+
+    zip_path = tmp_path / 'data.zip'
+    with zipfile.ZipFile(zip_path, 'w') as archive:
+        for fpath in sorted(src_path.rglob('*')):
+            archive.write(str(fpath), str(fpath.relative_to(datafix_dir)))
+
+    for archive_path in (tar_path, zip_path):
+        t = Torrent.create_from_archive(archive_path)
+        assert t._struct['info'] == expected
+
+    # No single top level directory.
+    with tarfile.open(tar_path, 'w') as archive:
+        archive.add(str(src_path / 'root.txt'), 'root.txt')
+        archive.add(str(src_path / 'sub1'), 'sub1')
+
+    t = Torrent.create_from_archive(tar_path)
+    assert t.name == 'data'
+    assert t.files[0] == (join('data', 'root.txt'), 4)
+
+    # Single file.
+    big = bytes(range(256)) * 1024
+    (tmp_path / 'big.bin').write_bytes(big)
+
+    with zipfile.ZipFile(zip_path, 'w') as archive:
+        archive.write(str(tmp_path / 'big.bin'), 'big.bin')
+
+    t = Torrent.create_from_archive(zip_path)
+    assert t.files == [('big.bin', len(big))]
+    assert t._struct['info'] == Torrent.create_from(tmp_path / 'big.bin')._struct['info']
+
+    with zipfile.ZipFile(zip_path, 'w') as archive:
+        archive.writestr('../evil', b'data')
+
+    with pytest.raises(TorrentError):
+        Torrent.create_from_archive(zip_path)
+
+    with pytest.raises(TorrentError):
+        Torrent.create_from_archive(tmp_path / 'big.bin')
+
+
+def test_create_from_stream(tmp_path):
+    for size in (1000, 32768, 32769, 3000000):
+        data = bytes(range(256)) * (size // 256) + b'x' * (size % 256)
+        (tmp_path / 'data.bin').write_bytes(data)
+
+        tee = BytesIO()
+        t = Torrent.create_from_stream(BytesIO(data), 'data.bin', tee=tee)
+        assert tee.getvalue() == data
+        assert t._struct['info'] == Torrent.create_from(tmp_path / 'data.bin')._struct['info']
+
+    with pytest.raises(TorrentError):
+        Torrent.create_from_stream(BytesIO(), 'empty')
+
+
+def test_padding(datafix_dir, tmp_path):
+    data_path = tmp_path / 'torrtest'
+    copytree(str(datafix_dir / 'torrtest'), str(data_path))
+
+    plain = Torrent.create_from(data_path)
+    t = Torrent.create_from(data_path, padding=True, workers=2)
+
+    piece_length = t.piece_length
+    files = t.files
+    assert [file for file in files if not file.is_padding] == plain.files
+    assert len(files) == 2 * len(plain.files) - 1
+
+    offset = 0
+    data = b''
+
+    for file in files:
+        if file.is_padding:
+            assert file.name.startswith(join('torrtest', '.pad', ''))
+            assert file.attr == 'p'
+            data += bytes(file.length)
+
+        else:
+            assert not offset % piece_length
+            data += (tmp_path / file.name).read_bytes()
+
+        offset += file.length
+
+    assert t.total_size == len(data)
+    assert Torrent.create_from(data_path, padding=True).pieces == t.pieces
+    assert t.pieces == [
+        sha1(data[idx:idx + piece_length]).digest() for idx in range(0, len(data), piece_length)]
+
+    assert t.verify(data_path) == []
+
+    with PieceReader(t, tmp_path) as reader:
+        assert bytes(reader.read(0, len(data))) == data
+
+    t = Torrent.from_string(t.to_string())
+    assert t.files[1].is_padding
+
+
+def test_file_attrs():
+    file = TorrentFile('a', 1)
+    assert file == ('a', 1)
+    assert not file.attr
+    assert not any((file.is_padding, file.is_executable, file.is_hidden, file.is_symlink))
+
+    file = TorrentFile('b', 2, 'xhl')
+    name, length = file
+    assert (name, length) == ('b', 2)
+    assert file.is_executable and file.is_hidden and file.is_symlink
+    assert not file.is_padding
+
+
+def test_verify(datafix_dir, tmp_path, torr_test_file):
+    data_path = tmp_path / 'torrtest'
+    copytree(str(datafix_dir / 'torrtest'), str(data_path))
+
+    t = Torrent.create_from(data_path)
+    assert t.verify(data_path) == []
+    assert t.verify(data_path, io_policy=IOPolicy(block_size=3, drop_cache=True)) == []
+
+    assert Torrent.from_file(torr_test_file).verify(data_path / 'root.txt') == []
+
+    (data_path / 'root.txt').write_bytes(b'spam')
+    assert t.verify(data_path) == [0]
+
+    (data_path / 'root.txt').unlink()
+    assert t.verify(data_path) == [0]
+
+    with pytest.raises(TorrentError):
+        Torrent().verify(data_path)
+
+
 def test_getters_simple(torr_test_file):
     t = Torrent.from_file(torr_test_file)
 
@@ -56,8 +207,9 @@ def test_getters_simple(torr_test_file):
     assert 'magnet:' in magnet
 
 
-def test_getters_dir(torr_test_dir):
-    t = Torrent.from_file(torr_test_dir)
+@pytest.mark.parametrize('lazy_text', [False, True])
+def test_getters_dir(torr_test_dir, lazy_text):
+    t = Torrent.from_file(torr_test_dir, lazy_text=lazy_text)
 
     assert str(t._filepath) == torr_test_dir
 
@@ -88,6 +240,120 @@ def test_getters_dir(torr_test_dir):
     )
 
 
+def test_lazy_text():
+    t = Torrent.from_string(b'd7:comment3:\xffab4:infod4:name1:a6:lengthi1e6:pieces20:' + b'\xff' * 20 + b'ee', lazy_text=True)
+
+    assert t._struct['comment'] == b'\xffab'
+    assert t.comment == '�ab'
+    assert t.pieces == [b'\xff' * 20]
+    assert t.info_hash == '9e7d73358208b73bf469db2345867afde7997672'
+
+    t.comment = 'other'
+    assert t.to_string().startswith(b'd7:comment5:other')
+
+
+def test_compact(torr_test_dir):
+    t = Torrent.from_file(torr_test_dir, compact=True)
+    t_full = Torrent.from_file(torr_test_dir)
+
+    assert isinstance(t._struct['info']['files'], FileList)
+    assert t.files == t_full.files
+    assert t.info_hash == t_full.info_hash
+    assert t.to_string() == t_full.to_string()
+
+    t = Torrent.from_file(torr_test_dir, compact=True, raw_info=True)
+    assert t.files == t_full.files
+    assert isinstance(t._info['files'], FileList)
+
+
+def test_pickle(torr_test_dir):
+    t = Torrent.from_file(torr_test_dir, lazy_text=True, compact=True)
+    t.comment = 'changed'
+
+    unpickled = pickle.loads(pickle.dumps(t))
+
+    assert isinstance(unpickled._struct['info'], RawBencoded)
+    assert unpickled._filepath == t._filepath
+    assert unpickled.comment == 'changed'
+    assert unpickled.info_hash == t.info_hash
+    assert unpickled.files == t.files
+    assert isinstance(unpickled._info['files'], FileList)
+    assert unpickled.to_string() == t.to_string()
+
+
+def test_async(torr_test_dir, datafix_dir):
+    src_path = datafix_dir / 'torrtest'
+
+    async def run():
+        torrent = await Torrent.afrom_file(torr_test_dir, lazy_text=True)
+        assert torrent.info_hash == Torrent.from_file(torr_test_dir).info_hash
+
+        task = Torrent.acreate_from(src_path)
+        progress = [item async for item in task]
+        torrent = await task
+
+        assert torrent.pieces == Torrent.create_from(src_path).pieces
+        assert progress[-1] == (torrent.total_size, torrent.total_size)
+
+    asyncio.run(run())
+
+
+def test_create_from_cancel(datafix_dir):
+    src_path = datafix_dir / 'torrtest'
+    cancel = Event()
+    progress = []
+
+    def track(done, total):
+        progress.append((done, total))
+        cancel.set()
+
+    with pytest.raises(HashingCancelled):
+        Torrent.create_from(src_path, progress=track, cancel=cancel)
+
+    assert len(progress) == 1
+
+
+def test_raw_info(torr_test_dir, tmp_path):
+    # Unsorted info keys.
+    data = b'd7:comment1:x4:infod6:pieces20:' + b'\xff' * 20 + b'4:name1:a6:lengthi1e12:piece lengthi4eee'
+    info = data[data.index(b'd6:pieces'):-1]
+    t = Torrent.from_string(data, raw_info=True)
+
+    assert t._struct['info'] == info
+    assert t.name == 'a'
+    assert t.pieces == [b'\xff' * 20]
+    assert t.files == [('a', 1)]
+    assert t.info_hash == sha1(info).hexdigest()
+
+    t.comment = 'changed'
+    assert t.to_string() == data.replace(b'7:comment1:x', b'7:comment7:changed')
+
+    t.name = 'b'
+    assert t.name == 'b'
+    assert t.to_string() == (
+        b'd7:comment7:changed4:infod6:lengthi1e4:name1:b12:piece lengthi4e6:pieces20:' + b'\xff' * 20 + b'ee')
+
+    fpath = tmp_path / 'raw.torrent'
+    fpath.write_bytes(data)
+
+    t = Torrent.from_file(fpath, raw_info=True, lazy_text=True)
+    t.announce_urls = ['udp://a']
+    t.to_file()
+
+    assert [item.name for item in tmp_path.iterdir()] == ['raw.torrent']
+
+    t = Torrent.from_file(fpath, raw_info=True)
+    assert t.announce_urls == [['udp://a']]
+    assert t.info_hash == sha1(info).hexdigest()
+
+    # Decoded info is sorted.
+    assert Torrent.from_file(fpath).info_hash != t.info_hash
+
+    t = Torrent.from_file(torr_test_dir, raw_info=True)
+    assert t.info_hash == Torrent.from_file(torr_test_dir).info_hash
+    assert t.source == 'GIT'
+
+
 def test_setters():
     t = Torrent()
 
@@ -196,6 +462,17 @@ def test_bogus():
     with pytest.raises(BencodeDecodingError) as e:
         Torrent.from_string('4:spamebogus: ending')
     assert 'the rest of the data: "ebogus: ending"' in f'{e.value}'
+    assert e.value.offset == 6
+
+
+def test_strict(torr_test_dir):
+    t = Torrent.from_file(torr_test_dir, strict=True)
+    assert t.info_hash == '669e5c550e4681d00239c5bdc4344e038f1f5c0e'
+
+    # Unsorted keys within `info`.
+    with pytest.raises(BencodeDecodingError) as e:
+        Torrent.from_string('d4:infod4:name1:a6:lengthi1eee', strict=True)
+    assert e.value.offset == 17
 
 
 def test_to_file(torr_test_file):
@@ -211,6 +488,30 @@ def test_to_file(torr_test_file):
     t2 = Torrent.from_file(fpath)
     assert t1._struct == t2._struct
 
+    # Permissions are kept on replace.
+    chmod(fpath, 0o640)
+    t2.comment = 'changed'
+    t2.to_file()
+    assert S_IMODE(stat(fpath).st_mode) == 0o640
+
+
+def test_clear_fields():
+    t = Torrent({'info': {'name': 'a', 'length': 1}})
+    t.comment = 'some'
+    t.announce_urls = ['udp://one', 'udp://two']
+
+    t.comment = ''
+    t.announce_urls = []
+    assert 'comment' not in t._struct
+    assert 'announce' not in t._struct
+    assert 'announce-list' not in t._struct
+    assert t.comment is None
+    assert t.announce_urls == []
+
+    t.announce_urls = None
+    t.comment = None
+    assert set(t._struct) == {'info'}
+
 
 def test_str(torr_test_file):
     """ Tests Torrent.__str__ method """
@@ -219,3 +520,69 @@ def test_str(torr_test_file):
 
     t.name = 'Мой торрент'
     assert str(t) == 'Torrent: Мой торрент'
+
+
+def test_create_sharded(datafix_dir, tmp_path, monkeypatch):
+    src_path = datafix_dir / 'torrtest'
+    whole = Torrent.create_from(src_path)
+
+    progress = []
+    shards = Torrent.create_sharded(src_path, max_size=10, workers=2, progress=lambda *args: progress.append(args))
+    assert len(shards) == 3
+
+    assert [shard.name for shard in shards] == ['torrtest'] * 3
+    assert [[file.name for file in shard.files] for shard in shards] == [
+        [join('torrtest', 'root.txt'), join('torrtest', 'sub1', 'sub11.txt')],
+        [join('torrtest', 'sub1', 'sub2', 'sub22.txt')],
+        [join('torrtest', 'sub1', 'sub2', 'кириллица.txt')],
+    ]
+    assert sorted(progress)[-1] == (whole.total_size, whole.total_size)
+
+    for shard in shards:
+        assert shard.verify(src_path) == []
+
+    assert len({shard.info_hash for shard in shards}) == 3
+
+    # Rate limit is shared by all the shards.
+    throttles = set()
+    monkeypatch.setattr(Throttle, 'consume', lambda self, size: throttles.add(self))
+
+    shards_limited = Torrent.create_sharded(
+        src_path, max_size=10, workers=2, io_policy=IOPolicy(rate_limit=1024), device_slots=DeviceSlots())
+    assert [shard.info_hash for shard in shards_limited] == [shard.info_hash for shard in shards]
+    assert len(throttles) == 1
+
+    shards = Torrent.create_sharded(str(src_path), max_files=10)
+    assert len(shards) == 1
+    assert shards[0].files == whole.files
+    assert shards[0].pieces == whole.pieces
+
+    with pytest.raises(TorrentError):
+        Torrent.create_sharded(src_path / 'root.txt', max_size=10)
+
+    with pytest.raises(TorrentError):
+        Torrent.create_sharded(tmp_path, max_size=10)
+
+
+def test_create_from_checkpoint(tmp_path):
+    data_path = tmp_path / 'data.bin'
+    data_path.write_bytes(bytes(range(256)) * 12288)  # 3 MiB
+    checkpoint_path = tmp_path / 'data.checkpoint'
+    expected = Torrent.create_from(data_path)._struct['info']
+
+    cancel = Event()
+
+    with pytest.raises(HashingCancelled):
+        Torrent.create_from(data_path, checkpoint=checkpoint_path, cancel=cancel, progress=lambda *args: cancel.set())
+
+    # Progress is kept on interruption.
+    assert checkpoint_path.exists()
+
+    progress = []
+    t = Torrent.create_from(data_path, checkpoint=checkpoint_path, progress=lambda *args: progress.append(args))
+    assert t._struct['info'] == expected
+    assert not checkpoint_path.exists()
+
+    # Resumed: data hashed before is not read again.
+    assert len(progress) < 3
+    assert progress[0][0] > 1048576
@@ -0,0 +1,330 @@
+import os
+from concurrent.futures import wait
+from threading import Event, Thread
+from time import monotonic, sleep
+
+import pytest
+
+from torrentool.api import Torrent
+from torrentool.exceptions import HashingCancelled
+from torrentool.watch import FolderWatcher, InotifyWatcher, WatchState, get_fingerprint
+
+
+def wait_for(func, timeout=5.0):
+    for _ in range(int(timeout / 0.05)):
+        result = func()
+        if result:
+            return result
+        sleep(0.05)
+    return func()
+
+
+def make_item(path, contents=b'data'):
+    path.mkdir()
+    (path / 'a.bin').write_bytes(contents)
+    (path / 'sub').mkdir()
+    (path / 'sub' / 'b.bin').write_bytes(contents * 3)
+
+
+def test_fingerprint(tmp_path):
+    make_item(tmp_path / 'one')
+
+    fingerprint = get_fingerprint(tmp_path / 'one')
+    assert get_fingerprint(tmp_path / 'one') == fingerprint
+
+    (tmp_path / 'one' / 'sub' / 'c.bin').write_bytes(b'')
+    assert get_fingerprint(tmp_path / 'one') != fingerprint
+
+    (tmp_path / 'single.bin').write_bytes(b'x')
+    assert get_fingerprint(tmp_path / 'single.bin')
+
+
+def test_state(tmp_path):
+    state = WatchState(tmp_path / 'state.sqlite')
+    assert state.get_fingerprint('one') is None
+
+    state.set_done('one', fingerprint='abc', info_hash='00', torrent_path='one.torrent')
+    state.close()
+
+    state = WatchState(tmp_path / 'state.sqlite')
+    assert state.get_fingerprint('one') == 'abc'
+    state.close()
+
+
+def test_folder_watcher(tmp_path):
+    src = tmp_path / 'incoming'
+    dest = tmp_path / 'torrents'
+    src.mkdir()
+    dest.mkdir()
+
+    make_item(src / 'one')
+    (src / 'two.bin').write_bytes(b'single')
+    (src / '.hidden').mkdir()
+
+    created = []
+
+    def get_watcher():
+        return FolderWatcher(
+            src, dest, trackers=['udp://tracker.example.com'], settle=0, inotify=False,
+            on_created=lambda name, torrent: created.append(name))
+
+    with get_watcher() as watcher:
+        assert watcher.is_polling
+        futures = watcher.check()
+        assert len(futures) == 2
+        wait(futures)
+
+    assert sorted(created) == ['one', 'two.bin']
+
+    torrent = Torrent.from_file(str(dest / 'one.torrent'))
+    assert torrent.announce_urls == [['udp://tracker.example.com']]
+    assert torrent.total_size == 16
+    assert (dest / 'two.bin.torrent').exists()
+
+    # Restart: nothing is rehashed.
+    created.clear()
+
+    with get_watcher() as watcher:
+        assert watcher.check() == []
+
+        # Changed item is handled again.
+        (src / 'one' / 'c.bin').write_bytes(b'more')
+        futures = watcher.check()
+        assert len(futures) == 1
+        wait(futures)
+
+    assert created == ['one']
+    assert Torrent.from_file(str(dest / 'one.torrent')).total_size == 20
+
+
+def test_folder_watcher_settle(tmp_path):
+    src = tmp_path / 'incoming'
+    src.mkdir()
+    make_item(src / 'one')
+
+    with FolderWatcher(src, tmp_path, settle=60, inotify=False) as watcher:
+        # Not settled yet.
+        assert watcher.check() == []
+        assert watcher.check() == []
+
+        watcher.settle = 0
+        futures = watcher.check()
+        assert len(futures) == 1
+        wait(futures)
+
+
+def test_folder_watcher_failed(tmp_path, monkeypatch):
+    src = tmp_path / 'incoming'
+    src.mkdir()
+    make_item(src / 'broken')
+
+    def create_from(*args, **kwargs):
+        raise OSError('unreadable')
+
+    monkeypatch.setattr(Torrent, 'create_from', create_from)
+
+    failed = []
+
+    with FolderWatcher(
+        src, tmp_path, settle=0, inotify=False, on_failed=lambda name, exc: failed.append(name)
+    ) as watcher:
+        wait(watcher.check())
+
+    assert failed == ['broken']
+
+
+def test_inotify(tmp_path):
+    try:
+        watcher = InotifyWatcher(tmp_path)
+
+    except OSError:
+        pytest.skip('inotify is not available')
+
+    try:
+        assert watcher.wait(0) == set()
+
+        (tmp_path / 'one').mkdir()
+        assert wait_for(lambda: watcher.wait(0.1)) == {'one'}
+
+        # New subdirectories are watched.
+        os.makedirs(str(tmp_path / 'one' / 'sub'))
+        assert wait_for(lambda: watcher.wait(0.1)) == {'one'}
+
+        (tmp_path / 'one' / 'sub' / 'f.bin').write_bytes(b'x')
+        assert wait_for(lambda: watcher.wait(0.1)) == {'one'}
+
+        (tmp_path / 'two.bin').write_bytes(b'x')
+        assert wait_for(lambda: watcher.wait(0.1)) == {'two.bin'}
+
+    finally:
+        watcher.close()
+
+
+def test_folder_watcher_run(tmp_path):
+    src = tmp_path / 'incoming'
+    src.mkdir()
+
+    created = Event()
+    stop = Event()
+
+    with FolderWatcher(
+        src, tmp_path, settle=0.1, interval=0.1, on_created=lambda name, torrent: created.set()
+    ) as watcher:
+        thread = Thread(target=watcher.run, kwargs={'stop': stop})
+        thread.start()
+
+        try:
+            make_item(src / 'one')
+            assert created.wait(5)
+
+        finally:
+            stop.set()
+            thread.join()
+
+    assert (tmp_path / 'one.torrent').exists()
+
+
+def test_folder_watcher_dest(tmp_path):
+    for dest in (tmp_path, tmp_path / 'torrents'):
+        with pytest.raises(ValueError):
+            FolderWatcher(tmp_path, dest, inotify=False)
+
+
+def test_folder_watcher_close_cancels(tmp_path, monkeypatch):
+    src = tmp_path / 'incoming'
+    src.mkdir()
+    make_item(src / 'one')
+
+    started = Event()
+
+    def create_from(src_path, *, cancel):
+        started.set()
+        cancel.wait()
+        raise HashingCancelled('Hashing is cancelled.')
+
+    monkeypatch.setattr(Torrent, 'create_from', create_from)
+
+    failed = []
+    watcher = FolderWatcher(
+        src, tmp_path, settle=0, inotify=False, on_failed=lambda name, exc: failed.append(name))
+    watcher.check()
+    assert started.wait(5)
+    watcher.close()
+
+    assert failed == []
+    assert not (tmp_path / 'one.torrent').exists()
+
+
+def test_folder_watcher_retry(tmp_path, monkeypatch):
+    src = tmp_path / 'incoming'
+    src.mkdir()
+    make_item(src / 'one')
+
+    create_from = Torrent.create_from
+    calls = []
+
+    def create_from_failing(*args, **kwargs):
+        calls.append(args)
+
+        if len(calls) < 3:
+            raise OSError('No space left on device')
+
+        return create_from(*args, **kwargs)
+
+    monkeypatch.setattr(Torrent, 'create_from', create_from_failing)
+
+    failed = []
+    created = []
+
+    with FolderWatcher(
+        src, tmp_path, settle=0, inotify=False, retry_delay=60,
+        on_failed=lambda name, exc: failed.append(name), on_created=lambda name, torrent: created.append(name)
+    ) as watcher:
+        wait(watcher.check())
+        # Failure is collected, but not retried until the delay passes.
+        assert watcher.check() == []
+        assert failed == ['one']
+
+        watcher._failed['one'] = (1, 0)
+        wait(watcher.check())
+        assert watcher.check() == []
+        assert failed == ['one', 'one']
+
+        # The delay is doubled on consecutive failures.
+        failures, retry_at = watcher._failed['one']
+        assert failures == 2
+        assert retry_at - monotonic() > 100
+
+        # Changed items are retried once settled.
+        (src / 'one' / 'c.bin').write_bytes(b'more')
+        wait(watcher.check())
+        watcher.check()
+
+    assert created == ['one']
+    assert len(calls) == 3
+
+
+def test_folder_watcher_changed_while_hashing(tmp_path, monkeypatch):
+    src = tmp_path / 'incoming'
+    src.mkdir()
+    make_item(src / 'one')
+
+    started = Event()
+    proceed = Event()
+    create_from = Torrent.create_from
+
+    def create_from_blocking(*args, **kwargs):
+        started.set()
+        proceed.wait(5)
+        return create_from(*args, **kwargs)
+
+    monkeypatch.setattr(Torrent, 'create_from', create_from_blocking)
+
+    with FolderWatcher(src, tmp_path, settle=60, inotify=False) as watcher:
+        watcher.settle = 0
+        futures = watcher.check()
+        assert started.wait(5)
+        watcher.settle = 60
+
+        # A newer change is registered while hashing.
+        (src / 'one' / 'c.bin').write_bytes(b'more')
+        watcher.check()
+        pending = watcher._pending['one']
+        assert pending[0] == get_fingerprint(src / 'one')
+
+        proceed.set()
+        wait(futures)
+        watcher.check()
+
+        # Settle timer is not restarted.
+        assert watcher._pending['one'] == pending
+
+
+def test_folder_watcher_check_while_hashing(tmp_path, monkeypatch):
+    src = tmp_path / 'incoming'
+    src.mkdir()
+    make_item(src / 'one')
+
+    proceed = Event()
+    create_from = Torrent.create_from
+    calls = []
+
+    def create_from_blocking(*args, **kwargs):
+        calls.append(args)
+        proceed.wait(5)
+        return create_from(*args, **kwargs)
+
+    monkeypatch.setattr(Torrent, 'create_from', create_from_blocking)
+
+    with FolderWatcher(src, tmp_path, settle=0, inotify=False) as watcher:
+        futures = watcher.check()
+
+        # Unchanged item being hashed is not queued again.
+        assert watcher.check() == []
+        assert watcher._pending == {}
+
+        proceed.set()
+        wait(futures)
+        assert watcher.check() == []
+
+    assert len(calls) == 1
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from torrentool.api import Torrent
+from torrentool.exceptions import TorrentError
+from torrentool.webseed import WebseedServer, parse_range
+
+
+def test_parse_range():
+    assert parse_range('', 10) is None
+    assert parse_range('bytes=0-4', 10) == (0, 5)
+    assert parse_range('bytes=3-', 10) == (3, 10)
+    assert parse_range('bytes=-4', 10) == (6, 10)
+    assert parse_range('bytes=-40', 10) == (0, 10)
+    assert parse_range('bytes=5-100', 10) == (5, 10)
+    assert parse_range('bytes=0-1,3-4', 10) is None
+    assert parse_range('bytes=5-2', 10) is None
+    assert parse_range('items=0-1', 10) is None
+
+    with pytest.raises(ValueError):
+        parse_range('bytes=10-', 10)
+
+
+def test_server(datafix_dir, torr_test_dir):
+
+    async def request(reader, writer, head):
+        writer.write(head.encode())
+        response = await reader.readuntil(b'\r\n\r\n')
+        status_line, *header_lines = response.decode().split('\r\n')
+        headers = dict(line.split(': ', 1) for line in header_lines if line)
+        body = await reader.readexactly(int(headers['Content-Length'])) if not head.startswith('HEAD') else b''
+        return int(status_line.split(' ')[1]), headers, body
+
+    async def run():
+        server = WebseedServer(max_requests=6)
+        server.add(Torrent.from_file(torr_test_dir), datafix_dir)
+
+        async with await server.start(port=0) as srv:
+            port = srv.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+
+            status, headers, body = await request(reader, writer, 'GET /torrtest/root.txt HTTP/1.1\r\n\r\n')
+            assert status == 200
+            assert body == (datafix_dir / 'torrtest' / 'root.txt').read_bytes()
+            assert headers['Connection'] == 'keep-alive'
+
+            expected = (datafix_dir / 'torrtest' / 'sub1' / 'sub2' / 'кириллица.txt').read_bytes()
+            status, headers, body = await request(
+                reader, writer,
+                'GET /torrtest/sub1/sub2/%D0%BA%D0%B8%D1%80%D0%B8%D0%BB%D0%BB%D0%B8%D1%86%D0%B0.txt HTTP/1.1\r\n'
+                'Range: bytes=1-2\r\n\r\n')
+            assert status == 206
+            assert body == expected[1:3]
+            assert headers['Content-Range'] == f'bytes 1-2/{len(expected)}'
+
+            status, headers, body = await request(
+                reader, writer, 'GET /torrtest/root.txt HTTP/1.1\r\nRange: bytes=100-\r\n\r\n')
+            assert status == 416
+
+            status, headers, _ = await request(reader, writer, 'HEAD /torrtest/root.txt HTTP/1.1\r\n\r\n')
+            assert status == 200
+            assert int(headers['Content-Length']) > 0
+
+            assert (await request(reader, writer, 'GET /unknown HTTP/1.1\r\n\r\n'))[0] == 404
+            assert (await request(reader, writer, 'POST /torrtest/root.txt HTTP/1.1\r\n\r\n'))[0] == 405
+
+            # Requests limit per connection is reached.
+            assert await reader.read() == b''
+            writer.close()
+
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            status, headers, _ = await request(reader, writer, 'GET /torrtest/root.txt HTTP/1.0\r\n\r\n')
+            assert headers['Connection'] == 'close'
+            assert await reader.read() == b''
+            writer.close()
+
+    asyncio.run(run())
+
+
+def test_server_unsafe(tmp_path):
+    server = WebseedServer()
+
+    for parts in (['..', 'secret'], ['a', '/etc/passwd'], ['.', 'a']):
+        torrent = Torrent({'info': {
+            'name': 'unsafe', 'piece length': 4, 'pieces': b'x' * 20,
+            'files': [{'length': 1, 'path': ['ok']}, {'length': 3, 'path': parts}],
+        }})
+
+        with pytest.raises(TorrentError):
+            server.add(torrent, tmp_path)
+
+    assert server._files == {}
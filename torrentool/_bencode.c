@@ -0,0 +1,1024 @@
+/*
+ * Compiled backend for torrentool.bencode.
+ *
+ * Mirrors pure-Python Bencode.encode() and Bencode.decode() (default mode).
+ * Bencode class decides when to use it, see Bencode.set_backend().
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <string.h>
+
+static PyObject *DecodingError = NULL;
+static PyObject *EncodingError = NULL;
+
+
+/* Encoding. */
+
+typedef struct {
+    char *data;
+    Py_ssize_t len;
+    Py_ssize_t cap;
+} Buffer;
+
+
+static int
+buffer_reserve(Buffer *buf, Py_ssize_t extra)
+{
+    Py_ssize_t cap;
+    char *data;
+
+    if (buf->len + extra <= buf->cap) {
+        return 0;
+    }
+
+    cap = buf->cap ? buf->cap : 1024;
+
+    while (cap < buf->len + extra) {
+        if (cap > PY_SSIZE_T_MAX / 2) {
+            PyErr_NoMemory();
+            return -1;
+        }
+        cap *= 2;
+    }
+
+    data = PyMem_Realloc(buf->data, cap);
+
+    if (data == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+
+    buf->data = data;
+    buf->cap = cap;
+    return 0;
+}
+
+
+static int
+buffer_write(Buffer *buf, const char *data, Py_ssize_t len)
+{
+    if (buffer_reserve(buf, len) < 0) {
+        return -1;
+    }
+    memcpy(buf->data + buf->len, data, len);
+    buf->len += len;
+    return 0;
+}
+
+
+static int
+buffer_write_number(Buffer *buf, const char *prefix, long long number, char terminator)
+{
+    char tmp[32];
+    int len = snprintf(tmp, sizeof(tmp), "%s%lld%c", prefix, number, terminator);
+    return buffer_write(buf, tmp, len);
+}
+
+
+static int
+encode_string(Buffer *buf, const char *data, Py_ssize_t len)
+{
+    if (buffer_write_number(buf, "", (long long)len, ':') < 0) {
+        return -1;
+    }
+    return buffer_write(buf, data, len);
+}
+
+
+static int
+encode_str(Buffer *buf, PyObject *value)
+{
+    Py_ssize_t len;
+    const char *data = PyUnicode_AsUTF8AndSize(value, &len);
+
+    if (data == NULL) {
+        return -1;
+    }
+    return encode_string(buf, data, len);
+}
+
+
+static int
+raise_encoding_error(PyObject *value)
+{
+    PyObject *msg = PyUnicode_FromFormat("Unable to encode `%S` %S", (PyObject *)Py_TYPE(value), value);
+
+    if (msg != NULL) {
+        PyErr_SetObject(EncodingError, msg);
+        Py_DECREF(msg);
+    }
+    return -1;
+}
+
+
+static int encode_value(Buffer *buf, PyObject *value, PyObject *fallback);
+
+
+static int
+encode_int(Buffer *buf, PyObject *value)
+{
+    int overflow;
+    long long number = PyLong_AsLongLongAndOverflow(value, &overflow);
+    PyObject *str, *as_int;
+    Py_ssize_t len;
+    const char *data;
+    int result;
+
+    if (number == -1 && PyErr_Occurred()) {
+        return -1;
+    }
+
+    if (!overflow) {
+        return buffer_write_number(buf, "i", number, 'e');
+    }
+
+    as_int = PyNumber_Long(value);  /* Strip int subclasses representations. */
+    if (as_int == NULL) {
+        return -1;
+    }
+    str = PyObject_Str(as_int);
+    Py_DECREF(as_int);
+    if (str == NULL) {
+        return -1;
+    }
+
+    data = PyUnicode_AsUTF8AndSize(str, &len);
+    result = (
+        data == NULL ||
+        buffer_write(buf, "i", 1) < 0 ||
+        buffer_write(buf, data, len) < 0 ||
+        buffer_write(buf, "e", 1) < 0
+    ) ? -1 : 0;
+
+    Py_DECREF(str);
+    return result;
+}
+
+
+static int
+encode_sequence(Buffer *buf, PyObject *value, PyObject *fallback)
+{
+    PyObject *seq = PySequence_Fast(value, "expected a sequence");
+    Py_ssize_t idx, len;
+    PyObject **items;
+
+    if (seq == NULL) {
+        return -1;
+    }
+
+    len = PySequence_Fast_GET_SIZE(seq);
+    items = PySequence_Fast_ITEMS(seq);
+
+    if (buffer_write(buf, "l", 1) < 0) {
+        goto error;
+    }
+
+    for (idx = 0; idx < len; idx++) {
+        if (encode_value(buf, items[idx], fallback) < 0) {
+            goto error;
+        }
+    }
+
+    Py_DECREF(seq);
+    return buffer_write(buf, "e", 1);
+
+error:
+    Py_DECREF(seq);
+    return -1;
+}
+
+
+static int
+encode_dict(Buffer *buf, PyObject *value, PyObject *fallback)
+{
+    /* Dictionaries are expected to be sorted by key. */
+    PyObject *keys = PyDict_Keys(value);
+    Py_ssize_t idx, len;
+    PyObject *key, *item;
+
+    if (keys == NULL) {
+        return -1;
+    }
+
+    if (PyList_Sort(keys) < 0 || buffer_write(buf, "d", 1) < 0) {
+        goto error;
+    }
+
+    len = PyList_GET_SIZE(keys);
+
+    for (idx = 0; idx < len; idx++) {
+        key = PyList_GET_ITEM(keys, idx);
+
+        if (!PyUnicode_Check(key)) {
+            raise_encoding_error(key);
+            goto error;
+        }
+
+        item = PyDict_GetItemWithError(value, key);  /* Borrowed. */
+
+        if (item == NULL) {
+            if (!PyErr_Occurred()) {
+                PyErr_SetString(PyExc_RuntimeError, "dictionary changed during encoding");
+            }
+            goto error;
+        }
+
+        if (encode_str(buf, key) < 0 || encode_value(buf, item, fallback) < 0) {
+            goto error;
+        }
+    }
+
+    Py_DECREF(keys);
+    return buffer_write(buf, "e", 1);
+
+error:
+    Py_DECREF(keys);
+    return -1;
+}
+
+
+static int
+encode_value(Buffer *buf, PyObject *value, PyObject *fallback)
+{
+    int result;
+    PyObject *encoded;
+
+    if (PyUnicode_Check(value)) {
+        return encode_str(buf, value);
+    }
+
+    if (PyLong_Check(value)) {
+        return encode_int(buf, value);
+    }
+
+    if (PyBytes_CheckExact(value)) {
+        return encode_string(buf, PyBytes_AS_STRING(value), PyBytes_GET_SIZE(value));
+    }
+
+    if (PyByteArray_CheckExact(value)) {
+        return encode_string(buf, PyByteArray_AS_STRING(value), PyByteArray_GET_SIZE(value));
+    }
+
+    if (Py_EnterRecursiveCall(" while encoding")) {
+        return -1;
+    }
+
+    if (PyList_Check(value) || PyTuple_Check(value)) {
+        result = encode_sequence(buf, value, fallback);
+    }
+    else if (PyDict_Check(value)) {
+        result = encode_dict(buf, value, fallback);
+    }
+    else if (fallback != Py_None) {
+        /* Other types are handled by pure-Python encoder. */
+        encoded = PyObject_CallFunctionObjArgs(fallback, value, NULL);
+
+        if (encoded == NULL) {
+            result = -1;
+        }
+        else if (!PyBytes_Check(encoded)) {
+            PyErr_SetString(PyExc_TypeError, "encoding fallback must return bytes");
+            Py_DECREF(encoded);
+            result = -1;
+        }
+        else {
+            result = buffer_write(buf, PyBytes_AS_STRING(encoded), PyBytes_GET_SIZE(encoded));
+            Py_DECREF(encoded);
+        }
+    }
+    else {
+        result = raise_encoding_error(value);
+    }
+
+    Py_LeaveRecursiveCall();
+    return result;
+}
+
+
+static PyObject *
+bencode_encode(PyObject *module, PyObject *args)
+{
+    PyObject *value, *fallback = Py_None, *result = NULL;
+    Buffer buf = {NULL, 0, 0};
+
+    if (!PyArg_ParseTuple(args, "O|O:encode", &value, &fallback)) {
+        return NULL;
+    }
+
+    if (encode_value(&buf, value, fallback) == 0) {
+        result = PyBytes_FromStringAndSize(buf.data, buf.len);
+    }
+
+    PyMem_Free(buf.data);
+    return result;
+}
+
+
+/* Decoding. */
+
+static void
+raise_decoding_error(PyObject *msg, Py_ssize_t offset)
+{
+    PyObject *args = NULL, *kwargs = NULL, *exc = NULL;
+
+    if (msg == NULL) {
+        return;
+    }
+
+    args = PyTuple_Pack(1, msg);
+    kwargs = Py_BuildValue("{s:n}", "offset", offset);
+
+    if (args != NULL && kwargs != NULL) {
+        exc = PyObject_Call(DecodingError, args, kwargs);
+    }
+
+    if (exc != NULL) {
+        PyErr_SetObject(DecodingError, exc);
+    }
+
+    Py_XDECREF(exc);
+    Py_XDECREF(kwargs);
+    Py_XDECREF(args);
+    Py_DECREF(msg);
+}
+
+
+/* Parses a number in [start, end) just as `int(bytes or 0)` would. */
+static PyObject *
+parse_int(const char *data, Py_ssize_t start, Py_ssize_t end)
+{
+    const char *chars = data + start;
+    Py_ssize_t len = end - start, idx = 0;
+    long long number = 0;
+    int negative = 0;
+    PyObject *raw, *result;
+
+    if (len == 0) {
+        return PyLong_FromLong(0);
+    }
+
+    if (chars[0] == '-') {
+        negative = 1;
+        idx = 1;
+    }
+
+    if (len - idx > 0 && len - idx <= 18) {
+        for (; idx < len; idx++) {
+            if (chars[idx] < '0' || chars[idx] > '9') {
+                break;
+            }
+            number = number * 10 + (chars[idx] - '0');
+        }
+
+        if (idx == len) {
+            return PyLong_FromLongLong(negative ? -number : number);
+        }
+    }
+
+    /* Big or unusual numbers. */
+    raw = PyBytes_FromStringAndSize(chars, len);
+    if (raw == NULL) {
+        return NULL;
+    }
+
+    result = PyObject_CallFunctionObjArgs((PyObject *)&PyLong_Type, raw, NULL);
+
+    if (result == NULL && PyErr_ExceptionMatches(PyExc_ValueError)) {
+        PyObject *raw_str;
+
+        /* No C-API calls are allowed while an exception is set. */
+        PyErr_Clear();
+        raw_str = PyUnicode_DecodeUTF8(chars, len, "replace");
+
+        if (raw_str != NULL) {
+            raise_decoding_error(
+                PyUnicode_FromFormat("Unable to interpret `%U` as a number.", raw_str), start);
+            Py_DECREF(raw_str);
+        }
+    }
+
+    Py_DECREF(raw);
+    return result;
+}
+
+
+static PyObject *
+create_dict(PyObject *items)
+{
+    /* Let's guarantee that dictionaries are sorted. */
+    Py_ssize_t idx, len = PyList_GET_SIZE(items) / 2 * 2;
+    PyObject *unsorted = PyDict_New(), *keys = NULL, *result = NULL, *key;
+
+    if (unsorted == NULL) {
+        return NULL;
+    }
+
+    /* Fast path: keys are already sorted (as they should be). */
+    for (idx = 2; idx < len; idx += 2) {
+        int ordered = PyObject_RichCompareBool(PyList_GET_ITEM(items, idx - 2), PyList_GET_ITEM(items, idx), Py_LT);
+
+        if (ordered < 0) {
+            PyErr_Clear();  /* Let sorting below report that. */
+        }
+        if (ordered <= 0) {
+            break;
+        }
+    }
+
+    if (idx >= len) {
+        for (idx = 0; idx < len; idx += 2) {
+            if (PyDict_SetItem(unsorted, PyList_GET_ITEM(items, idx), PyList_GET_ITEM(items, idx + 1)) < 0) {
+                Py_CLEAR(unsorted);
+                break;
+            }
+        }
+        return unsorted;
+    }
+
+    for (idx = 0; idx < len; idx += 2) {
+        if (PyDict_SetItem(unsorted, PyList_GET_ITEM(items, idx), PyList_GET_ITEM(items, idx + 1)) < 0) {
+            goto done;
+        }
+    }
+
+    keys = PyDict_Keys(unsorted);
+
+    if (keys == NULL || PyList_Sort(keys) < 0) {
+        goto done;
+    }
+
+    result = PyDict_New();
+
+    if (result == NULL) {
+        goto done;
+    }
+
+    len = PyList_GET_SIZE(keys);
+
+    for (idx = 0; idx < len; idx++) {
+        key = PyList_GET_ITEM(keys, idx);
+
+        if (PyDict_SetItem(result, key, PyDict_GetItem(unsorted, key)) < 0) {
+            Py_CLEAR(result);
+            goto done;
+        }
+    }
+
+done:
+    Py_XDECREF(keys);
+    Py_DECREF(unsorted);
+    return result;
+}
+
+
+typedef struct {
+    int is_dict;
+    PyObject *parent_items;
+    PyObject *key;  /* Borrowed. Key of the closest dictionary the container is in. */
+    PyObject *sink;  /* List items are collected into instead of `items` (see `list_factories`). NULL if none. */
+} Container;
+
+
+static PyObject *
+decode_text(const char *data, Py_ssize_t start, Py_ssize_t len)
+{
+    PyObject *string = PyUnicode_DecodeUTF8(data + start, len, NULL);
+
+    if (string != NULL || !PyErr_ExceptionMatches(PyExc_UnicodeDecodeError)) {
+        return string;
+    }
+
+    PyErr_Clear();
+    return PyUnicode_DecodeUTF8(data + start, len, "replace");
+}
+
+
+static PyObject *
+decode_string_text_keys(
+        const char *data, Py_ssize_t start, Py_ssize_t len,
+        PyObject *items, Container *container, PyObject *text_keys)
+{
+    Py_ssize_t items_len = PyList_GET_SIZE(items);
+    PyObject *key;
+    int contains;
+
+    if (container != NULL && container->is_dict) {
+
+        if (!(items_len % 2)) {
+            /* Dictionary keys are always decoded. */
+            return decode_text(data, start, len);
+        }
+
+        key = PyList_GET_ITEM(items, items_len - 1);
+    }
+    else {
+        key = container != NULL ? container->key : NULL;
+    }
+
+    if (key != NULL) {
+        contains = PySequence_Contains(text_keys, key);
+
+        if (contains < 0) {
+            return NULL;
+        }
+
+        if (contains) {
+            return decode_text(data, start, len);
+        }
+    }
+
+    return PyBytes_FromStringAndSize(data + start, len);
+}
+
+
+static PyObject *
+decode_string(
+        const char *data, Py_ssize_t start, Py_ssize_t len, PyObject *items, PyObject *byte_keys)
+{
+    PyObject *string = PyUnicode_DecodeUTF8(data + start, len, NULL), *latest, *latest_str;
+    Py_ssize_t items_len;
+    int contains;
+
+    if (string != NULL || !PyErr_ExceptionMatches(PyExc_UnicodeDecodeError)) {
+        return string;
+    }
+
+    PyErr_Clear();
+
+    if (byte_keys == Py_None) {
+        /* Considered to be a bytestring (e.g. `pieces` hashes concatenation). */
+        return PyBytes_FromStringAndSize(data + start, len);
+    }
+
+    /* Preceding item in a dictionary is a key. */
+    items_len = PyList_GET_SIZE(items);
+    latest = items_len ? PyList_GET_ITEM(items, items_len - 1) : Py_None;
+
+    latest_str = PyObject_Str(latest);
+    if (latest_str == NULL) {
+        return NULL;
+    }
+
+    contains = PySequence_Contains(byte_keys, latest_str);
+    Py_DECREF(latest_str);
+
+    if (contains < 0) {
+        return NULL;
+    }
+
+    if (contains) {
+        return PyBytes_FromStringAndSize(data + start, len);
+    }
+
+    /* Try to decode from UTF-8 with fallback to replace for non-standard .torrent files. */
+    return PyUnicode_DecodeUTF8(data + start, len, "replace");
+}
+
+
+static PyObject *
+decode(
+        const char *data, Py_ssize_t size,
+        PyObject *byte_keys, PyObject *text_keys, PyObject *interned, PyObject *list_factories)
+{
+    Container *containers = NULL, *container;
+    Py_ssize_t containers_len = 0, containers_cap = 0;
+    Py_ssize_t idx = 0, end, str_len;
+    PyObject *items = PyList_New(0), *item = NULL, *str_len_obj, *rest, *rest_cut, *seen, *factory, *result;
+    const char *found;
+    char chr;
+
+    if (items == NULL) {
+        return NULL;
+    }
+
+    while (idx < size) {
+        chr = data[idx];
+
+        if (
+            (chr == 'd' || chr == 'l' || chr == 'i') &&
+            containers_len && containers[containers_len - 1].is_dict && PyList_GET_SIZE(items) % 2 == 0
+        ) {
+            raise_decoding_error(
+                PyUnicode_FromFormat("Dictionary key at offset %zd is not a string.", idx), idx);
+            goto error;
+        }
+
+        if (chr == 'd' || chr == 'l') {
+
+            if (containers_len == containers_cap) {
+                containers_cap = containers_cap ? containers_cap * 2 : 32;
+                container = PyMem_Realloc(containers, containers_cap * sizeof(Container));
+
+                if (container == NULL) {
+                    PyErr_NoMemory();
+                    goto error;
+                }
+                containers = container;
+            }
+
+            container = containers_len ? &containers[containers_len - 1] : NULL;
+            containers[containers_len].sink = NULL;
+
+            if (container != NULL && container->is_dict && PyList_GET_SIZE(items) % 2) {
+                containers[containers_len].key = PyList_GET_ITEM(items, PyList_GET_SIZE(items) - 1);
+
+                if (list_factories != Py_None && chr == 'l') {
+                    factory = PyDict_GetItemWithError(list_factories, containers[containers_len].key);  /* Borrowed. */
+
+                    if (factory != NULL) {
+                        containers[containers_len].sink = PyObject_CallObject(factory, NULL);
+                    }
+
+                    if (containers[containers_len].sink == NULL && PyErr_Occurred()) {
+                        goto error;
+                    }
+                }
+            }
+            else {
+                containers[containers_len].key = container != NULL ? container->key : NULL;
+            }
+
+            containers[containers_len].is_dict = chr == 'd';
+            containers[containers_len].parent_items = items;
+            containers_len++;
+
+            items = PyList_New(0);
+            if (items == NULL) {
+                goto error;
+            }
+            idx++;
+            continue;
+        }
+
+        if (chr == 'i') {
+            found = memchr(data + idx, 'e', size - idx);
+
+            if (found == NULL) {
+                raise_decoding_error(
+                    PyUnicode_FromString("Unexpected end of data: unterminated integer."), idx);
+                goto error;
+            }
+
+            end = found - data;
+            item = parse_int(data, idx + 1, end);
+            idx = end + 1;
+        }
+        else if (chr >= '0' && chr <= '9') {  /* String. Starts with a digit. */
+            found = memchr(data + idx, ':', size - idx);
+
+            if (found == NULL) {
+                raise_decoding_error(
+                    PyUnicode_FromString("Unexpected end of data: unterminated string length."), idx);
+                goto error;
+            }
+
+            end = found - data;
+            str_len_obj = parse_int(data, idx, end);
+
+            if (str_len_obj == NULL) {
+                goto error;
+            }
+
+            str_len = PyLong_AsSsize_t(str_len_obj);
+
+            if (str_len == -1 && PyErr_Occurred()) {
+                PyErr_Clear();
+                str_len = PY_SSIZE_T_MAX;
+            }
+
+            if (str_len > size - end - 1) {
+                raise_decoding_error(
+                    PyUnicode_FromFormat(
+                        "Unexpected end of data: string of %S bytes is truncated.", str_len_obj), idx);
+                Py_DECREF(str_len_obj);
+                goto error;
+            }
+
+            Py_DECREF(str_len_obj);
+
+            if (text_keys == Py_None) {
+                item = decode_string(data, end + 1, str_len, items, byte_keys);
+            }
+            else {
+                item = decode_string_text_keys(
+                    data, end + 1, str_len, items,
+                    containers_len ? &containers[containers_len - 1] : NULL, text_keys);
+            }
+            idx = end + 1 + str_len;
+
+            container = containers_len ? &containers[containers_len - 1] : NULL;
+
+            if (
+                interned != NULL && item != NULL && container != NULL &&
+                (!container->is_dict || !(PyList_GET_SIZE(items) % 2))
+            ) {
+                /* Dictionary key or a string in a list: reuse an equal string seen before. */
+                seen = PyDict_SetDefault(interned, item, item);
+                Py_XINCREF(seen);
+                Py_DECREF(item);
+                item = seen;
+            }
+        }
+        else if (chr == 'e') {  /* End of a dictionary or a list. */
+
+            if (!containers_len) {
+                rest = PyUnicode_DecodeUTF8(data + idx, size - idx, "replace");
+
+                if (rest != NULL) {
+                    rest_cut = PyUnicode_Substring(rest, 0, 60);
+
+                    if (rest_cut != NULL) {
+                        raise_decoding_error(
+                            PyUnicode_FromFormat("Unable to parse the rest of the data: \"%U\"", rest_cut), idx);
+                        Py_DECREF(rest_cut);
+                    }
+                    Py_DECREF(rest);
+                }
+                goto error;
+            }
+
+            container = &containers[--containers_len];
+
+            if (container->is_dict) {
+                item = create_dict(items);
+
+                if (item == NULL && PyErr_ExceptionMatches(PyExc_TypeError)) {
+                    /* E.g. a mix of text and binary (non UTF-8) keys which can't be sorted. */
+                    PyObject *exc_type, *exc_value, *exc_tb;
+
+                    PyErr_Fetch(&exc_type, &exc_value, &exc_tb);
+                    raise_decoding_error(
+                        PyUnicode_FromFormat("Unable to sort dictionary keys: %S.", exc_value), idx);
+                    Py_XDECREF(exc_type);
+                    Py_XDECREF(exc_value);
+                    Py_XDECREF(exc_tb);
+                }
+            }
+            else if (container->sink != NULL) {
+                item = container->sink;  /* Steal the reference. */
+                container->sink = NULL;
+            }
+            else {
+                item = items;
+                Py_INCREF(item);
+            }
+
+            Py_DECREF(items);
+            items = container->parent_items;
+            idx++;
+        }
+        else {
+            raise_decoding_error(
+                PyUnicode_FromFormat("Unable to interpret `%c` char.", (int)(unsigned char)chr), idx);
+            goto error;
+        }
+
+        if (item == NULL) {
+            goto error;
+        }
+
+        container = containers_len ? &containers[containers_len - 1] : NULL;
+
+        if (container != NULL && container->sink != NULL) {
+            result = PyObject_CallMethod(container->sink, "append", "O", item);
+
+            if (result == NULL) {
+                goto error;
+            }
+            Py_DECREF(result);
+        }
+        else if (PyList_Append(items, item) < 0) {
+            goto error;
+        }
+
+        Py_CLEAR(item);
+    }
+
+    if (containers_len) {
+        raise_decoding_error(
+            PyUnicode_FromString("Unexpected end of data: unterminated dictionary or list."), size);
+        goto error;
+    }
+
+    PyMem_Free(containers);
+
+    if (PyList_GET_SIZE(items) == 1) {
+        item = PyList_GET_ITEM(items, 0);
+        Py_INCREF(item);
+        Py_DECREF(items);
+        return item;
+    }
+
+    return items;
+
+error:
+    Py_XDECREF(item);
+    Py_XDECREF(items);
+
+    while (containers_len) {
+        containers_len--;
+        Py_DECREF(containers[containers_len].parent_items);
+        Py_XDECREF(containers[containers_len].sink);
+    }
+
+    PyMem_Free(containers);
+    return NULL;
+}
+
+
+static PyObject *
+bencode_decode(PyObject *module, PyObject *args)
+{
+    Py_buffer view;
+    PyObject *byte_keys = Py_None, *text_keys = Py_None, *list_factories = Py_None, *interned = NULL, *result;
+    int intern = 0;
+
+    if (!PyArg_ParseTuple(args, "y*|OOpO:decode", &view, &byte_keys, &text_keys, &intern, &list_factories)) {
+        return NULL;
+    }
+
+    if (list_factories != Py_None && !PyDict_Check(list_factories)) {
+        PyErr_SetString(PyExc_TypeError, "list_factories must be a dict or None");
+        PyBuffer_Release(&view);
+        return NULL;
+    }
+
+    if (intern) {
+        interned = PyDict_New();
+
+        if (interned == NULL) {
+            PyBuffer_Release(&view);
+            return NULL;
+        }
+    }
+
+    result = decode(view.buf, view.len, byte_keys, text_keys, interned, list_factories);
+
+    Py_XDECREF(interned);
+    PyBuffer_Release(&view);
+    return result;
+}
+
+
+/* Returns an index right after an item starting at the given index. No objects are created for the item. */
+static PyObject *
+bencode_skip(PyObject *module, PyObject *args)
+{
+    Py_buffer view;
+    Py_ssize_t idx, size, start, colon, depth = 0, str_len;
+    PyObject *raw, *str_len_obj;
+    const char *data, *found;
+    char chr;
+
+    if (!PyArg_ParseTuple(args, "y*n:skip", &view, &idx)) {
+        return NULL;
+    }
+
+    data = view.buf;
+    size = view.len;
+
+    if (idx < 0) {
+        idx = size;
+    }
+
+    while (1) {
+
+        if (idx >= size) {
+            raise_decoding_error(PyUnicode_FromString("Unexpected end of data: unterminated item."), idx);
+            goto error;
+        }
+
+        chr = data[idx];
+
+        if (chr == 'd' || chr == 'l') {
+            depth++;
+            idx++;
+        }
+        else if (chr == 'i') {
+            found = memchr(data + idx, 'e', size - idx);
+
+            if (found == NULL) {
+                raise_decoding_error(
+                    PyUnicode_FromString("Unexpected end of data: unterminated integer."), idx);
+                goto error;
+            }
+
+            idx = found - data + 1;
+        }
+        else if (chr >= '0' && chr <= '9') {
+            start = idx;
+            found = memchr(data + idx, ':', size - idx);
+
+            if (found == NULL) {
+                raise_decoding_error(
+                    PyUnicode_FromString("Unexpected end of data: unterminated string length."), idx);
+                goto error;
+            }
+
+            colon = found - data;
+            str_len = 0;
+
+            for (; idx < colon; idx++) {
+
+                if (data[idx] < '0' || data[idx] > '9') {
+                    raw = PyUnicode_DecodeUTF8(data + start, colon - start, "replace");
+
+                    if (raw != NULL) {
+                        raise_decoding_error(
+                            PyUnicode_FromFormat("Unable to interpret `%U` as a number.", raw), start);
+                        Py_DECREF(raw);
+                    }
+                    goto error;
+                }
+
+                if (str_len <= size) {
+                    /* Stop accumulating once it's clear the string is truncated (no overflow). */
+                    str_len = str_len * 10 + (data[idx] - '0');
+                }
+            }
+
+            idx = colon + 1;
+
+            if (str_len > size - idx) {
+                str_len_obj = parse_int(data, start, colon);
+
+                if (str_len_obj != NULL) {
+                    raise_decoding_error(
+                        PyUnicode_FromFormat(
+                            "Unexpected end of data: string of %S bytes is truncated.", str_len_obj), start);
+                    Py_DECREF(str_len_obj);
+                }
+                goto error;
+            }
+
+            idx += str_len;
+        }
+        else if (chr == 'e' && depth) {
+            depth--;
+            idx++;
+        }
+        else {
+            raise_decoding_error(
+                PyUnicode_FromFormat("Unable to interpret `%c` char.", (int)(unsigned char)chr), idx);
+            goto error;
+        }
+
+        if (!depth) {
+            break;
+        }
+    }
+
+    PyBuffer_Release(&view);
+    return PyLong_FromSsize_t(idx);
+
+error:
+    PyBuffer_Release(&view);
+    return NULL;
+}
+
+
+static PyMethodDef bencode_methods[] = {
+    {"encode", bencode_encode, METH_VARARGS,
+     "encode(value, fallback=None)\n\nEncodes a value into bencoded bytes.\n"
+     "Unsupported types are passed to `fallback` callable which should return bencoded bytes."},
+    {"decode", bencode_decode, METH_VARARGS,
+     "decode(encoded, byte_keys=None, text_keys=None, intern=False, list_factories=None)\n\n"
+     "Decodes bencoded data introduced as bytes."},
+    {"skip", bencode_skip, METH_VARARGS,
+     "skip(encoded, idx)\n\nReturns an index right after an item starting at the given index."},
+    {NULL, NULL, 0, NULL}
+};
+
+
+static struct PyModuleDef bencode_module = {
+    PyModuleDef_HEAD_INIT,
+    "_bencode",
+    "Compiled backend for torrentool.bencode.",
+    -1,
+    bencode_methods,
+    NULL,
+    NULL,
+    NULL,
+    NULL
+};
+
+
+PyMODINIT_FUNC
+PyInit__bencode(void)
+{
+    PyObject *exceptions = PyImport_ImportModule("torrentool.exceptions");
+
+    if (exceptions == NULL) {
+        return NULL;
+    }
+
+    DecodingError = PyObject_GetAttrString(exceptions, "BencodeDecodingError");
+    EncodingError = PyObject_GetAttrString(exceptions, "BencodeEncodingError");
+    Py_DECREF(exceptions);
+
+    if (DecodingError == NULL || EncodingError == NULL) {
+        return NULL;
+    }
+
+    return PyModule_Create(&bencode_module);
+}
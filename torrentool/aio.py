@@ -0,0 +1,106 @@
+import asyncio
+from concurrent.futures import Executor
+from threading import Event
+from typing import AsyncIterator, Callable, Generic, List, Optional, Tuple, TypeVar
+
+TypeResult = TypeVar('TypeResult')
+
+
+class HashingTask(Generic[TypeResult]):
+    """Hashing job (e.g. torrent creation) run in an executor without blocking the event loop.
+
+    Awaitable: the result of the job is returned. Cancellation of an awaiting task
+    (or .cancel()) stops hashing.
+
+    Async iterable: yields progress as (bytes hashed, total bytes) tuples until the job is done.
+    Intermediate values are skipped if not consumed in time.
+
+    .. code-block:: python
+
+        task = Torrent.acreate_from('/srv/data')
+
+        async for done, total in task:
+            print(f'{done / total:.0%}')
+
+        torrent = await task
+
+    """
+    def __init__(self, func: Callable[..., TypeResult], *, executor: Executor = None):
+        """
+        Must be instantiated in a running event loop. The job is started at once.
+
+        :param func: Callable to run. It is given `progress` and `cancel` keyword arguments
+            (see Torrent.create_from()).
+
+        :param executor: Executor to run the job in. Default: the event loop default executor.
+            Threads are expected, since hashing releases GIL.
+
+        """
+        self._loop = asyncio.get_running_loop()
+        self._cancel = Event()
+        self._progress: Optional[Tuple[int, int]] = None
+        self._waiters: List[asyncio.Future] = []
+
+        self._future = self._loop.run_in_executor(
+            executor, lambda: func(progress=self._on_progress, cancel=self._cancel))
+        self._future.add_done_callback(self._on_done)
+
+    def __await__(self):
+        return self._future.__await__()
+
+    def __aiter__(self) -> AsyncIterator[Tuple[int, int]]:
+        return self._iter_progress()
+
+    @property
+    def progress(self) -> Optional[Tuple[int, int]]:
+        """The latest progress as (bytes hashed, total bytes) tuple. None if not started."""
+        return self._progress
+
+    def done(self) -> bool:
+        """Whether the job is finished (completed, failed or cancelled)."""
+        return self._future.done()
+
+    def cancel(self):
+        """Stops hashing."""
+        self._cancel.set()
+        self._future.cancel()
+
+    def _on_progress(self, done: int, total: int):
+        # Called from executor threads.
+        self._loop.call_soon_threadsafe(self._set_progress, (done, total))
+
+    def _set_progress(self, progress: Tuple[int, int]):
+        self._progress = progress
+        self._notify()
+
+    def _on_done(self, future: asyncio.Future):
+        if future.cancelled():
+            # Hashing thread is not interrupted by future cancellation.
+            self._cancel.set()
+
+        self._notify()
+
+    def _notify(self):
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+        self._waiters.clear()
+
+    async def _iter_progress(self) -> AsyncIterator[Tuple[int, int]]:
+        seen = None
+
+        while True:
+            progress = self._progress
+
+            if progress is not None and progress != seen:
+                seen = progress
+                yield progress
+                continue
+
+            if self._future.done():
+                return
+
+            waiter = self._loop.create_future()
+            self._waiters.append(waiter)
+            await waiter
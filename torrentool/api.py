@@ -2,6 +2,8 @@
 Exposes commonly used classes and functions.
 
 """
-from .bencode import Bencode  # noqa
+from .bencode import Bencode, DecodeLimits, RawBencoded  # noqa
+from .filelist import FileList  # noqa
+from .hashing import DeviceSlots, IOPolicy  # noqa
 from .torrent import Torrent  # noqa
 from .utils import upload_to_cache_server, get_open_trackers_from_local, get_open_trackers_from_remote  # noqa
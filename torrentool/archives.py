@@ -0,0 +1,69 @@
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Tuple, Union
+
+from .exceptions import TorrentError
+
+ARCHIVE_SUFFIXES = ('.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz', '.tar', '.zip')
+"""Archive file name suffixes stripped to get a torrent name."""
+
+
+def get_archive_name(src_path: Union[str, Path]) -> str:
+    """Returns archive file name without archive suffix.
+
+    :param src_path:
+
+    """
+    name = Path(src_path).name
+
+    for suffix in ARCHIVE_SUFFIXES:
+        if name.lower().endswith(suffix) and len(name) > len(suffix):
+            return name[:-len(suffix)]
+
+    return name
+
+
+def _split_member_name(name: str) -> List[str]:
+    parts = [part for part in name.split('/') if part not in {'', '.'}]
+
+    if '..' in parts:
+        raise TorrentError(f'Unsafe archive member path: {name}')
+
+    return parts
+
+
+def iter_archive_files(src_path: Union[str, Path]) -> Iterator[Tuple[List[str], int, BinaryIO]]:
+    """Yields regular files from tar (possibly compressed) or zip archive
+    in member order as tuples (path parts, size, file object to read contents from).
+
+    Archive is read in streaming mode: a file object is only valid until the next iteration.
+
+    :param src_path:
+
+    """
+    src_path = str(src_path)
+
+    if zipfile.is_zipfile(src_path):
+        with zipfile.ZipFile(src_path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+
+                with archive.open(info) as f:
+                    yield _split_member_name(info.filename), info.file_size, f
+
+        return
+
+    try:
+        archive = tarfile.open(src_path, 'r|*')
+
+    except (OSError, tarfile.TarError) as e:
+        raise TorrentError(f'Unable to read archive {src_path}: {e}')
+
+    with archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+
+            yield _split_member_name(member.name), member.size, archive.extractfile(member)
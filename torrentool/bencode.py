@@ -1,16 +1,104 @@
 from codecs import encode
+from collections.abc import Sequence
 from operator import itemgetter
+from os import environ
+from os.path import getsize
 from pathlib import Path
-from typing import Union, Tuple, Set
+from time import perf_counter
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, MutableSequence, Union, Set, NamedTuple, Optional, Tuple
+from warnings import warn
 
-from .exceptions import BencodeDecodingError, BencodeEncodingError
+from . import metrics
+from .exceptions import BencodeError, BencodeDecodingError, BencodeEncodingError
+
+if TYPE_CHECKING:  # pragma: nocover
+    from concurrent.futures import Executor
 
 TypeEncodable = Union[str, int, list, set, tuple, dict, bytes, bytearray]
 
+BACKEND_ENV_VAR = 'TORRENTOOL_BENCODE_BACKEND'
+"""Environment variable to force bencode backend: `c` or `python`. See Bencode.set_backend().
+Unknown or unavailable backend issues a warning and pure-Python one is used instead."""
+
+_CHAR_DICT = ord('d')
+_CHAR_LIST = ord('l')
+_CHAR_INT = ord('i')
+_CHAR_END = ord('e')
+_CHAR_MINUS = ord('-')
+
+
+class DecodeLimits(NamedTuple):
+    """Resource limits to apply while decoding bencoded data.
+    None stands for no limit.
+
+    """
+    max_depth: Optional[int] = None
+    """Maximum nesting depth of dictionaries and lists."""
+
+    max_int_digits: Optional[int] = None
+    """Maximum number of digits in an integer."""
+
+    max_str_len: Optional[int] = None
+    """Maximum length of a string in bytes."""
+
+    max_items: Optional[int] = None
+    """Maximum total number of decoded items (including containers and dictionary keys)."""
+
+    max_size: Optional[int] = None
+    """Maximum size of bencoded data in bytes."""
+
+
+class RawBencoded(bytes):
+    """Bencoded data passed through by the encoder as is.
+
+    Allows parts of decoded data to be kept byte-exact (see `raw_keys` in Bencode.decode()).
+
+    """
+
 
 class Bencode:
     """Exposes utilities for bencoding."""
 
+    _accelerated = None
+    """Compiled backend module in use. None for pure-Python."""
+
+    @classmethod
+    def get_backend(cls) -> str:
+        """Returns a name of the backend in use: `c` or `python`."""
+        return 'python' if cls._accelerated is None else 'c'
+
+    @classmethod
+    def set_backend(cls, name: str = ''):
+        """Sets encoding and decoding backend.
+
+        Compiled backend is used for default decoding mode (no limits, not strict),
+        other modes are always handled by pure-Python implementation.
+
+        :param name: Backend name:
+            * `c` - compiled extension (raises BencodeError if unavailable);
+            * `python` - pure-Python implementation;
+            * empty string - compiled extension if available.
+
+        """
+        if name == 'python':
+            cls._accelerated = None
+            return
+
+        if name not in {'', 'c'}:
+            raise BencodeError(f'Unknown bencode backend `{name}`.')
+
+        try:
+            from . import _bencode as accelerated
+
+        except ImportError:
+
+            if name:
+                raise BencodeError('Compiled bencode backend is not available.')
+
+            accelerated = None
+
+        cls._accelerated = accelerated
+
     @classmethod
     def encode(cls, value: TypeEncodable) -> bytes:
         """Encodes a value into bencoded bytes.
@@ -18,48 +106,93 @@ class Bencode:
         :param value: Python object to be encoded (str, int, list, dict).
 
         """
+        accelerated = cls._accelerated
+
+        if accelerated is not None:
+            return accelerated.encode(value, cls._encode_fallback)
+
+        return cls._encode(value)
+
+    @classmethod
+    def _encode_fallback(cls, value) -> bytes:
+        # Called by accelerated .encode() for values of types it doesn't handle.
+        if isinstance(value, Sequence) and not isinstance(value, (str, bytes, bytearray)):
+            # List-like containers (e.g. FileList): items are still encoded by accelerated code.
+            return cls._accelerated.encode(list(value), cls._encode_fallback)
+
+        return cls._encode(value)
+
+    @classmethod
+    def _encode(cls, value: TypeEncodable) -> bytes:
+        # Pure-Python implementation for .encode().
         val_encoding = 'utf-8'
+        chunks = []
+        add_chunk = chunks.append
 
-        def encode_str(v: str) -> bytes:
+        def encode_str(v: str):
             v_enc = encode(v, val_encoding)
-            prefix = encode(f'{len(v_enc)}:', val_encoding)
-            return prefix + v_enc
+            add_chunk(encode(f'{len(v_enc)}:', val_encoding))
+            add_chunk(v_enc)
 
-        def encode_(val: TypeEncodable) -> bytes:
+        def encode_(val: TypeEncodable):
             if isinstance(val, str):
-                result = encode_str(val)
+                encode_str(val)
 
             elif isinstance(val, int):
-                result = encode(f'i{val}e', val_encoding)
+                add_chunk(encode(f'i{val:d}e', val_encoding))
 
             elif isinstance(val, (list, set, tuple)):
-                result = encode('l', val_encoding)
+                add_chunk(b'l')
                 for item in val:
-                    result += encode_(item)
-                result += encode('e', val_encoding)
+                    encode_(item)
+                add_chunk(b'e')
 
             elif isinstance(val, dict):
-                result = encode('d', val_encoding)
+                add_chunk(b'd')
 
                 # Dictionaries are expected to be sorted by key.
                 for k, v in sorted(val.items(), key=itemgetter(0)):
-                    result += (encode_str(k) + encode_(v))
+                    if not isinstance(k, str):
+                        raise BencodeEncodingError(f'Unable to encode `{type(k)}` {k}')
+                    encode_str(k)
+                    encode_(v)
 
-                result += encode('e', val_encoding)
+                add_chunk(b'e')
+
+            elif isinstance(val, RawBencoded):
+                add_chunk(val)
 
             elif isinstance(val, (bytes, bytearray)):
-                result = encode(f'{len(val)}:', val_encoding)
-                result += val
+                add_chunk(encode(f'{len(val)}:', val_encoding))
+                add_chunk(val)
+
+            elif isinstance(val, Sequence):
+                # Other list-like containers (e.g. FileList).
+                add_chunk(b'l')
+                for item in val:
+                    encode_(item)
+                add_chunk(b'e')
 
             else:
                 raise BencodeEncodingError(f'Unable to encode `{type(val)}` {val}')
 
-            return result
+        encode_(value)
 
-        return encode_(value)
+        return b''.join(chunks)
 
     @classmethod
-    def decode(cls, encoded: bytes, *, byte_keys: Set[str] = None) -> TypeEncodable:
+    def decode(
+            cls,
+            encoded: bytes,
+            *,
+            byte_keys: Set[str] = None,
+            text_keys: Set[str] = None,
+            raw_keys: Set[str] = None,
+            limits: DecodeLimits = None,
+            strict: bool = False,
+            intern: bool = False,
+            list_factories: Dict[str, Callable[[], MutableSequence]] = None
+    ) -> TypeEncodable:
         """Decodes bencoded data introduced as bytes.
 
         Returns decoded structure(s).
@@ -69,117 +202,492 @@ class Bencode:
         :param byte_keys: Keys values for which should be treated
             as bytes (as opposed to UTF-8 strings).
 
+        :param text_keys: Keys values for which should be decoded into strings.
+            If set, all other strings (except dictionary keys) are left as bytes
+            without decoding attempts and `byte_keys` is ignored.
+            Strings in lists are treated according to the key of the closest dictionary.
+            Pass an empty set to get all strings as bytes.
+
+        :param raw_keys: Keys values for which should not be decoded, but
+            left as bencoded data (RawBencoded) which is encoded back as is.
+            Only overall structure of such data is checked, limits (except `max_size`)
+            and strict mode checks are not applied to it.
+
+        :param limits: Resource limits to apply while decoding.
+            Use those for data from untrusted sources.
+
+        :param strict: Require data to be in canonical form:
+            sorted unique string dictionary keys, no leading zeros and negative zero,
+            no data after the first item. Errors carry offsets of offending bytes.
+            Strings which are not valid UTF-8 are left as bytes regardless of `byte_keys`
+            so that data is not altered.
+
+        :param intern: Share a single object between equal dictionary keys
+            and equal strings in lists (e.g. file path components).
+            Saves memory for data with many similar entries.
+
+        :param list_factories: Callables returning containers (having `.append()`) to collect
+            items of lists under the given keys into instead of plain lists, as those are decoded
+            (e.g. FileList for `files` to keep the peak memory usage low).
+
         """
+        if not metrics.enabled:
+            return cls._decode(encoded, byte_keys, text_keys, raw_keys, limits, strict, intern, list_factories)
+
+        started = perf_counter()
+
+        try:
+            decoded = cls._decode(encoded, byte_keys, text_keys, raw_keys, limits, strict, intern, list_factories)
+
+        except BencodeDecodingError:
+            metrics.DECODE_ERRORS.inc()
+            raise
+
+        metrics.PHASE_DECODE.observe(perf_counter() - started)
+        metrics.BYTES_DECODED.inc(len(encoded))
+
+        return decoded
+
+    @classmethod
+    async def adecode(cls, encoded: bytes, *, executor: 'Executor' = None, **kwargs) -> TypeEncodable:
+        """Asynchronous variant of .decode(): decoding is done in an executor
+        without blocking the event loop.
+
+        :param encoded:
+
+        :param executor: Executor to run in. Default: the event loop default executor.
+
+        :param kwargs: Keyword arguments for .decode().
+
+        """
+        import asyncio
+        from functools import partial
+
+        return await asyncio.get_running_loop().run_in_executor(executor, partial(cls.decode, encoded, **kwargs))
+
+    @classmethod
+    def _decode(
+            cls,
+            encoded: bytes,
+            byte_keys: Set[str],
+            text_keys: Set[str],
+            raw_keys: Set[str],
+            limits: DecodeLimits,
+            strict: bool,
+            intern: bool,
+            list_factories: Dict[str, Callable[[], MutableSequence]]
+    ) -> TypeEncodable:
+        # Implementation for .decode().
+        accelerated = cls._accelerated
+
+        if accelerated is not None and limits is None and not strict and not raw_keys:
+            return accelerated.decode(encoded, byte_keys, text_keys, intern, list_factories)
+
+        size = len(encoded)
+
+        max_depth, max_int_digits, max_str_len, max_items, max_size = limits or DecodeLimits()
+
+        if max_size is not None and size > max_size:
+            raise BencodeDecodingError(f'Data size {size} exceeds the limit of {max_size} bytes.', offset=0)
+
+        # Maximum number of chars to look through for a string length terminator.
+        str_len_digits = None if max_str_len is None else len(str(max_str_len))
+
+        interned = {} if intern else None
+
         def create_dict(items) -> dict:
-            # Let's guarantee that dictionaries are sorted.
             k_v_pair = zip(*[iter(items)] * 2)
+
+            if strict:
+                # Already checked to be sorted.
+                return dict(k_v_pair)
+
+            # Let's guarantee that dictionaries are sorted.
             return dict(sorted(k_v_pair, key=itemgetter(0)))
 
         def create_list(items) -> list:
-            return list(items)
+            return items
 
-        stack_items = []
-        stack_containers = []
+        def parse_int(start: int, end: int) -> int:
+            raw = encoded[start:end]
 
-        def compress_stack():
-            target_container = stack_containers.pop()
-            subitems = []
+            try:
+                number = int(raw or 0)
 
-            while True:
-                subitem = stack_items.pop()
-                subitems.append(subitem)
-                if subitem is target_container:
-                    break
+            except ValueError:
+                raise BencodeDecodingError(
+                    f'Unable to interpret `{raw.decode(errors="replace")}` as a number.', offset=start)
 
-            container_creator = subitems.pop()
-            container = container_creator(reversed(subitems))
-            stack_items.append(container)
+            if strict and b'%d' % number != raw:
+                raise non_canonical(f'`{raw.decode(errors="replace")}` is not a canonical number', start)
 
-        def parse_forward(till_char: str, sequence: bytes) -> Tuple[int, int]:
-            number = ''
-            char_sub_idx = 0
+            return number
 
-            for char_sub_idx, char_sub in enumerate(sequence):
-                char_sub = chr(char_sub)
-                if char_sub == till_char:
-                    break
+        def non_canonical(msg: str, offset: int) -> BencodeDecodingError:
+            return BencodeDecodingError(f'Non-canonical data at offset {offset}: {msg}.', offset=offset)
 
-                number += char_sub
+        def non_string_key(offset: int) -> BencodeDecodingError:
+            return BencodeDecodingError(f'Dictionary key at offset {offset} is not a string.', offset=offset)
 
-            number = int(number or 0)
-            char_sub_idx += 1
+        containers = []  # Stack of parents (container creator, container items, container key).
+        last_keys = []  # Stack of latest raw dictionary keys. Strict mode only.
+        items = []  # Items of the container being decoded.
+        items_creator = None  # Creator of the container being decoded. None for top level.
+        items_key = None  # Key of the closest dictionary the container is in.
+        items_count = 0
+        key_expected = False
+        idx = 0
 
-            return number, char_sub_idx
+        while idx < size:
+            char = encoded[idx]
 
-        while encoded:
-            char = encoded[0]
-            char = chr(char)
+            if raw_keys and items_creator is create_dict and len(items) % 2 and items[-1] in raw_keys:
+                end = cls._skip(encoded, idx)
+                items.append(RawBencoded(encoded[idx:end]))
+                idx = end
+                continue
 
-            if char == 'd':  # Dictionary
-                stack_items.append(create_dict)
-                stack_containers.append(create_dict)
-                encoded = encoded[1:]
+            if strict:
+                if not containers:
+                    if items:
+                        raise non_canonical('trailing data', idx)
 
-            elif char == 'l':  # List
-                stack_items.append(create_list)
-                stack_containers.append(create_list)
-                encoded = encoded[1:]
+                    key_expected = False
 
-            elif char == 'i':  # Integer
-                number, char_sub_idx = parse_forward('e', encoded[1:])
-                char_sub_idx += 1
+                else:
+                    key_expected = items_creator is create_dict and not len(items) % 2
 
-                stack_items.append(number)
-                encoded = encoded[char_sub_idx:]
+                    if key_expected and not 48 <= char <= 57 and char != _CHAR_END:
+                        raise non_canonical('dictionary key is not a string', idx)
 
-            elif char.isdigit():  # String
-                str_len, char_sub_idx = parse_forward(':', encoded)
-                last_char_idx = char_sub_idx + str_len
+            if char == _CHAR_DICT or char == _CHAR_LIST:
 
-                string = encoded[char_sub_idx:last_char_idx]
-                try:
-                    string = string.decode()
+                if items_creator is create_dict and not len(items) % 2:
+                    raise non_string_key(idx)
+
+                if max_depth is not None and len(containers) >= max_depth:
+                    raise BencodeDecodingError(f'Nesting depth exceeds the limit of {max_depth}.', offset=idx)
+
+                containers.append((items_creator, items, items_key))
+
+                factory = None
+
+                if items_creator is create_dict and len(items) % 2:
+                    items_key = items[-1]
+
+                    if list_factories and char == _CHAR_LIST:
+                        factory = list_factories.get(items_key)
+
+                items_creator = create_dict if char == _CHAR_DICT else create_list
+
+                if strict:
+                    last_keys.append(None)
+
+                items = [] if factory is None else factory()
+                idx += 1
+
+            elif char == _CHAR_INT:
+
+                if items_creator is create_dict and not len(items) % 2:
+                    raise non_string_key(idx)
 
-                except UnicodeDecodeError:
+                if max_int_digits is None:
+                    end = encoded.find(b'e', idx)
 
-                    if stack_items:
-                        latest_stack_item = stack_items[-1]
-                    else:
-                        latest_stack_item = None
+                else:
+                    # Do not look further than allowed. Leave room for a sign.
+                    end = encoded.find(b'e', idx, idx + max_int_digits + 3)
 
-                    if byte_keys is None or str(latest_stack_item) in byte_keys:
-                        # Considered to be a bytestring (e.g. `pieces` hashes concatenation).
-                        pass
+                    if (
+                        size - idx > max_int_digits + 2 if end == -1 else
+                        end - idx - 1 - (encoded[idx + 1] == _CHAR_MINUS) > max_int_digits
+                    ):
+                        raise BencodeDecodingError(
+                            f'Integer exceeds the limit of {max_int_digits} digits.', offset=idx)
 
-                    else:
-                        # Try to decode from UTF-8 with fallback to replace
-                        # for non-standard .torrent files.
-                        string = string.decode(errors='replace')
+                if end == -1:
+                    raise BencodeDecodingError('Unexpected end of data: unterminated integer.', offset=idx)
 
-                stack_items.append(string)
-                encoded = encoded[last_char_idx:]
+                items.append(parse_int(idx + 1, end))
+                idx = end + 1
+
+            elif 48 <= char <= 57:  # String. Starts with a digit.
+
+                if str_len_digits is None:
+                    colon = encoded.find(b':', idx)
+
+                else:
+                    colon = encoded.find(b':', idx, idx + str_len_digits + 1)
+
+                    if colon == -1 and size - idx > str_len_digits:
+                        raise BencodeDecodingError(f'String length exceeds the limit of {max_str_len}.', offset=idx)
+
+                if colon == -1:
+                    raise BencodeDecodingError('Unexpected end of data: unterminated string length.', offset=idx)
+
+                str_len = parse_int(idx, colon)
+
+                if max_str_len is not None and str_len > max_str_len:
+                    raise BencodeDecodingError(
+                        f'String length {str_len} exceeds the limit of {max_str_len}.', offset=idx)
+
+                string_start = idx
+                idx = colon + 1 + str_len
+
+                if idx > size:
+                    raise BencodeDecodingError(
+                        f'Unexpected end of data: string of {str_len} bytes is truncated.', offset=string_start)
 
-            elif char == 'e':  # End of a dictionary or a list.
+                string = encoded[colon + 1:idx]
+
+                if key_expected:
+                    last_key = last_keys[-1]
+
+                    if last_key is not None and string <= last_key:
+                        raise non_canonical(
+                            f'{"duplicate" if string == last_key else "unsorted"} dictionary key', string_start)
+
+                    last_keys[-1] = string
+
+                if text_keys is None:
+                    try:
+                        string = string.decode()
+
+                    except UnicodeDecodeError:
+
+                        # Preceding item in a dictionary is a key.
+                        latest_item = items[-1] if items else None
+
+                        if strict or byte_keys is None or str(latest_item) in byte_keys:
+                            # Considered to be a bytestring (e.g. `pieces` hashes concatenation).
+                            pass
+
+                        else:
+                            # Try to decode from UTF-8 with fallback to replace
+                            # for non-standard .torrent files.
+                            string = string.decode(errors='replace')
+
+                elif (
+                    (items_creator is create_dict and not len(items) % 2) or
+                    (items[-1] if items_creator is create_dict else items_key) in text_keys
+                ):
+                    # Dictionary key or a value for a text key.
+                    try:
+                        string = string.decode()
+
+                    except UnicodeDecodeError:
+                        if not strict:
+                            string = string.decode(errors='replace')
+
+                if interned is not None and (
+                    items_creator is create_list or (items_creator is create_dict and not len(items) % 2)
+                ):
+                    # Dictionary key or a string in a list.
+                    string = interned.setdefault(string, string)
+
+                items.append(string)
+
+            elif char == _CHAR_END:  # End of a dictionary or a list.
                 try:
-                    compress_stack()
+                    parent_creator, parent_items, parent_key = containers.pop()
 
                 except IndexError as e:
                     raise BencodeDecodingError(
-                        f'Unable to parse the rest of the data: "{encoded.decode(errors="replace")[:60]}"'
+                        f'Unable to parse the rest of the data: "{encoded[idx:].decode(errors="replace")[:60]}"',
+                        offset=idx,
                     ) from e
 
-                encoded = encoded[1:]
+                if strict:
+                    last_keys.pop()
+
+                    if items_creator is create_dict and not key_expected:
+                        raise non_canonical('dictionary key has no value', idx)
+
+                try:
+                    parent_items.append(items_creator(items))
+
+                except TypeError as e:
+                    # E.g. a mix of text and binary (non UTF-8) keys which can't be sorted.
+                    raise BencodeDecodingError(f'Unable to sort dictionary keys: {e}.', offset=idx) from e
+
+                items, items_creator, items_key = parent_items, parent_creator, parent_key
+                idx += 1
+                continue
 
             else:
-                raise BencodeDecodingError(f'Unable to interpret `{char}` char.')
+                raise BencodeDecodingError(f'Unable to interpret `{chr(char)}` char.', offset=idx)
+
+            if max_items is not None:
+                items_count += 1
+
+                if items_count > max_items:
+                    raise BencodeDecodingError(f'Items number exceeds the limit of {max_items}.', offset=idx)
+
+        if containers:
+            raise BencodeDecodingError('Unexpected end of data: unterminated dictionary or list.', offset=size)
+
+        if len(items) == 1:
+            items = items.pop()
+
+        return items
+
+    @classmethod
+    def extract(
+            cls,
+            encoded: bytes,
+            paths: Iterable[Union[str, Tuple[str, ...]]],
+            *,
+            raw: bool = False
+    ) -> Dict[Union[str, Tuple[str, ...]], TypeEncodable]:
+        """Extracts values for the given key paths from bencoded dictionary
+        without decoding the rest of data: unrequested values are skipped
+        by their lengths. Scanning stops as soon as all values are found.
+
+        Returns a dictionary indexed by requested paths. Paths not found are omitted.
+
+        .. code-block:: python
+
+            Bencode.extract(data, ['info.name', 'announce', ('info', 'piece length')])
+
+        :param encoded:
+
+        :param paths: Key paths, either as dot-separated strings or tuples of keys.
+
+        :param raw: Return values as raw bencoded data (RawBencoded) instead of decoding them.
+            Strings which are not valid UTF-8 are left as bytes on decoding.
+
+        """
+        wanted = {}
+
+        for path in paths:
+            keys = path.split('.') if isinstance(path, str) else path
+            wanted[tuple(key.encode() for key in keys)] = path
+
+        prefixes = {keys[:idx] for keys in wanted for idx in range(1, len(keys))}
+        size = len(encoded)
+        found = {}
+
+        if not size or encoded[0] != _CHAR_DICT:
+            raise BencodeDecodingError('Unable to extract: data is not a dictionary.', offset=0)
+
+        def scan_dict(idx: int, prefix: tuple) -> Optional[int]:
+            # Scans a dictionary starting at the given index.
+            # Returns an index right after it or None if all values are found.
+            idx += 1
+
+            while True:
+
+                if idx >= size:
+                    raise BencodeDecodingError('Unexpected end of data: unterminated dictionary.', offset=idx)
+
+                if encoded[idx] == _CHAR_END:
+                    return idx + 1
+
+                if not 48 <= encoded[idx] <= 57:
+                    raise BencodeDecodingError('Dictionary key is not a string.', offset=idx)
+
+                key_end = cls._skip(encoded, idx)
+                keys = prefix + (encoded[encoded.index(b':', idx) + 1:key_end],)
+                value_start = key_end
+
+                if keys in prefixes and value_start < size and encoded[value_start] == _CHAR_DICT:
+                    idx = scan_dict(value_start, keys)
+
+                    if idx is None:
+                        return None
+
+                else:
+                    idx = cls._skip(encoded, value_start)
 
-        if len(stack_items) == 1:
-            stack_items = stack_items.pop()
+                if keys in wanted:
+                    value = RawBencoded(encoded[value_start:idx])
 
-        return stack_items
+                    if not raw:
+                        value = cls.decode(value)
+
+                    found[wanted[keys]] = value
+
+                    if len(found) == len(wanted):
+                        return None
+
+        if wanted:
+            scan_dict(0, ())
+
+        return found
 
     @classmethod
-    def read_string(cls, string: Union[str, bytes], *, byte_keys: Set[str] = None) -> TypeEncodable:
+    def _skip(cls, encoded: bytes, idx: int) -> int:
+        # Returns an index right after an item starting at the given index.
+        # Checks overall structure only, no values are created.
+        accelerated = cls._accelerated
+
+        if accelerated is not None:
+            return accelerated.skip(encoded, idx)
+
+        size = len(encoded)
+        depth = 0
+
+        while True:
+
+            if idx >= size:
+                raise BencodeDecodingError('Unexpected end of data: unterminated item.', offset=idx)
+
+            char = encoded[idx]
+
+            if char == _CHAR_DICT or char == _CHAR_LIST:
+                depth += 1
+                idx += 1
+
+            elif char == _CHAR_INT:
+                end = encoded.find(b'e', idx)
+
+                if end == -1:
+                    raise BencodeDecodingError('Unexpected end of data: unterminated integer.', offset=idx)
+
+                idx = end + 1
+
+            elif 48 <= char <= 57:
+                colon = encoded.find(b':', idx)
+
+                if colon == -1:
+                    raise BencodeDecodingError('Unexpected end of data: unterminated string length.', offset=idx)
+
+                raw = encoded[idx:colon]
+
+                if not raw.isdigit():
+                    raise BencodeDecodingError(
+                        f'Unable to interpret `{raw.decode(errors="replace")}` as a number.', offset=idx)
+
+                string_start = idx
+                idx = colon + 1 + int(raw)
+
+                if idx > size:
+                    raise BencodeDecodingError(
+                        f'Unexpected end of data: string of {int(raw)} bytes is truncated.', offset=string_start)
+
+            elif char == _CHAR_END and depth:
+                depth -= 1
+                idx += 1
+
+            else:
+                raise BencodeDecodingError(f'Unable to interpret `{chr(char)}` char.', offset=idx)
+
+            if not depth:
+                return idx
+
+    @classmethod
+    def read_string(
+            cls,
+            string: Union[str, bytes],
+            *,
+            byte_keys: Set[str] = None,
+            text_keys: Set[str] = None,
+            raw_keys: Set[str] = None,
+            limits: DecodeLimits = None,
+            strict: bool = False,
+            intern: bool = False,
+            list_factories: Dict[str, Callable[[], MutableSequence]] = None
+    ) -> TypeEncodable:
         """Decodes a given bencoded string or bytestring.
 
         Returns decoded structure(s).
@@ -189,14 +697,40 @@ class Bencode:
         :param byte_keys: Keys values for which should be treated
             as bytes (as opposed to UTF-8 strings).
 
+        :param text_keys: Keys values for which should be decoded into strings.
+            All other strings are left as bytes. See .decode().
+
+        :param raw_keys: Keys values for which should be left as bencoded data. See .decode().
+
+        :param limits: Resource limits to apply while decoding.
+
+        :param strict: Require data to be in canonical form.
+
+        :param intern: Share a single object between equal keys and strings in lists. See .decode().
+
+        :param list_factories: Containers to collect items of lists under the given keys into. See .decode().
+
         """
         if not isinstance(string, (bytes, bytearray)):
             string = string.encode()
 
-        return cls.decode(string, byte_keys=byte_keys)
+        return cls.decode(
+            string, byte_keys=byte_keys, text_keys=text_keys, raw_keys=raw_keys, limits=limits, strict=strict,
+            intern=intern, list_factories=list_factories)
 
     @classmethod
-    def read_file(cls, filepath: Union[str, Path], *, byte_keys: Set[str] = None) -> TypeEncodable:
+    def read_file(
+            cls,
+            filepath: Union[str, Path],
+            *,
+            byte_keys: Set[str] = None,
+            text_keys: Set[str] = None,
+            raw_keys: Set[str] = None,
+            limits: DecodeLimits = None,
+            strict: bool = False,
+            intern: bool = False,
+            list_factories: Dict[str, Callable[[], MutableSequence]] = None
+    ) -> TypeEncodable:
         """Decodes bencoded data of a given file.
 
         Returns decoded structure(s).
@@ -206,8 +740,47 @@ class Bencode:
         :param byte_keys: Keys values for which should be treated
             as bytes (as opposed to UTF-8 strings).
 
+        :param text_keys: Keys values for which should be decoded into strings.
+            All other strings are left as bytes. See .decode().
+
+        :param raw_keys: Keys values for which should be left as bencoded data. See .decode().
+
+        :param limits: Resource limits to apply while decoding.
+
+        :param strict: Require data to be in canonical form.
+
+        :param intern: Share a single object between equal keys and strings in lists. See .decode().
+
+        :param list_factories: Containers to collect items of lists under the given keys into. See .decode().
+
         """
-        with open(str(filepath), mode='rb') as f:
+        filepath = str(filepath)
+        max_size = limits and limits.max_size
+
+        if max_size is not None and getsize(filepath) > max_size:
+            # Do not even try to read.
+            raise BencodeDecodingError(f'File size exceeds the limit of {max_size} bytes.')
+
+        with open(filepath, mode='rb') as f:
             contents = f.read()
 
-        return cls.decode(contents, byte_keys=byte_keys)
+        if metrics.enabled:
+            metrics.FILES_PARSED.inc()
+
+        return cls.decode(
+            contents, byte_keys=byte_keys, text_keys=text_keys, raw_keys=raw_keys, limits=limits, strict=strict,
+            intern=intern, list_factories=list_factories)
+
+
+def _set_env_backend():
+    # Sets backend requested by the environment variable. Compiled extension is optional
+    # and may be not built, so an import must not fail because of that.
+    try:
+        Bencode.set_backend(environ.get(BACKEND_ENV_VAR, ''))
+
+    except BencodeError as e:
+        warn(f'{e} Using pure-Python backend instead (see {BACKEND_ENV_VAR}).', RuntimeWarning)
+        Bencode.set_backend('python')
+
+
+_set_env_backend()
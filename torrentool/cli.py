@@ -1,19 +1,97 @@
-from os import path, getcwd
+from collections import OrderedDict
+from os import path, getcwd, stat
+from typing import TYPE_CHECKING, Iterator, Optional, Tuple
 
 import click
 
 from . import VERSION
-from .api import Torrent
-from .exceptions import RemoteUploadError, RemoteDownloadError
-from .utils import humanize_filesize, upload_to_cache_server, get_open_trackers_from_remote, \
-    get_open_trackers_from_local
+
+if TYPE_CHECKING:  # pragma: nocover
+    from pathlib import Path
+    from .api import Torrent
+
+# Modules are imported by commands which need them to keep startup fast.
+
+_torrents_cache: Optional[OrderedDict] = None
+"""Parsed torrents by (path, mtime, size). Enabled in daemon mode."""
+
+TORRENTS_CACHE_SIZE = 1024
+"""Maximum number of parsed torrents kept in daemon mode."""
+
+
+def _read_torrent(filepath: str):
+    # Reads a torrent which is not changed by a command, from cache in daemon mode.
+    from .api import Torrent
+
+    cache = _torrents_cache
+
+    if cache is None:
+        return Torrent.from_file(filepath)
+
+    file_stat = stat(filepath)
+    key = (path.abspath(filepath), file_stat.st_mtime_ns, file_stat.st_size)
+    torrent = cache.get(key)
+
+    if torrent is None:
+        torrent = cache[key] = Torrent.from_file(filepath)
+
+        if len(cache) > TORRENTS_CACHE_SIZE:
+            cache.popitem(last=False)
+
+    else:
+        cache.move_to_end(key)
+
+    return torrent
+
+
+def _get_io_policy(block_size: Optional[int], rate_limit: int, drop_cache: bool, readahead: int):
+    from .api import IOPolicy
+
+    io_policy = IOPolicy(rate_limit=rate_limit, drop_cache=drop_cache, readahead=readahead)
+
+    if block_size:
+        io_policy = io_policy._replace(block_size=block_size)
+
+    return io_policy
 
 
 @click.group()
 @click.version_option(version='.'.join(map(str, VERSION)))
-def start():
+@click.option('--profile', default=None, type=click.Path(dir_okay=False), help='Profile a command and dump stats into a file. Summary is printed out.')
+@click.option('--trace_memory', default=False, is_flag=True, help='Trace memory allocations of a command. Summary is printed out.')
+@click.option('--metrics_port', default=None, type=click.IntRange(min=0, max=65535), help='Expose metrics over HTTP on localhost port.')
+@click.option('--metrics_file', default=None, type=click.Path(dir_okay=False), help='Write metrics into a file periodically.')
+@click.pass_context
+def start(ctx, profile, trace_memory, metrics_port, metrics_file):
     """Torrentool command line utilities."""
 
+    if metrics_port is not None or metrics_file:
+        from . import metrics
+
+        metrics.enable()
+
+        if metrics_port is not None:
+            ctx.call_on_close(metrics.serve(port=metrics_port).shutdown)
+
+        if metrics_file:
+            exporter = metrics.TextfileExporter(metrics_file)
+            exporter.start()
+            ctx.call_on_close(exporter.stop)
+
+    if profile or trace_memory:
+        from .profiling import Profiler
+
+        profiler = Profiler(stats_path=profile, trace_memory=trace_memory)
+
+        def finish():
+            profiler.stop()
+
+            for line in profiler.get_summary():
+                click.secho(line, fg='magenta', err=True)
+
+        profiler.start()
+        ctx.call_on_close(finish)
+
 
 @start.group()
 def torrent():
@@ -25,14 +103,17 @@ def torrent():
 def info(torrent_path):
     """Print out information from .torrent file."""
 
-    my_torrent = Torrent.from_file(torrent_path)
+    from .utils import humanize_filesize
+
+    my_torrent = _read_torrent(torrent_path)
 
     size = my_torrent.total_size
 
     click.secho(f'Name: {my_torrent.name}', fg='blue')
     click.secho('Files:')
     for file_tuple in my_torrent.files:
-        click.secho(file_tuple.name)
+        if not file_tuple.is_padding:
+            click.secho(file_tuple.name)
 
     click.secho(f'Hash: {my_torrent.info_hash}', fg='blue')
     click.secho(f'Size: {humanize_filesize(size)} ({size})', fg='blue')
@@ -40,24 +121,81 @@ def info(torrent_path):
 
 
 @torrent.command()
-@click.argument('source', type=click.Path(exists=True, writable=False))
+@click.argument('source', type=click.Path(exists=True, writable=False, allow_dash=True))
 @click.option('--dest', default=getcwd, type=click.Path(file_okay=False), help='Destination path to put .torrent file into. Default: current directory.')
 @click.option('--tracker', default=None, help='Tracker announce URL (multiple comma-separated values supported).')
 @click.option('--open_trackers', default=False, is_flag=True, help='Add open trackers announce URLs.')
 @click.option('--comment', default=None, help='Arbitrary comment.')
 @click.option('--cache', default=False, is_flag=True, help='Upload file to torrent cache services.')
-def create(source, dest, tracker, open_trackers, comment, cache):
-    """Create torrent file from a single file or a directory."""
+@click.option('--resume', default=False, is_flag=True, help='Store hashing progress to resume if interrupted.')
+@click.option('--block_size', default=None, type=click.IntRange(min=1), help='Bytes to read at once. Default: 1 MiB.')
+@click.option('--rate_limit', default=0, type=click.IntRange(min=0), help='Max bytes to read per second. Default: no limit.')
+@click.option('--drop_cache', default=False, is_flag=True, help='Do not pollute page cache with data read.')
+@click.option('--readahead', default=0, type=click.IntRange(min=0), help='Bytes ahead of the current position to ask OS to prefetch. Default: OS decides.')
+@click.option('--padding', default=False, is_flag=True, help='Align files to pieces boundaries with padding files.')
+@click.option('--workers', default=1, type=click.IntRange(min=1), help='Threads to hash aligned files (or shards) in parallel.')
+@click.option('--readers_per_device', default=None, type=click.IntRange(min=1), help='Max files read at once from the same disk by workers. Default: no limit.')
+@click.option('--archive', default=False, is_flag=True, help='Create from tar or zip archive contents without extraction.')
+@click.option('--name', default=None, help='Torrent name. Default: SOURCE name. Required to create from stdin (SOURCE is -).')
+@click.option('--tee', default=None, type=click.File('wb'), help='File to store data read from stdin into.')
+@click.option('--shard_size', default=None, type=click.IntRange(min=1), help='Split directory into torrents of at most this many bytes each.')
+@click.option('--shard_files', default=None, type=click.IntRange(min=1), help='Split directory into torrents of at most this many files each.')
+def create(
+    source, dest, tracker, open_trackers, comment, cache, resume, block_size, rate_limit, drop_cache, readahead,
+    padding, workers, readers_per_device, archive, name, tee, shard_size, shard_files
+):
+    """Create torrent file from a single file, a directory or stdin (-)."""
+
+    from .api import DeviceSlots, Torrent
+    from .exceptions import RemoteUploadError, RemoteDownloadError
+    from .utils import upload_to_cache_server, get_open_trackers_from_remote, get_open_trackers_from_local
+
+    from_stdin = source == '-'
+
+    sharded = bool(shard_size or shard_files)
+
+    if from_stdin and not name:
+        raise click.UsageError('--name is required to create torrent from stdin.')
 
-    source_title = path.basename(source).replace('.', '_').replace(' ', '_')
-    dest = f'{path.join(dest, source_title)}.torrent'
+    if tee and not from_stdin:
+        raise click.UsageError('--tee requires stdin source')
 
-    click.secho(f'Creating torrent from {source} ...')
+    if sharded and (from_stdin or archive or resume or padding or not path.isdir(source)):
+        raise click.UsageError('Only a directory can be split into shards (not compatible with --archive, --resume, --padding).')
 
-    my_torrent = Torrent.create_from(source)
+    source_title = path.basename(name or source).replace('.', '_').replace(' ', '_')
+    dest_base = path.join(dest, source_title)
+    dest = f'{dest_base}.torrent'
 
-    if comment:
-        my_torrent.comment = comment
+    device_slots = DeviceSlots(readers_per_device) if readers_per_device else None
+
+    click.secho(f'Creating torrent from {"stdin" if from_stdin else source} ...')
+
+    if from_stdin:
+        my_torrents = [Torrent.create_from_stream(click.get_binary_stream('stdin'), name, tee=tee)]
+
+    elif archive:
+        my_torrents = [Torrent.create_from_archive(source)]
+
+    elif sharded:
+        my_torrents = Torrent.create_sharded(
+            source,
+            max_size=shard_size,
+            max_files=shard_files,
+            io_policy=_get_io_policy(block_size, rate_limit, drop_cache, readahead),
+            workers=workers,
+            device_slots=device_slots,
+        )
+
+    else:
+        my_torrents = [Torrent.create_from(
+            source,
+            checkpoint=f'{dest}.checkpoint' if resume else None,
+            io_policy=_get_io_policy(block_size, rate_limit, drop_cache, readahead),
+            padding=padding,
+            workers=workers,
+            device_slots=device_slots,
+        )]
 
     urls = []
 
@@ -72,22 +210,301 @@ def create(source, dest, tracker, open_trackers, comment, cache):
             click.secho('Failed. Using built-in open tracker list.', fg='red', err=True)
             urls.extend(get_open_trackers_from_local())
 
-    if urls:
-        my_torrent.announce_urls = urls
+    for idx, my_torrent in enumerate(my_torrents, 1):
+        if name:
+            my_torrent.name = name
+
+        if comment:
+            my_torrent.comment = comment
+
+        if urls:
+            my_torrent.announce_urls = urls
+
+        if sharded:
+            dest = f'{dest_base}.{idx:03d}.torrent'
+
+        my_torrent.to_file(dest)
+
+        click.secho(f'Torrent file created: {dest}', fg='green')
+        click.secho(f'Torrent info hash: {my_torrent.info_hash}', fg='blue')
+
+        if cache:
+            click.secho('Uploading to cache service ...')
+            try:
+                result = upload_to_cache_server(dest)
+                click.secho(f'Cached torrent URL: {result}', fg='yellow')
+
+            except RemoteUploadError as e:
+                click.secho(f'Failed: {e}', fg='red', err=True)
+
+    if sharded:
+        from .shards import write_manifest
+
+        manifest = f'{dest_base}.manifest'
+        write_manifest(my_torrents, manifest)
+
+        click.secho(f'Shards magnet links ({len(my_torrents)}) are listed in: {manifest}', fg='blue')
+
+
+@torrent.command()
+@click.argument('torrent_path', type=click.Path(exists=True, writable=False, dir_okay=False))
+@click.argument('data_path', type=click.Path(exists=True, writable=False))
+@click.option('--block_size', default=None, type=click.IntRange(min=1), help='Bytes to read at once. Default: 1 MiB.')
+@click.option('--rate_limit', default=0, type=click.IntRange(min=0), help='Max bytes to read per second. Default: no limit.')
+@click.option('--drop_cache', default=False, is_flag=True, help='Do not pollute page cache with data read.')
+@click.option('--readahead', default=0, type=click.IntRange(min=0), help='Bytes ahead of the current position to ask OS to prefetch. Default: OS decides.')
+def verify(torrent_path, data_path, block_size, rate_limit, drop_cache, readahead):
+    """Verify torrent data from a file or a directory against .torrent file."""
+
+    my_torrent = _read_torrent(torrent_path)
+
+    click.secho(f'Verifying {data_path} ...')
+
+    invalid = my_torrent.verify(data_path, io_policy=_get_io_policy(block_size, rate_limit, drop_cache, readahead))
+
+    if invalid:
+        click.secho(f'Invalid pieces: {len(invalid)} of {len(my_torrent.pieces)}', fg='red', err=True)
+        raise click.exceptions.Exit(1)
+
+    click.secho('Data is valid.', fg='green')
 
-    my_torrent.to_file(dest)
 
-    click.secho(f'Torrent file created: {dest}', fg='green')
-    click.secho(f'Torrent info hash: {my_torrent.info_hash}', fg='blue')
+def _edit_torrent(filepath: str, changes: dict) -> Optional[str]:
+    # Applies changes to a torrent file keeping info dictionary and other fields intact
+    # (strings are not decoded, so non UTF-8 ones are written back as is).
+    # Returns an error description if the file is not edited.
+    from .api import Torrent
+
+    try:
+        my_torrent = Torrent.from_file(filepath, raw_info=True, lazy_text=True)
+
+        for attr, value in changes.items():
+            setattr(my_torrent, attr, value)
+
+        my_torrent.to_file()
+
+    except Exception as e:
+        # Also malformed structures: reported per file not to stop a bulk run.
+        return f'{e}' or type(e).__name__
+
+    return None
+
+
+@torrent.command()
+@click.argument('torrents_path', type=click.Path(exists=True))
+@click.option('--tracker', default=None, help='Tracker announce URLs to set (comma-separated). Empty to clear.')
+@click.option('--comment', default=None, help='Comment to set. Empty to clear.')
+@click.option('--webseed', default=None, help='Webseed URLs to set (comma-separated). Empty to remove.')
+@click.option('--workers', default=None, type=click.IntRange(min=1), help='Processes to edit files. Default: number of CPUs.')
+def edit(torrents_path, tracker, comment, webseed, workers):
+    """Edit .torrent file or files from a directory in place (info hash is kept)."""
 
-    if cache:
-        click.secho('Uploading to cache service ...')
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+    from pathlib import Path
+
+    changes = {}
+
+    if tracker is not None:
+        changes['announce_urls'] = tracker.split(',') if tracker else []
+
+    if comment is not None:
+        changes['comment'] = comment
+
+    if webseed is not None:
+        changes['webseeds'] = webseed.split(',') if webseed else None
+
+    if not changes:
+        raise click.UsageError('Nothing to change.')
+
+    torrents_path = Path(torrents_path)
+    filepaths = [str(torrents_path)] if torrents_path.is_file() else [
+        str(filepath) for filepath in sorted(torrents_path.rglob('*.torrent'))]
+
+    failed = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for filepath, error in zip(
+            filepaths, executor.map(partial(_edit_torrent, changes=changes), filepaths, chunksize=64)
+        ):
+            if error is not None:
+                failed += 1
+                click.secho(f'Failed {filepath}: {error}', fg='red', err=True)
+
+    click.secho(f'Torrents edited: {len(filepaths) - failed}', fg='green')
+
+    if failed:
+        click.secho(f'Torrents failed: {failed}', fg='red', err=True)
+        raise click.exceptions.Exit(1)
+
+
+def _read_torrents(torrents_path: str) -> Iterator[Tuple['Path', 'Torrent']]:
+    # Yields (filepath, torrent) for .torrent files of a directory. Files failed to be read are reported and skipped.
+    from pathlib import Path
+    from .api import Torrent
+    from .exceptions import TorrentoolException
+
+    for filepath in sorted(Path(torrents_path).rglob('*.torrent')):
+        try:
+            my_torrent = Torrent.from_file(filepath)
+
+        except (OSError, TorrentoolException) as e:
+            click.secho(f'Skipped {filepath}: {e}', fg='red', err=True)
+            continue
+
+        yield filepath, my_torrent
+
+
+@torrent.command()
+@click.argument('torrents_path', type=click.Path(exists=True, writable=False, file_okay=False))
+@click.option('--index', default=':memory:', type=click.Path(dir_okay=False), help='Index file path. Default: in-memory index.')
+def dupes(torrents_path, index):
+    """Index .torrent files from a directory and print out those sharing content."""
+
+    from .dedup import DuplicatesIndex
+
+    with DuplicatesIndex(index) as dupes_index:
+        click.secho(f'Indexing torrents from {torrents_path} ...')
+
+        added = dupes_index.add_many(my_torrent for _, my_torrent in _read_torrents(torrents_path))
+
+        click.secho(f'Torrents indexed: {added}', fg='blue')
+
+        for match in dupes_index.get_duplicates():
+            click.secho(
+                f'{match.info_hash} {match.kind} {match.other_hash} '
+                f'(files: {match.shared_files}, pieces: {match.shared_pieces})', fg='yellow')
+
+
+@torrent.command()
+@click.argument('torrents_path', type=click.Path(exists=True, writable=False, file_okay=False))
+@click.argument('data_path', type=click.Path(exists=True, writable=False, file_okay=False))
+@click.option('--link', default=None, type=click.Path(file_okay=False), help='Directory to create torrents files layout in.')
+@click.option('--symlinks', default=False, is_flag=True, help='Create symbolic links instead of hard links.')
+def crossseed(torrents_path, data_path, link, symlinks):
+    """Find .torrent files from a directory which can be seeded from local data."""
+
+    from .crossseed import CrossSeedMatcher, make_links
+    from .exceptions import TorrentError
+
+    click.secho(f'Indexing files from {data_path} ...')
+
+    matcher = CrossSeedMatcher(data_path)
+
+    for filepath, my_torrent in _read_torrents(torrents_path):
         try:
-            result = upload_to_cache_server(dest)
-            click.secho(f'Cached torrent URL: {result}', fg='yellow')
+            match = matcher.match(my_torrent)
+
+        except TorrentError as e:
+            click.secho(f'Skipped {filepath}: {e}', fg='red', err=True)
+            continue
+
+        if match is None:
+            continue
+
+        click.secho(f'{match.info_hash} {match.name}', fg='blue')
+
+        for source, target, verified in match.links:
+            click.secho(f'  {source} -> {target}', fg='green' if verified else 'yellow')
+
+        if link:
+            try:
+                make_links(match, link, symlinks=symlinks)
+
+            except TorrentError as e:
+                click.secho(f'  Skipped: {e}', fg='red', err=True)
+
+
+@start.command()
+@click.argument('torrent_paths', nargs=-1, required=True, type=click.Path(exists=True, writable=False, dir_okay=False))
+@click.option('--data', default=getcwd, type=click.Path(exists=True, file_okay=False), help='Directory with torrents data. Default: current directory.')
+@click.option('--host', default='127.0.0.1', help='Host to listen on.')
+@click.option('--port', default=8080, type=int, help='Port to listen on.')
+@click.option('--max_requests', default=100, type=click.IntRange(min=1), help='Max requests per connection.')
+@click.option('--timeout', default=15.0, type=float, help='Seconds to wait for a request on idle connection or for a client to receive data.')
+def serve(torrent_paths, data, host, port, max_requests, timeout):
+    """Serve torrents data over HTTP for webseeding (BEP 19)."""
+
+    from .api import Torrent
+    from .exceptions import TorrentError
+    from .webseed import WebseedServer
+
+    server = WebseedServer(max_requests=max_requests, timeout=timeout)
+
+    for torrent_path in torrent_paths:
+        try:
+            server.add(Torrent.from_file(torrent_path), data)
+
+        except TorrentError as e:
+            click.secho(f'Skipped {torrent_path}: {e}', fg='red', err=True)
+
+    click.secho(f'Webseed URL: http://{host}:{port}/', fg='blue')
+    server.run(host, port)
+
+
+@start.command()
+@click.argument('source', type=click.Path(exists=True, writable=False, file_okay=False))
+@click.option('--dest', default=getcwd, type=click.Path(file_okay=False), help='Destination path to put .torrent files into. Default: current directory.')
+@click.option('--tracker', default=None, help='Tracker announce URL (multiple comma-separated values supported).')
+@click.option('--state', default=None, type=click.Path(dir_okay=False), help='State database file path. Default: .torrentool_watch.sqlite in destination path.')
+@click.option('--settle', default=10.0, type=click.FloatRange(min=0), help='Seconds without writes after which content is considered complete.')
+@click.option('--interval', default=60.0, type=click.FloatRange(min=0.1), help='Seconds between rescans when polling.')
+@click.option('--workers', default=2, type=click.IntRange(min=1), help='Maximum number of torrents created at once.')
+@click.option('--polling', default=False, is_flag=True, help='Poll for changes instead of using inotify.')
+def watch(source, dest, tracker, state, settle, interval, workers, polling):
+    """Watch a directory and create torrents for new or changed entries."""
+
+    from .watch import FolderWatcher
+
+    def on_created(name, torrent):
+        click.secho(f'Torrent created for {name}: {torrent.info_hash}', fg='green')
+
+    def on_failed(name, exc):
+        click.secho(f'Failed to create torrent for {name}: {exc}', fg='red', err=True)
+
+    try:
+        watcher = FolderWatcher(
+            source, dest,
+            state_path=state,
+            trackers=tracker.split(',') if tracker else None,
+            settle=settle,
+            interval=interval,
+            workers=workers,
+            inotify=not polling,
+            on_created=on_created,
+            on_failed=on_failed,
+        )
+
+    except ValueError as e:
+        raise click.UsageError(str(e))
+
+    with watcher:
+        click.secho(f'Watching {source} ({"polling" if watcher.is_polling else "inotify"}) ...', fg='blue')
+
+        try:
+            watcher.run()
+
+        except KeyboardInterrupt:
+            click.secho('Stopping ...')
+
+
+@start.command()
+@click.option('--socket', 'socket_path', required=True, type=click.Path(dir_okay=False), help='Unix socket path to listen on.')
+def daemon(socket_path):
+    """Keep a warm process serving commands on a unix socket.
+
+    Set TORRENTOOL_DAEMON environment variable to the socket path
+    to forward commands to the daemon.
+
+    """
+    global _torrents_cache
+
+    from .daemon import serve
+
+    _torrents_cache = OrderedDict()
 
-        except RemoteUploadError as e:
-            click.secho(f'Failed: {e}', fg='red', err=True)
+    click.secho(f'Serving commands on {socket_path}', fg='blue')
+    serve(socket_path, start)
 
 
 def main():
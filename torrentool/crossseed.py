@@ -0,0 +1,219 @@
+from collections import defaultdict
+from hashlib import sha1
+from os import link, makedirs, path, scandir, symlink
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from .exceptions import TorrentError
+from .hashing import read_file
+from .torrent import Torrent
+from .utils import get_safe_path
+
+
+class CrossSeedLink(NamedTuple):
+    """Maps a local file to a file in torrent."""
+
+    source: str
+    """Local file path."""
+
+    target: str
+    """File path within torrent (see TorrentFile.name)."""
+
+    verified: bool
+    """Whether the contents is confirmed by hashing.
+    Files not covering at least one whole piece are matched by size only.
+
+    """
+
+
+class CrossSeedMatch(NamedTuple):
+    """Represents a torrent which can be seeded from local files."""
+
+    info_hash: str
+    name: str
+    links: List[CrossSeedLink]
+
+
+def walk_sizes(data_path: Union[str, Path]) -> Dict[int, List[str]]:
+    """Returns a dictionary of local file paths indexed by file size.
+
+    :param data_path: Directory to scan recursively.
+
+    """
+    sizes = defaultdict(list)
+    directories = [str(data_path)]
+
+    while directories:
+        with scandir(directories.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append(entry.path)
+
+                elif entry.is_file(follow_symlinks=False):
+                    sizes[entry.stat(follow_symlinks=False).st_size].append(entry.path)
+
+    return sizes
+
+
+class CrossSeedMatcher:
+    """Finds torrents which can be seeded from existing local files,
+    even if these are renamed or laid out differently.
+
+    Candidates are shortlisted by file sizes and confirmed by hashing
+    a few sample pieces lying entirely within a file.
+
+    .. code-block:: python
+
+        matcher = CrossSeedMatcher('/srv/data')
+
+        for match in matcher.match_many(torrents):
+            make_links(match, '/srv/seeding')
+
+    """
+    def __init__(self, data_path: Union[str, Path], *, samples: int = 2):
+        """
+        :param data_path: Directory with local files.
+
+        :param samples: Number of pieces to hash to confirm a candidate file.
+
+        """
+        self.samples = samples
+        self._sizes = walk_sizes(data_path)
+        self._digests: Dict[Tuple[str, int, int], bytes] = {}
+
+    def match(self, torrent: Torrent) -> Optional[CrossSeedMatch]:
+        """Returns a match if all torrent files are found locally.
+
+        TorrentError is raised for torrents without a valid piece length.
+
+        :param torrent:
+
+        """
+        sizes = self._sizes
+        files = [file for file in torrent.files if file.length and not file.is_padding]
+
+        if not files or any(file.length not in sizes for file in files):
+            return None
+
+        piece_length = torrent.piece_length
+
+        if not isinstance(piece_length, int) or piece_length <= 0:
+            raise TorrentError(f'Invalid piece length in torrent: {piece_length}')
+
+        pieces = torrent.pieces
+        links = []
+        used = set()  # Local file is not to be linked to several files of a torrent.
+        offset = 0
+
+        for file in torrent.files:
+            start, end = offset, offset + file.length
+            offset = end
+
+            if not file.length or file.is_padding:
+                continue
+
+            candidates = [fpath for fpath in sizes[file.length] if fpath not in used]
+
+            if not candidates:
+                return None
+
+            piece_first = -(-start // piece_length)  # Ceil division.
+            piece_last = end // piece_length  # Exclusive.
+            samples = self._get_samples(piece_first, piece_last)
+
+            if not samples:
+                # Nothing to hash, prefer a file with the same name.
+                basename = path.basename(file.name)
+                source = next((fpath for fpath in candidates if path.basename(fpath) == basename), candidates[0])
+                links.append(CrossSeedLink(source=source, target=file.name, verified=False))
+                used.add(source)
+                continue
+
+            for candidate in candidates:
+                if all(
+                    self._get_digest(candidate, idx * piece_length - start, piece_length) == pieces[idx]
+                    for idx in samples
+                ):
+                    links.append(CrossSeedLink(source=candidate, target=file.name, verified=True))
+                    used.add(candidate)
+                    break
+
+            else:
+                return None
+
+        return CrossSeedMatch(info_hash=torrent.info_hash, name=torrent.name, links=links)
+
+    def match_many(self, torrents: Iterable[Torrent]) -> Iterator[CrossSeedMatch]:
+        """Yields matches for torrents which can be seeded from local files.
+
+        :param torrents:
+
+        """
+        for torrent in torrents:
+            match = self.match(torrent)
+
+            if match:
+                yield match
+
+    def _get_samples(self, piece_first: int, piece_last: int) -> List[int]:
+        count = piece_last - piece_first
+
+        if count <= 0:
+            return []
+
+        samples = self.samples
+
+        if count <= samples:
+            return list(range(piece_first, piece_last))
+
+        # Spread samples evenly, always including the first and the last pieces.
+        step = (count - 1) / max(samples - 1, 1)
+        return sorted({piece_first + round(step * num) for num in range(samples)})
+
+    def _get_digest(self, filepath: str, offset: int, length: int) -> bytes:
+        # Local files are often shared by several torrents, so digests are memoized.
+        key = (filepath, offset, length)
+        digest = self._digests.get(key)
+
+        if digest is None:
+            hasher = sha1()
+
+            for chunk in read_file(filepath, offset=offset, length=length):
+                hasher.update(chunk)
+
+            self._digests[key] = digest = hasher.digest()
+
+        return digest
+
+
+def make_links(match: CrossSeedMatch, dest_path: Union[str, Path], *, symlinks: bool = False) -> List[str]:
+    """Creates torrent files layout under the given directory linking
+    to local files. Returns a list of created links paths.
+
+    Existing files are left untouched. TorrentError is raised for unsafe
+    file paths (see get_safe_path()) before any link is created.
+
+    :param match:
+    :param dest_path: Directory to create torrent files layout in.
+    :param symlinks: Create symbolic links instead of hard links.
+
+    """
+    created = []
+    dest_path = str(dest_path)
+    links = [(source, get_safe_path(dest_path, target)) for source, target, _ in match.links]
+
+    for source, target in links:
+        if path.lexists(target):
+            continue
+
+        makedirs(path.dirname(target), exist_ok=True)
+
+        if symlinks:
+            symlink(path.abspath(source), target)
+
+        else:
+            link(source, target)
+
+        created.append(target)
+
+    return created
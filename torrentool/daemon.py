@@ -0,0 +1,253 @@
+"""
+Keeps a warm CLI process (modules imported, parsed torrents cached)
+listening on a unix socket, and forwards CLI commands to it.
+
+Modules are imported on demand to keep the thin client fast.
+
+"""
+import os
+import sys
+from typing import Callable, List, Optional
+
+SOCKET_ENV_VAR = 'TORRENTOOL_DAEMON'
+"""Environment variable with daemon socket path. If set, CLI commands are forwarded to the daemon."""
+
+MAX_REQUEST_SIZE = 1048576
+"""Maximum size of a forwarded command data in bytes."""
+
+LOCAL_COMMANDS = {'daemon', 'serve', 'watch'}
+"""Names of long-running commands which are run locally, since the daemon runs commands one at a time."""
+
+
+def _recv_all(conn, limit: int = None) -> bytes:
+    chunks = []
+    size = 0
+
+    while True:
+        chunk = conn.recv(65536)
+
+        if not chunk:
+            break
+
+        size += len(chunk)
+
+        if limit is not None and size > limit:
+            raise ValueError(f'Data size exceeds the limit of {limit} bytes.')
+
+        chunks.append(chunk)
+
+    return b''.join(chunks)
+
+
+def forward(socket_path: str, args: List[str]) -> Optional[int]:
+    """Forwards CLI command to the daemon and prints out its output.
+    Returns command exit code or None if the command is to be run locally:
+    the daemon is not available (or failed to respond), the command reads from stdin
+    which is not forwarded, or the command is long-running (see LOCAL_COMMANDS).
+
+    :param socket_path:
+    :param args: Command line arguments (without program name).
+
+    """
+    import json
+    import socket
+
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    try:
+        conn.connect(socket_path)
+
+    except OSError:
+        conn.close()
+        return None
+
+    try:
+        with conn:
+            conn.sendall(json.dumps({
+                'args': args,
+                'cwd': os.getcwd(),
+                'color': sys.stdout.isatty(),
+            }).encode())
+            conn.shutdown(socket.SHUT_WR)
+
+            response = json.loads(_recv_all(conn))
+
+        if response.get('local'):
+            return None
+
+        stdout, stderr, code = response['stdout'], response['stderr'], response['code']
+
+    except (ValueError, OSError, KeyError, AttributeError):
+        # E.g. the daemon has died before responding in full.
+        return None
+
+    sys.stdout.write(stdout)
+    sys.stderr.write(stderr)
+
+    return code
+
+
+def _is_local(command: Callable, args: List[str]) -> bool:
+    # Whether a command is to be run locally: it's long-running (see LOCAL_COMMANDS)
+    # or a positional argument of a command (or of its subcommands) is `-` (stdin).
+    # Options values are not considered, e.g. for `--tracker -`.
+    import click
+
+    ctx = None
+    name = 'torrentool'
+    args = list(args)
+
+    try:
+        while True:
+            ctx = command.make_context(name, args, parent=ctx, resilient_parsing=True)
+
+            for param in command.params:
+                if isinstance(param, click.Argument):
+                    value = ctx.params.get(param.name)
+
+                    if value == '-' or (isinstance(value, (list, tuple)) and '-' in value):
+                        return True
+
+            if not isinstance(command, click.Group):
+                return False
+
+            # Subcommand name is kept apart from the rest of arguments (not exposed in recent versions).
+            protected = ctx._protected_args if hasattr(ctx, '_protected_args') else ctx.protected_args
+            rest = [*protected, *ctx.args]
+
+            if not rest:
+                return False
+
+            name, command, args = command.resolve_command(ctx, rest)
+
+            if command is None:
+                return False
+
+            if name in LOCAL_COMMANDS:
+                return True
+
+    except click.ClickException:
+        # Left for the command to report.
+        return False
+
+
+def _run(command: Callable, request: dict) -> dict:
+    # Runs a CLI command capturing its output.
+    from contextlib import redirect_stderr, redirect_stdout
+    from io import StringIO
+
+    stdout, stderr = StringIO(), StringIO()
+    code = 0
+
+    cwd = os.getcwd()
+
+    try:
+        os.chdir(request['cwd'])
+
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            command(request['args'], prog_name='torrentool', color=request['color'] or None)
+
+    except SystemExit as e:
+        code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+
+    except Exception as e:
+        stderr.write(f'Error: {e}\n')
+        code = 1
+
+    finally:
+        os.chdir(cwd)
+
+    return {'stdout': stdout.getvalue(), 'stderr': stderr.getvalue(), 'code': code}
+
+
+def _is_valid(request) -> bool:
+    # Whether a request has the expected structure.
+    return (
+        isinstance(request, dict) and
+        isinstance(request.get('args'), list) and all(isinstance(arg, str) for arg in request['args']) and
+        isinstance(request.get('cwd'), str) and
+        isinstance(request.get('color'), bool)
+    )
+
+
+def serve(socket_path: str, command: Callable):
+    """Serves CLI commands on a unix socket one at a time, blocking the current thread.
+
+    Clients wait while a command is run, so long-running commands (see LOCAL_COMMANDS)
+    and commands reading from stdin are answered to be run by clients locally.
+    Other lengthy commands (e.g. creating a torrent for a lot of data) still keep
+    other clients waiting.
+
+    Socket is accessible by the current user only.
+
+    :param socket_path:
+    :param command: Click command (group) to run.
+
+    """
+    import json
+    import socket
+
+    if os.path.exists(socket_path):
+        # Stale socket of a previous run.
+        os.remove(socket_path)
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+
+    umask = os.umask(0o177)
+
+    try:
+        server.bind(socket_path)
+
+    finally:
+        os.umask(umask)
+
+    try:
+        with server:
+            server.listen()
+
+            while True:
+                conn, _ = server.accept()
+
+                with conn:
+                    try:
+                        request = json.loads(_recv_all(conn, MAX_REQUEST_SIZE))
+
+                    except ValueError:
+                        continue
+
+                    if not _is_valid(request):
+                        continue
+
+                    if _is_local(command, request['args']):
+                        response = {'local': True}
+
+                    else:
+                        response = _run(command, request)
+
+                    try:
+                        conn.sendall(json.dumps(response).encode())
+
+                    except OSError:
+                        # Client has gone.
+                        pass
+
+    finally:
+        os.remove(socket_path)
+
+
+def main():
+    """CLI entry point. Forwards commands to the daemon if configured (see SOCKET_ENV_VAR).
+    Commands reading from stdin and long-running ones are run locally.
+
+    """
+    socket_path = os.environ.get(SOCKET_ENV_VAR)
+    args = sys.argv[1:]
+
+    if socket_path and args[:1] != ['daemon']:
+        code = forward(socket_path, args)
+
+        if code is not None:
+            sys.exit(code)
+
+    from .cli import main as cli_main
+    cli_main()
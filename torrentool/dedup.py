@@ -0,0 +1,308 @@
+import sqlite3
+from hashlib import sha1
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Tuple, Union, Iterable
+
+from .torrent import Torrent
+
+
+class DuplicateMatch(NamedTuple):
+    """Represents two torrents sharing content."""
+
+    info_hash: str
+    """Info hash of the torrent sharing content."""
+
+    other_hash: str
+    """Info hash of the torrent content is shared with."""
+
+    kind: str
+    """Relation kind: `same`, `subset` (info_hash content is in other_hash) or `overlap`."""
+
+    shared_files: int
+    """Number of distinct file signatures shared."""
+
+    shared_pieces: int
+    """Number of distinct piece digests shared."""
+
+
+def get_file_signatures(torrent: Torrent) -> List[Tuple[bytes, str]]:
+    """Returns file signatures for the given torrent as a list of tuples (signature, file name).
+
+    Signature is built from file length, its offset alignment within a piece
+    and digests of the pieces lying entirely within the file. Files not
+    covering at least one whole piece are not signed, since their length
+    alone is not enough to tell anything about the contents.
+
+    :param torrent:
+
+    """
+    piece_length = torrent.piece_length
+    pieces = torrent.pieces
+    signatures = []
+
+    if not piece_length:
+        return signatures
+
+    offset = 0
+
+    for file in torrent.files:
+        start, end = offset, offset + file.length
+        offset = end
+
+        piece_first = -(-start // piece_length)  # Ceil division.
+        piece_last = end // piece_length  # Exclusive.
+
+        if piece_first >= piece_last:
+            continue
+
+        signature = sha1(f'{file.length}:{start % piece_length}:{piece_length}:'.encode())
+
+        for digest in pieces[piece_first:piece_last]:
+            signature.update(digest)
+
+        signatures.append((signature.digest(), file.name))
+
+    return signatures
+
+
+class DuplicatesIndex:
+    """On-disk (SQLite) index of piece digests and file signatures
+    allowing to find torrents sharing the same content.
+
+    .. code-block:: python
+
+        with DuplicatesIndex('/var/lib/torrents.idx') as index:
+            for filepath in Path('/var/lib/torrents').glob('*.torrent'):
+                index.add(Torrent.from_file(filepath))
+
+            for match in index.get_duplicates():
+                print(match)
+
+    """
+    def __init__(self, filepath: Union[str, Path] = ':memory:'):
+        """
+        :param filepath: Index database file path. Defaults to in-memory database.
+
+        """
+        self._conn = conn = sqlite3.connect(str(filepath))
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS torrents (
+                id INTEGER PRIMARY KEY,
+                info_hash TEXT UNIQUE NOT NULL,
+                name TEXT,
+                piece_length INTEGER,
+                files INTEGER NOT NULL,
+                pieces INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                signature BLOB NOT NULL,
+                torrent_id INTEGER NOT NULL,
+                name TEXT,
+                PRIMARY KEY (signature, torrent_id)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS pieces (
+                digest BLOB NOT NULL,
+                torrent_id INTEGER NOT NULL,
+                PRIMARY KEY (digest, torrent_id)
+            ) WITHOUT ROWID;
+        ''')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        self.close()
+
+    def commit(self):
+        """Flushes pending changes to disk."""
+        self._conn.commit()
+
+    def close(self):
+        """Closes the index."""
+        self._conn.close()
+
+    def add(self, torrent: Torrent) -> bool:
+        """Adds the given torrent into index.
+        Returns False if the torrent is already indexed.
+
+        Changes are not committed automatically, use .commit()
+        or the index as a context manager.
+
+        :param torrent:
+
+        """
+        conn = self._conn
+        signatures = dict(get_file_signatures(torrent))
+        pieces = set(torrent.pieces)
+
+        cursor = conn.execute(
+            'INSERT OR IGNORE INTO torrents (info_hash, name, piece_length, files, pieces) VALUES (?, ?, ?, ?, ?)',
+            (torrent.info_hash, torrent.name, torrent.piece_length, len(signatures), len(pieces)))
+
+        if not cursor.rowcount:
+            return False
+
+        torrent_id = cursor.lastrowid
+
+        conn.executemany(
+            'INSERT INTO files (signature, torrent_id, name) VALUES (?, ?, ?)',
+            ((signature, torrent_id, name) for signature, name in signatures.items()))
+
+        conn.executemany(
+            'INSERT INTO pieces (digest, torrent_id) VALUES (?, ?)',
+            ((digest, torrent_id) for digest in pieces))
+
+        return True
+
+    def add_many(self, torrents: Iterable[Torrent], *, commit_every: int = 1000) -> int:
+        """Adds torrents into index, periodically committing changes.
+        Returns a number of torrents added.
+
+        :param torrents:
+        :param commit_every: Commit after this number of torrents added.
+
+        """
+        added = 0
+
+        for torrent in torrents:
+            if self.add(torrent):
+                added += 1
+
+                if not added % commit_every:
+                    self.commit()
+
+        self.commit()
+
+        return added
+
+    def get_matches(self, torrent: Torrent, *, max_holders: int = 100) -> List[DuplicateMatch]:
+        """Returns a list of indexed torrents sharing content with the given one.
+        The torrent itself is not required to be in the index.
+
+        :param torrent:
+
+        :param max_holders: Digests and signatures held by more torrents than this
+            (including the given one) are common and are not considered as shared.
+            See .get_duplicates().
+
+        """
+        conn = self._conn
+        info_hash = torrent.info_hash
+        signatures = {signature for signature, _ in get_file_signatures(torrent)}
+        pieces = set(torrent.pieces)
+
+        if conn.execute('SELECT 1 FROM torrents WHERE info_hash = ?', (info_hash,)).fetchone() is None:
+            # Not indexed: the torrent is one more holder.
+            max_holders -= 1
+
+        shared = {}
+        chunk_size = 500  # Keep below SQLite host parameters limit.
+
+        for idx, (table, column, values) in enumerate((
+            ('files', 'signature', list(signatures)),
+            ('pieces', 'digest', list(pieces)),
+        )):
+            for chunk_start in range(0, len(values), chunk_size):
+                chunk = values[chunk_start:chunk_start + chunk_size]
+                query = (
+                    f'SELECT torrent_id, COUNT(*) FROM {table} WHERE {column} IN ('
+                    f'SELECT {column} FROM {table} WHERE {column} IN ({",".join("?" * len(chunk))}) '
+                    f'GROUP BY {column} HAVING COUNT(*) <= ?'
+                    f') GROUP BY torrent_id')
+
+                for torrent_id, count in conn.execute(query, (*chunk, max_holders)):
+                    counts = shared.setdefault(torrent_id, [0, 0])
+                    counts[idx] += count
+
+        matches = []
+
+        for torrent_id, (shared_files, shared_pieces) in shared.items():
+            other_hash, other_files, other_pieces = conn.execute(
+                'SELECT info_hash, files, pieces FROM torrents WHERE id = ?', (torrent_id,)).fetchone()
+
+            if other_hash == info_hash:
+                continue
+
+            matches.append(DuplicateMatch(
+                info_hash=info_hash,
+                other_hash=other_hash,
+                kind=self._get_kind(
+                    (len(signatures), len(pieces)), (other_files, other_pieces), (shared_files, shared_pieces)),
+                shared_files=shared_files,
+                shared_pieces=shared_pieces,
+            ))
+
+        return matches
+
+    def get_duplicates(self, *, max_holders: int = 100) -> Iterator[DuplicateMatch]:
+        """Yields pairs of indexed torrents sharing content.
+
+        Pairs are aggregated by SQLite (in temporary tables) and streamed,
+        so memory usage does not depend on the number of pairs.
+
+        :param max_holders: Digests and signatures held by more torrents than this
+            (e.g. pieces of zeros) are common and are not considered as shared,
+            since pairing all of their holders is quadratic.
+
+        """
+        conn = self._conn
+
+        conn.executescript('''
+            DROP TABLE IF EXISTS temp.shared_keys;
+            DROP TABLE IF EXISTS temp.shared;
+            CREATE TEMP TABLE shared_keys (key BLOB PRIMARY KEY) WITHOUT ROWID;
+            CREATE TEMP TABLE shared (id_a INTEGER NOT NULL, id_b INTEGER NOT NULL, files INTEGER, pieces INTEGER);
+        ''')
+
+        for table, column in (('files', 'signature'), ('pieces', 'digest')):
+            conn.execute('DELETE FROM temp.shared_keys')
+            conn.execute(
+                f'INSERT INTO temp.shared_keys SELECT {column} FROM {table} '
+                f'GROUP BY {column} HAVING COUNT(*) BETWEEN 2 AND ?', (max_holders,))
+
+            conn.execute(
+                f'INSERT INTO temp.shared (id_a, id_b, files, pieces) '
+                f'SELECT a.torrent_id, b.torrent_id, {"COUNT(*), 0" if table == "files" else "0, COUNT(*)"} '
+                f'FROM temp.shared_keys k '
+                f'JOIN {table} a ON a.{column} = k.key '
+                f'JOIN {table} b ON b.{column} = k.key AND a.torrent_id < b.torrent_id '
+                f'GROUP BY a.torrent_id, b.torrent_id')
+
+        rows = conn.execute('''
+            SELECT a.info_hash, a.files, a.pieces, b.info_hash, b.files, b.pieces, s.files, s.pieces
+            FROM (
+                SELECT id_a, id_b, SUM(files) AS files, SUM(pieces) AS pieces
+                FROM temp.shared GROUP BY id_a, id_b
+            ) s
+            JOIN torrents a ON a.id = s.id_a
+            JOIN torrents b ON b.id = s.id_b
+        ''')
+
+        for hash_a, files_a, pieces_a, hash_b, files_b, pieces_b, shared_files, shared_pieces in rows:
+            counts_a, counts_b = (files_a, pieces_a), (files_b, pieces_b)
+            shared_counts = (shared_files, shared_pieces)
+
+            if self._get_kind(counts_b, counts_a, shared_counts) == 'subset':
+                # Always put the smaller one first.
+                hash_a, hash_b, counts_a, counts_b = hash_b, hash_a, counts_b, counts_a
+
+            yield DuplicateMatch(
+                info_hash=hash_a,
+                other_hash=hash_b,
+                kind=self._get_kind(counts_a, counts_b, shared_counts),
+                shared_files=shared_files,
+                shared_pieces=shared_pieces,
+            )
+
+    @staticmethod
+    def _get_kind(counts: Tuple[int, int], other_counts: Tuple[int, int], shared: Tuple[int, int]) -> str:
+        # File signatures are preferred, pieces are used for torrents with small files.
+        idx = 0 if shared[0] else 1
+        count, other_count, shared_count = counts[idx], other_counts[idx], shared[idx]
+
+        if shared_count == count:
+            return 'same' if count == other_count else 'subset'
+
+        return 'overlap'
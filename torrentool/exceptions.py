@@ -10,6 +10,11 @@ class BencodeError(TorrentoolException):
 class BencodeDecodingError(BencodeError):
     """Raised when torrentool is unable to decode bencoded data."""
 
+    def __init__(self, msg: str = '', *, offset: int = None):
+        super().__init__(msg)
+        self.offset = offset
+        """Offset of the offending byte in bencoded data."""
+
 
 class BencodeEncodingError(BencodeError):
     """Raised when torrentool is unable to encode data into bencode."""
@@ -19,6 +24,10 @@ class TorrentError(TorrentoolException):
     """Base exception for Torrent object related errors."""
 
 
+class HashingCancelled(TorrentError):
+    """Raised when hashing is cancelled before completion."""
+
+
 class RemoteUploadError(TorrentoolException):
     """Base class for upload to remotes related issues."""
 
@@ -0,0 +1,125 @@
+from array import array
+from collections.abc import Sequence
+from typing import Any, Dict, Iterable, Iterator, List, Union
+
+
+class FileList(Sequence):
+    """Compact (columnar) storage for torrent `info.files` entries.
+
+    Behaves like a read-only list of dictionaries ({'length': ..., 'path': [...], ...}),
+    which are created on access. Lengths are kept in an array,
+    path components are stored once in a shared table and referenced by offsets.
+
+    Since entries are created on access, changes made to them are not stored.
+    Convert into a list to change entries.
+
+    """
+    def __init__(self, files: Iterable[dict] = ()):
+        """
+        :param files: File entries dictionaries.
+
+        """
+        self._lengths = array('q')
+        self._path_ends = array('q')  # Ends of file path components in ._path_parts.
+        self._path_parts = array('q')  # Indexes of components in ._table.
+        self._table: List[Union[str, bytes]] = []
+        self._table_index: Dict[Union[str, bytes], int] = {}
+        self._extra: Dict[int, dict] = {}  # Other entry keys (e.g. `attr`) by file index.
+        self._irregular: Dict[int, Any] = {}  # Malformed entries kept as is by file index.
+
+        for file in files:
+            self.append(file)
+
+    def append(self, file: dict):
+        """Adds a file entry.
+
+        :param file: File entry dictionary.
+
+        """
+        table = self._table
+        table_index = self._table_index
+        path_parts = self._path_parts
+
+        path = file.get('path') if isinstance(file, dict) else None
+
+        if (
+            not isinstance(path, list) or not isinstance(file.get('length'), int) or
+            not all(isinstance(part, (str, bytes)) for part in path)
+        ):
+            # Malformed entry (e.g. decoded from a broken torrent).
+            self._irregular[len(self._lengths)] = file
+            self._path_ends.append(len(path_parts))
+            self._lengths.append(0)
+            return
+
+        for part in path:
+            part_idx = table_index.get(part)
+
+            if part_idx is None:
+                part_idx = table_index[part] = len(table)
+                table.append(part)
+
+            path_parts.append(part_idx)
+
+        self._path_ends.append(len(path_parts))
+        self._lengths.append(file['length'])
+
+        if len(file) > 2:
+            self._extra[len(self._lengths) - 1] = {
+                key: value for key, value in file.items() if key not in {'length', 'path'}}
+
+    def __setitem__(self, idx, value):
+        raise TypeError('FileList is read-only. Convert it into a list to change entries.')
+
+    def __delitem__(self, idx):
+        raise TypeError('FileList is read-only. Convert it into a list to change entries.')
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def __getitem__(self, idx):
+
+        if isinstance(idx, slice):
+            return [self._get_file(file_idx) for file_idx in range(*idx.indices(len(self)))]
+
+        if idx < 0:
+            idx += len(self)
+
+        if not 0 <= idx < len(self):
+            raise IndexError('FileList index out of range')
+
+        return self._get_file(idx)
+
+    def __iter__(self) -> Iterator[dict]:
+        for idx in range(len(self)):
+            yield self._get_file(idx)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (FileList, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f'FileList({list(self)!r})'
+
+    def _get_file(self, idx: int) -> dict:
+        irregular = self._irregular
+
+        if irregular and idx in irregular:
+            return irregular[idx]
+
+        table = self._table
+        path_ends = self._path_ends
+        start = path_ends[idx - 1] if idx else 0
+
+        file = {
+            'length': self._lengths[idx],
+            'path': [table[part_idx] for part_idx in self._path_parts[start:path_ends[idx]]],
+        }
+
+        extra = self._extra.get(idx)
+
+        if extra:
+            file.update(extra)
+
+        return file
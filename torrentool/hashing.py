@@ -0,0 +1,722 @@
+import errno
+from hashlib import sha1
+from os import replace, fsync, stat, remove, lseek, fstat
+from pathlib import Path
+from time import monotonic, perf_counter, sleep
+from contextlib import contextmanager, nullcontext
+from threading import Event, Lock, Semaphore
+from typing import Callable, Dict, List, Tuple, Union, Optional, Iterator, NamedTuple
+
+from . import metrics
+from .bencode import Bencode
+from .exceptions import HashingCancelled
+
+try:
+    from os import SEEK_DATA, SEEK_HOLE
+
+except ImportError:  # pragma: nocover
+    # Not supported by the platform.
+    SEEK_DATA = SEEK_HOLE = None
+
+try:
+    from os import (
+        posix_fadvise, POSIX_FADV_SEQUENTIAL, POSIX_FADV_NOREUSE, POSIX_FADV_DONTNEED, POSIX_FADV_WILLNEED)
+
+except ImportError:  # pragma: nocover
+    # Not supported by the platform.
+    posix_fadvise = None
+
+BLOCK_SIZE = 1048576  # 1 MiB
+"""Default size of blocks to read files by."""
+
+DIGEST_SIZE = 20
+"""Size of a piece SHA1 digest."""
+
+
+class PieceHasher:
+    """Calculates SHA1 digests of pieces for data fed chunk by chunk."""
+
+    def __init__(self, piece_size: int, *, pieces: bytes = b''):
+        """
+        :param piece_size: Size of a piece in bytes.
+        :param pieces: Digests of pieces already calculated (e.g. to resume hashing).
+
+        """
+        self.piece_size = piece_size
+        self.pieces = bytearray(pieces)
+        self._buffer = bytearray()
+        self._zero_piece = bytes(piece_size)
+        self._zero_digest = sha1(self._zero_piece).digest()
+
+    @property
+    def pieces_count(self) -> int:
+        """Number of pieces hashed so far."""
+        return len(self.pieces) // DIGEST_SIZE
+
+    def update(self, chunk: bytes):
+        """Feeds the next chunk of data.
+
+        :param chunk:
+
+        """
+        piece_size = self.piece_size
+        pieces = self.pieces
+        buffer = self._buffer
+        zero_piece = self._zero_piece
+        zero_digest = self._zero_digest
+        start = 0
+
+        if buffer:
+            start = piece_size - len(buffer)
+            buffer += chunk[:start]
+
+            if len(buffer) < piece_size:
+                return
+
+            # All-zero pieces are detected cheaply by comparison.
+            pieces += zero_digest if buffer == zero_piece else sha1(buffer).digest()
+            buffer.clear()
+
+        # Comparison is only cheap for bytes-like objects (not for memoryview).
+        check_zeros = isinstance(chunk, (bytes, bytearray))
+        view = memoryview(chunk)
+        chunk_size = len(view)
+
+        while chunk_size - start >= piece_size:
+            end = start + piece_size
+
+            if check_zeros and chunk.startswith(zero_piece, start):
+                pieces += zero_digest
+            else:
+                pieces += sha1(view[start:end]).digest()
+
+            start = end
+
+        buffer += view[start:]
+
+    def update_zeros(self, length: int):
+        """Feeds the given number of zero bytes without actually
+        hashing full pieces of zeros (precalculated digest is used).
+
+        :param length:
+
+        """
+        piece_size = self.piece_size
+        buffer = self._buffer
+
+        if buffer:
+            missing = min(piece_size - len(buffer), length)
+            self.update(bytes(missing))
+            length -= missing
+
+        pieces_count, length = divmod(length, piece_size)
+        self.pieces += self._zero_digest * pieces_count
+        self._buffer += bytes(length)
+
+    def finish(self) -> bytes:
+        """Hashes the remaining data (the last piece may be shorter than others)
+        and returns digests of all pieces.
+
+        """
+        buffer = self._buffer
+
+        if buffer:
+            self.pieces += sha1(buffer).digest()
+            buffer.clear()
+
+            if metrics.enabled:
+                metrics.PIECES_HASHED.inc()
+
+        return bytes(self.pieces)
+
+
+class HashingCheckpoint:
+    """Periodically stores hashing progress into a file, so that
+    interrupted hashing could be resumed from the last completed piece.
+
+    Stored progress is only used if files (their paths, sizes and modification times)
+    and piece size are the same.
+
+    The file holds a header describing the source followed by digests of pieces.
+    Header is written once, new digests are appended.
+
+    """
+    def __init__(
+            self,
+            filepath: Union[str, Path],
+            *,
+            files: List[Tuple[str, int]],
+            piece_size: int,
+            interval: float = 30
+    ):
+        """
+        :param filepath: Checkpoint file path.
+        :param files: Files to hash as a list of tuples (filepath or None for zeros, size).
+        :param piece_size: Size of a piece in bytes.
+        :param interval: Store progress no often than this number of seconds.
+
+        """
+        self.filepath = Path(filepath)
+        self.interval = interval
+        self._saved_at = monotonic()
+        self._saved: Optional[int] = None  # Length of digests stored in the file.
+
+        # Header is a bencoded string, so that its length is known before decoding.
+        self._header = Bencode.encode(Bencode.encode({
+            'files': [[f'{fpath or ""}', size, stat(fpath).st_mtime_ns if fpath else 0] for fpath, size in files],
+            'piece length': piece_size,
+        }))
+
+    def load(self) -> bytes:
+        """Returns digests of pieces hashed before, if any."""
+
+        try:
+            with open(self.filepath, 'rb') as f:
+                data = f.read()
+
+        except OSError:
+            return b''
+
+        header = self._header
+
+        if not data.startswith(header):
+            # Broken checkpoint or the source has changed.
+            return b''
+
+        pieces = data[len(header):]
+        # Drop a partial digest of an interrupted write.
+        pieces = pieces[:len(pieces) - len(pieces) % DIGEST_SIZE]
+        self._saved = len(pieces)
+
+        return pieces
+
+    def save(self, pieces: bytes):
+        """Stores digests of pieces hashed so far.
+
+        :param pieces:
+
+        """
+        filepath = self.filepath
+        saved = self._saved
+
+        if saved is not None and len(pieces) >= saved:
+            # Append new digests.
+            try:
+                with open(filepath, 'r+b') as f:
+                    f.seek(len(self._header) + saved)
+                    f.write(pieces[saved:])
+                    f.truncate()
+                    f.flush()
+                    fsync(f.fileno())
+
+            except FileNotFoundError:
+                saved = None
+
+        if saved is None or len(pieces) < saved:
+            filepath_tmp = filepath.with_name(f'{filepath.name}.tmp')
+
+            with open(filepath_tmp, 'wb') as f:
+                f.write(self._header)
+                f.write(pieces)
+                f.flush()
+                fsync(f.fileno())
+
+            replace(filepath_tmp, filepath)
+
+        self._saved = len(pieces)
+        self._saved_at = monotonic()
+
+    def update(self, pieces: bytes):
+        """Stores digests of pieces hashed so far if interval has passed.
+
+        :param pieces:
+
+        """
+        if monotonic() - self._saved_at >= self.interval:
+            self.save(pieces)
+
+    def remove(self):
+        """Removes checkpoint file."""
+        try:
+            remove(self.filepath)
+
+        except FileNotFoundError:
+            pass
+
+
+def get_data_regions(fileno: int, start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """Yields (start, end) tuples for regions with data (not holes)
+    of a sparse file within the given range.
+
+    If the platform or file system is unable to tell where holes are,
+    the whole range is considered to have data.
+
+    :param fileno: File descriptor.
+    :param start:
+    :param end:
+
+    """
+    if SEEK_DATA is None:
+        yield start, end
+        return
+
+    position = start
+
+    while position < end:
+        try:
+            data_start = lseek(fileno, position, SEEK_DATA)
+
+        except OSError as e:
+
+            if e.errno == errno.ENXIO:
+                # No more data till the end of file.
+                return
+
+            yield position, end
+            return
+
+        if data_start >= end:
+            return
+
+        data_end = min(lseek(fileno, data_start, SEEK_HOLE), end)
+
+        yield data_start, data_end
+
+        position = data_end
+
+
+class IOPolicy(NamedTuple):
+    """Hints and limits for reading files data. Allows bulk hashing
+    to coexist with other (e.g. seeding) processes.
+
+    """
+    block_size: int = BLOCK_SIZE
+    """Size of a block to read at once in bytes."""
+
+    sequential: bool = True
+    """Hint OS that data is read sequentially (more aggressive read-ahead)."""
+
+    readahead: int = 0
+    """Number of bytes ahead of the current position to ask OS to prefetch."""
+
+    drop_cache: bool = False
+    """Hint OS that data won't be reused and drop it from page cache after reading.
+    This keeps page cache for hot data of other processes.
+
+    """
+    rate_limit: int = 0
+    """Maximum number of bytes read per second. 0 - no limit."""
+
+    def get_throttle(self) -> Optional['Throttle']:
+        """Returns a throttle to apply the rate limit with, if any."""
+        return Throttle(self.rate_limit) if self.rate_limit else None
+
+
+class Throttle:
+    """Limits data rate by sleeping when the rate is exceeded.
+
+    Thread-safe: may be shared by threads to apply a common limit.
+
+    """
+    def __init__(self, rate: int):
+        """
+        :param rate: Bytes per second.
+
+        """
+        self.rate = rate
+        self._started = monotonic()
+        self._consumed = 0
+        self._lock = Lock()
+
+    def consume(self, size: int):
+        """Registers data consumption, sleeps if needed.
+
+        :param size: Bytes consumed.
+
+        """
+        with self._lock:
+            self._consumed += size
+            delay = self._consumed / self.rate - (monotonic() - self._started)
+
+        if delay > 0:
+            sleep(delay)
+
+
+class DeviceSlots:
+    """Limits the number of files read at once from the same device (see `st_dev`).
+
+    Shared by concurrent hashing jobs (see HashingScheduler) so that a disk serves
+    a few sequential streams instead of many interleaved reads, while files
+    on other devices are read (and hashed) in the meantime.
+
+    """
+    def __init__(self, readers_per_device: int = 1):
+        """
+        :param readers_per_device: Maximum number of files read from the same device at once.
+            Consider increasing it for SSDs.
+
+        """
+        self.readers_per_device = readers_per_device
+        self._lock = Lock()
+        self._semaphores: Dict[int, Semaphore] = {}
+
+    @contextmanager
+    def reading(self, filepath: Optional[str]) -> Iterator[None]:
+        """Context manager holding a reader slot of the device the given file resides on.
+
+        :param filepath: File to be read. None stands for zeros (nothing is read).
+
+        """
+        semaphore = None
+
+        if filepath is not None:
+            try:
+                device = stat(filepath).st_dev
+
+            except OSError:
+                # Reading is to fail anyway.
+                device = None
+
+            if device is not None:
+                with self._lock:
+                    semaphore = self._semaphores.get(device)
+
+                    if semaphore is None:
+                        semaphore = self._semaphores[device] = Semaphore(self.readers_per_device)
+
+        if semaphore is None:
+            yield
+            return
+
+        with semaphore:
+            yield
+
+
+def read_file(
+        filepath: Union[str, Path],
+        *,
+        offset: int = 0,
+        length: int = None,
+        holes: bool = False,
+        policy: IOPolicy = None,
+        throttle: Throttle = None
+) -> Iterator[Union[bytes, int]]:
+    """Yields file contents block by block.
+
+    :param filepath:
+    :param offset: Position to start reading from.
+    :param length: Number of bytes to read. Default: till the end of file.
+    :param holes: Do not read holes (unallocated regions) of sparse files,
+        but yield their lengths (integers) instead.
+    :param policy: Hints and limits for reading. Rate limit is applied with `throttle`.
+    :param throttle: Throttle to limit reading rate with.
+
+    """
+    block_size, sequential, readahead, drop_cache, _ = policy or IOPolicy()
+
+    if posix_fadvise is None:
+        sequential = readahead = drop_cache = False
+
+    with open(filepath, 'rb') as f:
+        fileno = f.fileno()
+        end = fstat(fileno).st_size
+
+        if length is not None:
+            end = min(end, offset + length)
+
+        if sequential:
+            posix_fadvise(fileno, offset, end - offset, POSIX_FADV_SEQUENTIAL)
+
+        if drop_cache:
+            posix_fadvise(fileno, offset, end - offset, POSIX_FADV_NOREUSE)
+
+        if holes:
+            regions = get_data_regions(fileno, offset, end)
+        else:
+            regions = [(offset, end)]
+
+        position = offset
+
+        for region_start, region_end in regions:
+
+            if region_start > position:
+                yield region_start - position
+
+            f.seek(region_start)
+
+            while region_start < region_end:
+                chunk_size = min(block_size, region_end - region_start)
+
+                if readahead:
+                    posix_fadvise(fileno, region_start + chunk_size, readahead, POSIX_FADV_WILLNEED)
+
+                chunk = f.read(chunk_size)
+
+                if not chunk:
+                    return
+
+                chunk_size = len(chunk)
+
+                if drop_cache:
+                    posix_fadvise(fileno, region_start, chunk_size, POSIX_FADV_DONTNEED)
+
+                if throttle:
+                    throttle.consume(chunk_size)
+
+                region_start += chunk_size
+
+                yield chunk
+
+            position = region_end
+
+        if holes and end > position:
+            yield end - position
+
+
+def _feed_file(hasher: PieceHasher, filepath: Optional[str], **kwargs) -> Iterator[int]:
+    # Feeds file data (or zeros if no file path) into hasher yielding after every chunk.
+    # Yields the number of bytes fed.
+    if metrics.enabled:
+        yield from _feed_file_measured(hasher, filepath, **kwargs)
+        return
+
+    if filepath is None:
+        hasher.update_zeros(kwargs['length'])
+        yield kwargs['length']
+        return
+
+    for chunk in read_file(filepath, holes=True, **kwargs):
+
+        if isinstance(chunk, int):
+            hasher.update_zeros(chunk)
+            yield chunk
+
+        else:
+            hasher.update(chunk)
+            yield len(chunk)
+
+
+def _feed_file_measured(hasher: PieceHasher, filepath: Optional[str], **kwargs) -> Iterator[int]:
+    # The same as _feed_file() collecting metrics.
+    pieces_count = hasher.pieces_count
+    started = perf_counter()
+
+    for chunk in [kwargs['length']] if filepath is None else read_file(filepath, holes=True, **kwargs):
+        read = perf_counter()
+
+        if isinstance(chunk, int):
+            hasher.update_zeros(chunk)
+            processed = chunk
+
+        else:
+            hasher.update(chunk)
+            processed = len(chunk)
+            metrics.BYTES_READ.inc(processed)
+            metrics.PHASE_READ.observe(read - started)
+
+        metrics.PHASE_HASH.observe(perf_counter() - read)
+        metrics.PIECES_HASHED.inc(hasher.pieces_count - pieces_count)
+        pieces_count = hasher.pieces_count
+
+        yield processed
+
+        started = perf_counter()
+
+
+def split_aligned(files: List[Tuple[Optional[str], int]], piece_size: int) -> List[List[Tuple[Optional[str], int]]]:
+    """Splits files laid out one after another into groups
+    starting at piece boundaries, so that groups can be hashed independently.
+
+    :param files: Files as a list of tuples (filepath, size).
+    :param piece_size: Size of a piece in bytes.
+
+    """
+    groups = []
+    group = []
+    offset = 0
+
+    for file in files:
+
+        if group and not offset % piece_size:
+            groups.append(group)
+            group = []
+
+        group.append(file)
+        offset += file[1]
+
+    if group:
+        groups.append(group)
+
+    return groups
+
+
+def hash_files(
+        files: List[Tuple[Optional[str], int]],
+        piece_size: int,
+        *,
+        checkpoint: Optional[HashingCheckpoint] = None,
+        io_policy: IOPolicy = None,
+        workers: int = 1,
+        progress: Callable[[int, int], None] = None,
+        cancel: Event = None,
+        device_slots: DeviceSlots = None,
+        throttle: Throttle = None
+) -> bytes:
+    """Returns concatenated SHA1 digests of pieces for data of the given files
+    laid out one after another.
+
+    :param files: Files to hash as a list of tuples (filepath, size).
+        None instead of a filepath stands for zeros (e.g. BEP 47 padding file).
+
+    :param piece_size: Size of a piece in bytes.
+
+    :param checkpoint: Checkpoint to resume hashing from and store progress into.
+        Checkpoint file is removed on completion.
+
+    :param io_policy: Hints and limits for reading files.
+
+    :param workers: Number of threads to hash files starting at piece boundaries
+        (see split_aligned()) in parallel. Not used with checkpoint.
+
+    :param progress: Callable accepting the number of bytes hashed so far and the total number of bytes.
+        Called after every block, from worker threads if `workers` is used.
+
+    :param cancel: Event to be set to stop hashing. HashingCancelled is raised then.
+        Checkpoint (if any) keeps hashing progress.
+
+    :param device_slots: Limits for files read at once per device shared with other jobs.
+
+    :param throttle: Throttle shared with other jobs to apply the rate limit with.
+        By default, `io_policy` rate limit applies to this call alone.
+
+    """
+    if throttle is None and io_policy:
+        throttle = io_policy.get_throttle()
+
+    total = sum(size for _, size in files)
+    done = 0
+    lock = Lock()
+
+    def feed(hasher: PieceHasher, fpath: Optional[str], **kwargs) -> Iterator[None]:
+        # Feeds file data into hasher checking for cancellation and reporting progress.
+        nonlocal done
+
+        with device_slots.reading(fpath) if device_slots else nullcontext():
+            for processed in _feed_file(hasher, fpath, policy=io_policy, throttle=throttle, **kwargs):
+
+                if cancel is not None and cancel.is_set():
+                    raise HashingCancelled('Hashing is cancelled.')
+
+                if progress is not None:
+                    with lock:
+                        done += processed
+                        done_current = done
+
+                    progress(done_current, total)
+
+                yield
+
+    if workers > 1 and not checkpoint:
+        from concurrent.futures import ThreadPoolExecutor
+
+        def hash_group(group):
+            hasher = PieceHasher(piece_size)
+
+            for fpath, size in group:
+                for _ in feed(hasher, fpath, length=size):
+                    pass
+
+            return hasher.finish()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return b''.join(executor.map(hash_group, split_aligned(files, piece_size)))
+
+    pieces = checkpoint.load() if checkpoint else b''
+    hasher = PieceHasher(piece_size, pieces=pieces)
+
+    # Skip data already hashed.
+    skip = done = hasher.pieces_count * piece_size
+
+    try:
+        for fpath, size in files:
+
+            if skip >= size:
+                skip -= size
+                continue
+
+            for _ in feed(hasher, fpath, offset=skip, length=size - skip):
+                if checkpoint:
+                    checkpoint.update(hasher.pieces)
+
+            skip = 0
+
+    except BaseException:
+        # E.g. cancelled or interrupted: keep progress.
+        if checkpoint:
+            checkpoint.save(hasher.pieces)
+        raise
+
+    pieces = hasher.finish()
+
+    if checkpoint:
+        checkpoint.remove()
+
+    return pieces
+
+
+def verify_files(
+        files: List[Tuple[str, int]],
+        piece_size: int,
+        pieces: bytes,
+        *,
+        io_policy: IOPolicy = None,
+        device_slots: DeviceSlots = None
+) -> List[int]:
+    """Returns indexes of pieces not matching the data of the given files
+    laid out one after another.
+
+    Missing files and files of unexpected size are considered to have no valid pieces.
+
+    :param files: Files to verify as a list of tuples (filepath, expected size).
+        None instead of a filepath stands for zeros (e.g. BEP 47 padding file).
+
+    :param piece_size: Size of a piece in bytes.
+
+    :param pieces: Expected concatenated SHA1 digests of pieces.
+
+    :param io_policy: Hints and limits for reading files.
+
+    :param device_slots: Limits for files read at once per device shared with other jobs.
+
+    """
+    hasher = PieceHasher(piece_size)
+    throttle = io_policy.get_throttle() if io_policy else None
+    invalid = set()
+    offset = 0
+
+    for fpath, size in files:
+
+        try:
+            size_actual = size if fpath is None else stat(fpath).st_size
+
+        except OSError:
+            size_actual = None
+
+        if size_actual == size:
+            with device_slots.reading(fpath) if device_slots else nullcontext():
+                for _ in _feed_file(hasher, fpath, length=size, policy=io_policy, throttle=throttle):
+                    pass
+
+        elif size:
+            invalid.update(range(offset // piece_size, (offset + size - 1) // piece_size + 1))
+            hasher.update_zeros(size)
+
+        offset += size
+
+    pieces_actual = hasher.finish()
+
+    for idx in range(0, max(len(pieces), len(pieces_actual)), DIGEST_SIZE):
+        if pieces[idx:idx + DIGEST_SIZE] != pieces_actual[idx:idx + DIGEST_SIZE]:
+            invalid.add(idx // DIGEST_SIZE)
+
+    return sorted(invalid)
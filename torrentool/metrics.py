@@ -0,0 +1,290 @@
+"""
+Instrumentation for long-running jobs (creation, verification, indexing).
+
+Metrics are disabled by default: instrumented code only checks `enabled` flag then.
+Metrics are exposed in Prometheus text format via HTTP (see serve())
+or a file for node_exporter textfile collector (see TextfileExporter).
+
+.. code-block:: python
+
+    from torrentool import metrics
+
+    metrics.enable()
+    metrics.serve(port=9200)
+
+"""
+from bisect import bisect_left
+from os import getpid, replace
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Dict, List, Tuple, Union
+
+enabled = False
+"""Whether metrics are collected."""
+
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+"""Histogram buckets upper bounds in seconds."""
+
+_registry: List['Metric'] = []
+
+
+def enable():
+    """Starts collecting metrics."""
+    global enabled
+    enabled = True
+
+
+def disable():
+    """Stops collecting metrics. Collected values are kept."""
+    global enabled
+    enabled = False
+
+
+class Metric:
+    """Base for metrics. Metrics with the same name and different labels are exposed together."""
+
+    kind: str = ''
+
+    def __init__(self, name: str, documentation: str, *, labels: Dict[str, str] = None):
+        """
+        :param name: Metric name.
+        :param documentation: Metric description.
+        :param labels: Labels to distinguish metrics with the same name.
+
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels or {}
+        self._lock = Lock()
+        _registry.append(self)
+
+    def _format_labels(self, extra: Dict[str, str] = None) -> str:
+        labels = {**self.labels, **(extra or {})}
+
+        if not labels:
+            return ''
+
+        return '{%s}' % ','.join(f'{key}="{value}"' for key, value in labels.items())
+
+    def get_samples(self) -> List[str]:
+        """Returns exposition lines for metric values."""
+        raise NotImplementedError  # pragma: nocover
+
+    def reset(self):
+        """Resets collected values."""
+        raise NotImplementedError  # pragma: nocover
+
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, *, labels: Dict[str, str] = None):
+        super().__init__(name, documentation, labels=labels)
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        """Increases the value.
+
+        :param amount:
+
+        """
+        with self._lock:
+            self.value += amount
+
+    def get_samples(self) -> List[str]:
+        return [f'{self.name}{self._format_labels()} {self.value}']
+
+    def reset(self):
+        self.value = 0
+
+
+class Histogram(Metric):
+    """Distribution of observed values (e.g. durations) over buckets."""
+
+    kind = 'histogram'
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            *,
+            labels: Dict[str, str] = None,
+            buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        """
+        :param name: Metric name.
+        :param documentation: Metric description.
+        :param labels: Labels to distinguish metrics with the same name.
+        :param buckets: Buckets upper bounds in ascending order.
+
+        """
+        super().__init__(name, documentation, labels=labels)
+        self.buckets = buckets
+        self.reset()
+
+    def observe(self, value: float):
+        """Registers an observed value.
+
+        :param value:
+
+        """
+        idx = bisect_left(self.buckets, value)
+
+        with self._lock:
+            self.sum += value
+            self.count += 1
+
+            if idx < len(self.counts):
+                self.counts[idx] += 1
+
+    def get_samples(self) -> List[str]:
+        name = self.name
+        samples = []
+        cumulative = 0
+
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            samples.append(f'{name}_bucket{self._format_labels({"le": str(bound)})} {cumulative}')
+
+        samples.extend([
+            f'{name}_bucket{self._format_labels({"le": "+Inf"})} {self.count}',
+            f'{name}_sum{self._format_labels()} {self.sum}',
+            f'{name}_count{self._format_labels()} {self.count}',
+        ])
+
+        return samples
+
+    def reset(self):
+        self.counts = [0] * len(self.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+
+BYTES_READ = Counter('torrentool_read_bytes_total', 'Bytes of files data read for hashing.')
+PIECES_HASHED = Counter('torrentool_pieces_hashed_total', 'Pieces hashed (including pieces of zeros).')
+FILES_PARSED = Counter('torrentool_files_parsed_total', 'Bencoded files decoded.')
+BYTES_DECODED = Counter('torrentool_decoded_bytes_total', 'Bytes of bencoded data decoded.')
+DECODE_ERRORS = Counter('torrentool_decode_errors_total', 'Bencoded data decoding errors.')
+
+PHASE_READ = Histogram('torrentool_phase_seconds', 'Duration of processing phases.', labels={'phase': 'read'})
+PHASE_HASH = Histogram('torrentool_phase_seconds', 'Duration of processing phases.', labels={'phase': 'hash'})
+PHASE_DECODE = Histogram('torrentool_phase_seconds', 'Duration of processing phases.', labels={'phase': 'decode'})
+
+
+def render() -> str:
+    """Returns metrics in Prometheus text exposition format."""
+    lines = []
+    described = set()
+
+    for metric in sorted(_registry, key=lambda item: item.name):
+        name = metric.name
+
+        if name not in described:
+            described.add(name)
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+
+        lines.extend(metric.get_samples())
+
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    """Resets values of all metrics."""
+    for metric in _registry:
+        metric.reset()
+
+
+def serve(host: str = '127.0.0.1', port: int = 9200):
+    """Starts an HTTP server exposing metrics at any path in a background thread.
+    Returns the server object (use .shutdown() to stop).
+
+    :param host:
+    :param port: Port to listen on. 0 - any free port (see .server_address of the result).
+
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            data = render().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def write_textfile(filepath: Union[str, Path]):
+    """Writes metrics into a file atomically (e.g. for node_exporter textfile collector).
+
+    :param filepath:
+
+    """
+    filepath = str(filepath)
+    filepath_tmp = f'{filepath}.{getpid()}.tmp'
+
+    with open(filepath_tmp, 'w') as f:
+        f.write(render())
+
+    replace(filepath_tmp, filepath)
+
+
+class TextfileExporter:
+    """Periodically writes metrics into a file in a background thread.
+    Metrics are written on stop as well.
+
+    .. code-block:: python
+
+        with TextfileExporter('/var/lib/node_exporter/torrentool.prom'):
+            Torrent.create_from('/srv/data')
+
+    """
+    def __init__(self, filepath: Union[str, Path], *, interval: float = 15):
+        """
+        :param filepath:
+        :param interval: Seconds between writes.
+
+        """
+        self.filepath = filepath
+        self.interval = interval
+        self._stopped = Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        """Starts writing metrics."""
+        self._stopped.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops writing metrics and writes the final values."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+
+        write_textfile(self.filepath)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            write_textfile(self.filepath)
@@ -0,0 +1,147 @@
+from pathlib import Path
+from threading import Event, Thread
+from typing import List, Optional, Union
+
+SAMPLE_INTERVAL = 0.05
+"""Seconds between traced memory checks to catch allocations at peak."""
+
+
+class Profiler:
+    """Collects performance evidence for a block of code:
+    CPU profile (cProfile) and memory allocations (tracemalloc).
+
+    .. code-block:: python
+
+        with Profiler(stats_path='create.prof', trace_memory=True) as profiler:
+            Torrent.create_from('/srv/data')
+
+        print('\\n'.join(profiler.get_summary()))
+
+    """
+    def __init__(
+            self,
+            *,
+            stats_path: Union[str, Path] = None,
+            trace_memory: bool = False,
+            top: int = 10,
+            code_filter: str = '*torrentool*'
+    ):
+        """
+        :param stats_path: File to dump profiling stats into (see `pstats`).
+            If not set, CPU is not profiled.
+
+        :param trace_memory: Trace memory allocations.
+
+        :param top: Number of top entries to summarize.
+
+        :param code_filter: Filename pattern of code which allocations are summarized.
+
+        """
+        self.stats_path = stats_path
+        self.trace_memory = trace_memory
+        self.top = top
+        self.code_filter = code_filter
+
+        self.peak = 0
+        """Peak traced memory in bytes."""
+
+        self._profile = None
+        self._snapshot = None
+        self._snapshot_size = 0
+        self._sampler: Optional[Thread] = None
+        self._stopped = Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def start(self):
+        """Starts profiling and tracing."""
+        if self.trace_memory:
+            import tracemalloc
+
+            tracemalloc.start()
+            self._stopped.clear()
+            self._sampler = Thread(target=self._sample, daemon=True)
+            self._sampler.start()
+
+        if self.stats_path:
+            from cProfile import Profile
+
+            self._profile = Profile()
+            self._profile.enable()
+
+    def stop(self):
+        """Stops profiling and tracing, dumps profiling stats."""
+        profile = self._profile
+
+        if profile is not None:
+            profile.disable()
+            profile.dump_stats(str(self.stats_path))
+
+        if self._sampler is not None:
+            import tracemalloc
+
+            self._stopped.set()
+            self._sampler.join()
+            self._sampler = None
+            self._take_snapshot()
+            self.peak = tracemalloc.get_traced_memory()[1]
+
+            tracemalloc.stop()
+
+    def _sample(self):
+        import tracemalloc
+
+        while not self._stopped.wait(SAMPLE_INTERVAL):
+            # Keep the snapshot taken at the highest memory usage seen.
+            if tracemalloc.get_traced_memory()[0] > self._snapshot_size * 1.1:
+                self._take_snapshot()
+
+    def _take_snapshot(self):
+        import tracemalloc
+
+        size = tracemalloc.get_traced_memory()[0]
+
+        if self._snapshot is None or size > self._snapshot_size:
+            self._snapshot = tracemalloc.take_snapshot()
+            self._snapshot_size = size
+
+    def get_summary(self) -> List[str]:
+        """Returns summary lines: top functions by own time and top allocations
+        made by filtered code at the highest memory usage seen.
+
+        """
+        from tracemalloc import Filter
+        from pstats import Stats
+
+        from .utils import humanize_filesize
+
+        lines = []
+        top = self.top
+
+        if self._profile is not None:
+            stats = Stats(self._profile)
+            lines.append(f'Profile stats: {self.stats_path} (total {stats.total_tt:.3f}s)')
+            lines.append('Top functions by own time (own s, cumulative s, calls):')
+
+            entries = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+
+            for (filename, lineno, funcname), (_, calls, own_time, cum_time, _) in entries:
+                location = funcname if filename == '~' else f'{filename}:{lineno}({funcname})'
+                lines.append(f'  {own_time:>8.3f} {cum_time:>8.3f} {calls:>9} {location}')
+
+        if self._snapshot is not None:
+            lines.append(f'Peak traced memory: {humanize_filesize(self.peak)}')
+            lines.append(f'Top allocations at {humanize_filesize(self._snapshot_size)} traced ({self.code_filter}):')
+
+            snapshot = self._snapshot.filter_traces([Filter(True, self.code_filter)])
+
+            for stat in snapshot.statistics('lineno')[:top]:
+                frame = stat.traceback[0]
+                lines.append(f'  {humanize_filesize(stat.size):>10} {stat.count:>9} {frame.filename}:{frame.lineno}')
+
+        return lines
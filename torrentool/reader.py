@@ -0,0 +1,254 @@
+from bisect import bisect_right
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import BinaryIO, List, NamedTuple, Optional, Union
+
+from .exceptions import TorrentError
+from .torrent import Torrent
+from .utils import get_safe_path
+
+
+class CacheStats(NamedTuple):
+    """Block cache statistics."""
+
+    hits: int
+    """Number of blocks read from cache."""
+
+    misses: int
+    """Number of blocks read from files."""
+
+    evictions: int
+    """Number of blocks evicted from cache to free space for others."""
+
+    size: int
+    """Number of bytes currently cached."""
+
+    @property
+    def hit_ratio(self) -> float:
+        """Share of blocks read from cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class PieceReader:
+    """Reads torrent data (pieces, blocks or arbitrary spans) from local files
+    by offsets within torrent, taking care of pieces spanning several files.
+
+    Recently read blocks are kept in a bounded LRU cache, opened files are pooled.
+
+    .. code-block:: python
+
+        with PieceReader(Torrent.from_file('my.torrent'), '/srv/data') as reader:
+            data = reader.get_piece(10)
+            print(reader.stats)
+
+    """
+    def __init__(
+            self,
+            torrent: Torrent,
+            root_path: Union[str, Path],
+            *,
+            block_size: int = 16384,
+            cache_size: int = 67108864,
+            max_open_files: int = 64
+    ):
+        """
+        :param torrent:
+
+        :param root_path: Directory containing torrent data (torrent name is a subpath here).
+            TorrentError is raised if torrent file paths point outside of it.
+
+        :param block_size: Size of a cached block in bytes. Default: 16 KiB (BitTorrent request size).
+
+        :param cache_size: Maximum number of bytes to cache. Default: 64 MiB.
+
+        :param max_open_files: Maximum number of files to keep open.
+
+        """
+        self.piece_length = torrent.piece_length
+        self.block_size = block_size
+        self.max_open_files = max_open_files
+
+        self._max_blocks = max(cache_size // block_size, 1)
+        self._blocks = OrderedDict()
+        self._handles = OrderedDict()
+        self._lock = Lock()
+        self._hits = self._misses = self._evictions = 0
+
+        self._paths: List[Optional[str]] = []
+        self._offsets: List[int] = []
+        offset = 0
+        root_path = str(root_path)
+
+        for file in torrent.files:
+            # Padding files are not stored, these are zeros.
+            self._paths.append(None if file.is_padding else get_safe_path(root_path, file.name))
+            self._offsets.append(offset)
+            offset += file.length
+
+        self.total_size = offset
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def stats(self) -> CacheStats:
+        """Block cache statistics."""
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            size=sum(len(block) for block in self._blocks.values()),
+        )
+
+    def close(self):
+        """Closes pooled files and drops cache."""
+        with self._lock:
+            for handle in self._handles.values():
+                handle.close()
+
+            self._handles.clear()
+            self._blocks.clear()
+
+    def get_piece(self, index: int) -> memoryview:
+        """Returns piece data.
+
+        :param index: Piece index.
+
+        """
+        return self.get_block(index, 0, self.piece_length)
+
+    def get_block(self, index: int, offset: int, length: int) -> memoryview:
+        """Returns a part of piece data.
+
+        ValueError is raised if the offset is not within the piece or the length is negative.
+
+        :param index: Piece index.
+        :param offset: Offset within the piece.
+        :param length: Number of bytes. Truncated at the end of the piece.
+
+        """
+        piece_length = self.piece_length
+        start = index * piece_length
+
+        if index < 0 or start >= self.total_size:
+            raise TorrentError(f'Piece {index} is out of range')
+
+        # The last piece may be shorter.
+        size = min(piece_length, self.total_size - start)
+
+        if not 0 <= offset < size or length < 0:
+            raise ValueError(f'Unable to read {length} bytes at {offset} of piece {index} ({size} bytes)')
+
+        return self.read(start + offset, min(length, size - offset))
+
+    def read(self, offset: int, length: int) -> memoryview:
+        """Returns torrent data span.
+
+        :param offset: Offset within torrent data.
+        :param length: Number of bytes. Truncated at the end of torrent data.
+
+        """
+        end = min(offset + length, self.total_size)
+
+        if offset < 0 or offset > end:
+            raise TorrentError(f'Unable to read {length} bytes at {offset}: out of range')
+
+        block_size = self.block_size
+        block_first = offset // block_size
+        block_last = (end - 1) // block_size
+
+        with self._lock:
+            if block_first == block_last:
+                # The most common case: no copying.
+                start = offset - block_first * block_size
+                return memoryview(self._get_block(block_first))[start:start + end - offset]
+
+            data = bytearray()
+
+            for block_idx in range(block_first, block_last + 1):
+                block_start = block_idx * block_size
+                block = memoryview(self._get_block(block_idx))
+                data += block[max(offset - block_start, 0):end - block_start]
+
+        return memoryview(data)
+
+    def _get_block(self, block_idx: int) -> bytes:
+        blocks = self._blocks
+        block = blocks.get(block_idx)
+
+        if block is not None:
+            self._hits += 1
+            blocks.move_to_end(block_idx)
+            return block
+
+        self._misses += 1
+
+        start = block_idx * self.block_size
+        block = self._read_files(start, min(start + self.block_size, self.total_size))
+
+        blocks[block_idx] = block
+
+        if len(blocks) > self._max_blocks:
+            blocks.popitem(last=False)
+            self._evictions += 1
+
+        return block
+
+    def _read_files(self, start: int, end: int) -> bytes:
+        offsets = self._offsets
+        file_idx = bisect_right(offsets, start) - 1
+        chunks = []
+
+        while start < end:
+            file_offset = offsets[file_idx]
+            file_end = offsets[file_idx + 1] if file_idx + 1 < len(offsets) else self.total_size
+
+            if file_end > start:
+                length = min(end, file_end) - start
+
+                if self._paths[file_idx] is None:
+                    chunk = bytes(length)
+
+                else:
+                    handle = self._get_handle(file_idx)
+                    handle.seek(start - file_offset)
+                    chunk = handle.read(length)
+
+                    if len(chunk) != length:
+                        raise TorrentError(
+                            f'Unable to read {length} bytes from {self._paths[file_idx]}: file is too short')
+
+                chunks.append(chunk)
+                start += length
+
+            file_idx += 1
+
+        return b''.join(chunks)
+
+    def _get_handle(self, file_idx: int) -> BinaryIO:
+        handles = self._handles
+        handle = handles.get(file_idx)
+
+        if handle is not None:
+            handles.move_to_end(file_idx)
+            return handle
+
+        filepath = self._paths[file_idx]
+
+        try:
+            handle = open(filepath, 'rb')
+
+        except OSError as e:
+            raise TorrentError(f'Unable to open {filepath}: {e}')
+
+        handles[file_idx] = handle
+
+        if len(handles) > self.max_open_files:
+            handles.popitem(last=False)[1].close()
+
+        return handle
@@ -0,0 +1,163 @@
+from collections import defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from os import cpu_count, stat
+from pathlib import Path
+from threading import Lock
+from typing import Callable, Deque, Dict, Set, Union
+
+from .hashing import DeviceSlots, IOPolicy
+from .torrent import Torrent
+
+
+def get_device(path: Union[str, Path]) -> int:
+    """Returns an identifier of a device the given path resides on.
+    For a missing path the device of the closest existing parent is returned.
+
+    :param path:
+
+    """
+    path = Path(path).absolute()
+
+    for candidate in (path, *path.parents):
+        try:
+            return stat(str(candidate)).st_dev
+
+        except OSError:
+            continue
+
+    return 0
+
+
+class HashingScheduler:
+    """Runs hashing jobs (torrent creation, verification) concurrently
+    while limiting the number of concurrent readers per device.
+
+    Every job reads its files sequentially. Reads are limited per device of every file
+    (see DeviceSlots), so with the default one reader per device a spindle serves
+    a single sequential stream, while jobs reading from other devices keep
+    other workers (and CPU) busy. Jobs are started in turns by the device
+    of their source path, so that workers are not all taken by jobs waiting for the same device.
+
+    .. code-block:: python
+
+        with HashingScheduler() as scheduler:
+            futures = [scheduler.submit_create(path) for path in paths]
+
+        torrents = [future.result() for future in futures]
+
+    """
+    def __init__(self, *, readers_per_device: int = 1, workers: int = None, io_policy: IOPolicy = None):
+        """
+        :param readers_per_device: Maximum number of jobs reading from the same device at once.
+            Consider increasing it for SSDs.
+
+        :param workers: Maximum number of jobs running at once. Default: number of CPUs.
+
+        :param io_policy: Hints and limits for reading files applied to all jobs.
+
+        """
+        self.readers_per_device = readers_per_device
+        self.io_policy = io_policy
+        self.device_slots = DeviceSlots(readers_per_device)
+
+        self._executor = ThreadPoolExecutor(max_workers=workers or cpu_count() or 1)
+        self._lock = Lock()
+        self._pending: Dict[int, Deque[tuple]] = defaultdict(deque)
+        self._running: Dict[int, int] = defaultdict(int)
+        self._futures: Set[Future] = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def submit(self, src_path: Union[str, Path], func: Callable, *args, **kwargs) -> Future:
+        """Schedules a generic job reading from the given path.
+        Returns a future for the job result.
+
+        :param src_path: Path the job reads from. Used to start jobs in turns by device.
+            Jobs are expected to use .device_slots to read files.
+        :param func: Job callable.
+        :param args: Positional arguments for the callable.
+        :param kwargs: Keyword arguments for the callable.
+
+        """
+        device = get_device(src_path)
+        future = Future()
+
+        with self._lock:
+            self._futures.add(future)
+            self._pending[device].append((future, func, args, kwargs))
+
+        self._dispatch(device)
+
+        return future
+
+    def submit_create(self, src_path: Union[str, Path], **kwargs) -> Future:
+        """Schedules torrent creation from a file or a directory.
+        Returns a future for Torrent object.
+
+        :param src_path:
+        :param kwargs: Additional arguments for Torrent.create_from().
+
+        """
+        kwargs.setdefault('io_policy', self.io_policy)
+        return self.submit(src_path, Torrent.create_from, src_path, device_slots=self.device_slots, **kwargs)
+
+    def submit_verify(self, torrent: Torrent, src_path: Union[str, Path]) -> Future:
+        """Schedules torrent data verification.
+        Returns a future for a list of invalid pieces indexes (see Torrent.verify()).
+
+        :param torrent:
+        :param src_path: Torrent data path.
+
+        """
+        return self.submit(
+            src_path, torrent.verify, src_path, io_policy=self.io_policy, device_slots=self.device_slots)
+
+    def shutdown(self, *, cancel_pending: bool = False):
+        """Waits for jobs to complete and frees resources.
+
+        :param cancel_pending: Cancel jobs not yet started.
+
+        """
+        with self._lock:
+            futures = list(self._futures)
+
+            if cancel_pending:
+                for pending in self._pending.values():
+                    for future, *_ in pending:
+                        future.cancel()
+                        future.set_running_or_notify_cancel()
+                    pending.clear()
+
+        wait(futures)
+        self._executor.shutdown()
+
+    def _dispatch(self, device: int):
+        with self._lock:
+            pending = self._pending[device]
+
+            while pending and self._running[device] < self.readers_per_device:
+                self._running[device] += 1
+                self._executor.submit(self._run, device, *pending.popleft())
+
+    def _run(self, device: int, future: Future, func: Callable, args: tuple, kwargs: dict):
+
+        if future.set_running_or_notify_cancel():
+            try:
+                result = func(*args, **kwargs)
+
+            except BaseException as e:
+                future.set_exception(e)
+
+            else:
+                future.set_result(result)
+
+        with self._lock:
+            self._running[device] -= 1
+            self._futures.discard(future)
+
+        self._dispatch(device)
+
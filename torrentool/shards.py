@@ -0,0 +1,95 @@
+from os import getpid, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Sequence, Tuple, TypeVar, Union
+
+if TYPE_CHECKING:  # pragma: nocover
+    from .torrent import Torrent
+
+TypeFile = TypeVar('TypeFile', bound=Tuple)
+"""File entry: a tuple of (filepath, size, path parts) as used by Torrent.create_from()."""
+
+
+def split_files(
+        files: Sequence[TypeFile],
+        *,
+        max_size: int = None,
+        max_files: int = None
+) -> List[List[TypeFile]]:
+    """Splits files into shards each within the given limits
+    keeping directories whole where possible. Files order is preserved.
+
+    A file larger than `max_size` makes up a shard of its own.
+
+    :param files: File entries (filepath, size, path parts) ordered so that
+        files of every directory go one after another (e.g. as by os.walk()).
+
+    :param max_size: Maximum total size of files in a shard in bytes.
+
+    :param max_files: Maximum number of files in a shard.
+
+    """
+    def fits(size: int, count: int) -> bool:
+        return (max_size is None or size <= max_size) and (max_files is None or count <= max_files)
+
+    units = []  # Groups of files which are not to be split: (files, total size).
+
+    def add_units(group: Sequence[TypeFile], depth: int):
+        size = sum(file[1] for file in group)
+
+        if fits(size, len(group)) or len(group) == 1:
+            units.append((group, size))
+            return
+
+        # Split into files and subdirectories of this directory.
+        start = 0
+
+        while start < len(group):
+            path = group[start][2]
+            end = start + 1
+
+            if len(path) > depth + 1:
+                # File in a subdirectory: take the whole subdirectory.
+                while end < len(group) and len(group[end][2]) > depth + 1 and group[end][2][depth] == path[depth]:
+                    end += 1
+
+            add_units(group[start:end], depth + 1)
+            start = end
+
+    if files:
+        add_units(files, 0)
+
+    shards = []
+    shard: List[TypeFile] = []
+    shard_size = 0
+
+    for group, size in units:
+        if shard and not fits(shard_size + size, len(shard) + len(group)):
+            shards.append(shard)
+            shard = []
+            shard_size = 0
+
+        shard.extend(group)
+        shard_size += size
+
+    if shard:
+        shards.append(shard)
+
+    return shards
+
+
+def write_manifest(torrents: Sequence['Torrent'], filepath: Union[str, Path]):
+    """Writes magnet links of the given torrents (e.g. shards) into a file, one per line.
+
+    File is replaced atomically.
+
+    :param torrents:
+    :param filepath:
+
+    """
+    filepath = str(filepath)
+    filepath_tmp = f'{filepath}.{getpid()}.tmp'
+
+    with open(filepath_tmp, 'w') as f:
+        f.writelines(f'{torrent.get_magnet()}\n' for torrent in torrents)
+
+    replace(filepath_tmp, filepath)
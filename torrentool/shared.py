@@ -0,0 +1,96 @@
+from typing import Optional
+
+from .exceptions import TorrentError
+from .torrent import Torrent
+
+
+def _get_shared_memory(**kwargs):
+    try:
+        from multiprocessing.shared_memory import SharedMemory
+
+    except ImportError:  # pragma: nocover
+        raise TorrentError('Shared memory is not supported: Python 3.8+ is required.')
+
+    return SharedMemory(**kwargs)
+
+
+class SharedTorrent:
+    """Torrent placed into shared memory to be passed to other processes cheaply:
+    only a handle (memory block name) is pickled, so data is not sent through pipes.
+
+    Useful for very large torrents given to many workers. The creating process
+    is responsible for freeing memory with .unlink() (or leaving the `with` block)
+    once workers are done.
+
+    .. code-block:: python
+
+        with SharedTorrent(Torrent.from_file('huge.torrent')) as shared:
+            pool.map(process, [shared] * 100)
+
+        # In a worker:
+        def process(shared):
+            files = shared.torrent.files
+
+    """
+    def __init__(self, torrent: Torrent):
+        """
+        :param torrent:
+
+        """
+        data = torrent.to_string()
+        options = torrent._decode_options
+
+        self.size = len(data)
+        self.lazy_text = options['text_keys'] is not None
+        self.compact = options['intern']
+
+        memory = _get_shared_memory(create=True, size=self.size)
+        memory.buf[:self.size] = data
+        memory.close()
+
+        self.name = memory.name
+        self._torrent: Optional[Torrent] = torrent
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.unlink()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state['_torrent'] = None
+        return state
+
+    @property
+    def torrent(self) -> Torrent:
+        """Torrent object. Read from shared memory on first access."""
+        torrent = self._torrent
+
+        if torrent is None:
+            try:
+                memory = _get_shared_memory(name=self.name)
+
+            except FileNotFoundError:
+                raise TorrentError(f'Shared torrent {self.name} is no longer available.')
+
+            try:
+                data = bytes(memory.buf[:self.size])
+
+            finally:
+                memory.close()
+
+            torrent = self._torrent = Torrent._from_pickled(data, None, self.lazy_text, self.compact)
+
+        return torrent
+
+    def unlink(self):
+        """Frees shared memory. Handles unpickled after that can't get the torrent."""
+        try:
+            memory = _get_shared_memory(name=self.name)
+
+        except FileNotFoundError:
+            return
+
+        memory.close()
+        memory.unlink()
@@ -1,27 +1,85 @@
 from calendar import timegm
 from datetime import datetime
-from functools import reduce
+from functools import partial, reduce
 from hashlib import sha1
-from os import walk, sep
-from os.path import join, getsize, normpath
+from os import walk, sep, getpid, fsync, replace, remove, chmod, stat
+from os.path import join, getsize, normpath, exists
 from pathlib import Path
-from typing import List, Union, Optional, Tuple, NamedTuple
+from stat import S_IMODE
+from threading import Event, Lock
+from typing import TYPE_CHECKING, BinaryIO, Callable, Iterable, List, Union, Optional, Tuple, NamedTuple
 from urllib.parse import urlencode
 
-from .bencode import Bencode
+from .bencode import Bencode, DecodeLimits, RawBencoded
 from .exceptions import TorrentError
+from .filelist import FileList
+from .hashing import BLOCK_SIZE, DeviceSlots, HashingCheckpoint, IOPolicy, PieceHasher, hash_files, verify_files
 from .utils import get_app_version
 
+if TYPE_CHECKING:  # pragma: nocover
+    from concurrent.futures import Executor
+    from .aio import HashingTask
+
 _ITERABLE_TYPES = (list, tuple, set)
 
 
-class TorrentFile(NamedTuple):
-    """Represents a file in torrent."""
+def _text(value):
+    # Decodes strings left as bytes on lazy text decoding (see Torrent.from_file()).
+    if isinstance(value, bytes):
+        return value.decode(errors='replace')
+
+    if isinstance(value, list):
+        return [_text(item) for item in value]
+
+    return value
+
 
+class _TorrentFileBase(NamedTuple):
     name: str
     length: int
 
 
+class TorrentFile(_TorrentFileBase):
+    """Represents a file in torrent.
+
+    Behaves like a (name, length) tuple, file attributes are exposed additionally.
+
+    """
+    attr: str = ''
+    """File attributes (BEP 47): `p` - padding, `x` - executable, `h` - hidden, `l` - symlink."""
+
+    def __new__(cls, name: str, length: int, attr: str = ''):
+        file = super().__new__(cls, name, length)
+
+        if attr:
+            file.attr = attr
+
+        return file
+
+    def __getnewargs__(self):
+        return self.name, self.length, self.attr
+
+    @property
+    def is_padding(self) -> bool:
+        """Whether this is a padding file, which contents is zeros and which is not to be stored."""
+        return 'p' in self.attr
+
+    @property
+    def is_executable(self) -> bool:
+        """Whether the file is executable."""
+        return 'x' in self.attr
+
+    @property
+    def is_hidden(self) -> bool:
+        """Whether the file is hidden."""
+        return 'h' in self.attr
+
+    @property
+    def is_symlink(self) -> bool:
+        """Whether the file is a symlink."""
+        return 'l' in self.attr
+
+
 class Torrent:
     """Represents a torrent file, and exposes utilities to work with it."""
 
@@ -29,12 +87,48 @@ class Torrent:
         dict_struct: dict = dict_struct or {'info': {}}
         self._struct = dict_struct
         self._filepath: Optional[Path] = None
+        self._decode_options = self._get_decode_options()
+        self._info_decoded: Optional[Tuple[RawBencoded, dict]] = None
 
     def __str__(self):
         return f'Torrent: {self.name}'
 
+    def __reduce__(self):
+        # Pickled as bencoded data which is much cheaper than a graph of objects.
+        # Info dictionary is decoded on access after unpickling.
+        options = self._decode_options
+        return self._from_pickled, (
+            self.to_string(), self._filepath, options['text_keys'] is not None, options['intern'])
+
+    @classmethod
+    def _from_pickled(cls, data: bytes, filepath: Optional[Path], lazy_text: bool, compact: bool) -> 'Torrent':
+        torrent = cls.from_string(data, lazy_text=lazy_text, raw_info=True, compact=compact)
+        torrent._filepath = filepath
+        return torrent
+
+    @property
+    def _info(self) -> dict:
+        # Info dictionary. If kept as raw bencoded data (see `raw_info` in .from_file())
+        # it's decoded on demand, but raw data is left intact.
+        info = self._struct.get('info')
+
+        if isinstance(info, RawBencoded):
+            info_decoded = self._info_decoded
+
+            if info_decoded is None or info_decoded[0] is not info:
+                info_decoded = self._info_decoded = (info, Bencode.decode(info, **self._decode_options))
+
+            info = info_decoded[1]
+
+        return info or {}
+
+    def _get_info_to_change(self) -> dict:
+        # Info dictionary to be changed. Raw bencoded data is replaced with a decoded one.
+        info = self._struct['info'] = self._info
+        return info
+
     def _list_getter(self, key) -> list:
-        return self._struct.get(key) or []
+        return _text(self._struct.get(key)) or []
 
     def _list_setter(self, key, val):
         if val is None:
@@ -83,23 +177,24 @@ class Torrent:
     def files(self) -> List['TorrentFile']:
         """Files in torrent.
 
-        List of namedtuples (filepath, size).
+        List of namedtuples (filepath, size). Padding files (BEP 47) are included,
+        see TorrentFile.is_padding.
 
         """
         files = []
-        info = self._struct.get('info')
+        info = self._info
 
         if not info:
             return files
 
         if 'files' in info:
-            base = info['name']
+            base = _text(info['name'])
 
             for f in info['files']:
-                files.append(TorrentFile(join(base, *f['path']), f['length']))
+                files.append(TorrentFile(join(base, *_text(f['path'])), f['length'], _text(f.get('attr', ''))))
 
         else:
-            files.append(TorrentFile(info['name'], info['length']))
+            files.append(TorrentFile(_text(info['name']), info['length'], _text(info.get('attr', ''))))
 
         return files
 
@@ -108,6 +203,17 @@ class Torrent:
         """Total size of all files in torrent."""
         return reduce(lambda prev, curr: prev + curr[1], self.files, 0)
 
+    @property
+    def piece_length(self) -> Optional[int]:
+        """Number of bytes in each piece."""
+        return self._info.get('piece length')
+
+    @property
+    def pieces(self) -> List[bytes]:
+        """SHA1 digests (20 bytes each) of torrent pieces."""
+        pieces = self._info.get('pieces') or b''
+        return [pieces[idx:idx + 20] for idx in range(0, len(pieces), 20)]
+
     @property
     def info_hash(self) -> Optional[str]:
         """Hash of torrent file info section. Also known as torrent hash."""
@@ -116,7 +222,10 @@ class Torrent:
         if not info:
             return None
 
-        return sha1(Bencode.encode(info)).hexdigest()
+        if not isinstance(info, RawBencoded):
+            info = Bencode.encode(info)
+
+        return sha1(info).hexdigest()
 
     @property
     def magnet_link(self) -> str:
@@ -141,10 +250,16 @@ class Torrent:
                 return []
             urls = [[urls]]
 
-        return urls
+        return _text(urls)
 
     @announce_urls.setter
     def announce_urls(self, val: List[str]):
+        if not val:
+            # Empty value clears announce URLs.
+            self._struct.pop('announce', None)
+            self._struct.pop('announce-list', None)
+            return
+
         self._struct['announce'] = ''
         self._struct['announce-list'] = []
 
@@ -171,20 +286,25 @@ class Torrent:
     @property
     def comment(self) -> Optional[str]:
         """Optional. Free-form textual comments of the author."""
-        return self._struct.get('comment')
+        return _text(self._struct.get('comment'))
 
     @comment.setter
     def comment(self, val: str):
+        if not val:
+            # Empty value clears comment.
+            self._struct.pop('comment', None)
+            return
+
         self._struct['comment'] = val
     
     @property
     def source(self) -> Optional[str]:
         """Optional. Often used by private trackers to create a unique infohash to prevent peer-leak."""
-        return self._struct.get('info').get("source")
+        return _text(self._info.get("source"))
 
     @source.setter
     def source(self, val: str):
-        self._struct['info']['source'] = val
+        self._get_info_to_change()['source'] = val
     
     @property
     def creation_date(self) -> Optional[datetime]:
@@ -203,7 +323,7 @@ class Torrent:
     @property
     def created_by(self) -> Optional[str]:
         """Optional. Name and version of the program used to create the .torrent"""
-        return self._struct.get('created by')
+        return _text(self._struct.get('created by'))
 
     @created_by.setter
     def created_by(self, val: str):
@@ -216,26 +336,26 @@ class Torrent:
         the client may obtain peer from other means, e.g. PEX peer exchange, dht.
 
         """
-        return self._struct.get('info', {}).get('private', False)
+        return self._info.get('private', False)
 
     @private.setter
     def private(self, val: bool):
         if not val:
             try:
-                del self._struct['info']['private']
+                del self._get_info_to_change()['private']
             except KeyError:
                 pass
         else:
-            self._struct['info']['private'] = 1
+            self._get_info_to_change()['private'] = 1
 
     @property
     def name(self) -> Optional[str]:
         """Torrent name (title)."""
-        return self._struct.get('info', {}).get('name', None)
+        return _text(self._info.get('name', None))
 
     @name.setter
     def name(self, val: str):
-        self._struct['info']['name'] = val
+        self._get_info_to_change()['name'] = val
 
     def get_magnet(self, detailed: Union[bool, list, tuple, set] = True) -> str:
         """Returns torrent magnet link, consisting of BTIH (BitTorrent Info Hash) URN
@@ -291,8 +411,50 @@ class Torrent:
 
         return result
 
+    def verify(
+            self,
+            src_path: Union[str, Path],
+            *,
+            io_policy: IOPolicy = None,
+            device_slots: DeviceSlots = None
+    ) -> List[int]:
+        """Checks torrent data and returns indexes of pieces not matching it.
+        Empty list means all data is valid.
+
+        :param src_path: Torrent data path: the file for a single file torrent,
+            the directory (corresponding to torrent's name) for a multiple file torrent.
+
+        :param io_policy: Hints and limits for reading files (e.g. to spare page cache).
+
+        :param device_slots: Limits for files read at once per device shared with other jobs
+            (see HashingScheduler).
+
+        """
+        info = self._info
+
+        if not info:
+            raise TorrentError('Unable to verify torrent: no info.')
+
+        src_path = Path(src_path)
+
+        if 'files' in info:
+            files = [
+                (None if 'p' in _text(f.get('attr', '')) else str(src_path.joinpath(*_text(f['path']))), f['length'])
+                for f in info['files']
+            ]
+
+        else:
+            files = [(str(src_path), info['length'])]
+
+        return verify_files(
+            files, self.piece_length, info['pieces'], io_policy=io_policy, device_slots=device_slots)
+
     def to_file(self, filepath: str = None):
-        """Writes Torrent object into file, either
+        """Writes Torrent object into file, either the given one
+        or the one the object was read from.
+
+        File is replaced atomically: readers see either the old or the new contents.
+        Permissions of the replaced file are kept.
 
         :param filepath:
 
@@ -303,13 +465,172 @@ class Torrent:
         if filepath is not None:
             self._filepath = filepath
 
-        with open(self._filepath, mode='wb') as f:
-            f.write(self.to_string())
+        filepath = str(self._filepath)
+        filepath_tmp = f'{filepath}.{getpid()}.tmp'
+
+        try:
+            with open(filepath_tmp, mode='wb') as f:
+                f.write(self.to_string())
+                f.flush()
+                fsync(f.fileno())
+
+            try:
+                chmod(filepath_tmp, S_IMODE(stat(filepath).st_mode))
+
+            except FileNotFoundError:
+                pass
+
+            replace(filepath_tmp, filepath)
+
+        finally:
+            if exists(filepath_tmp):
+                remove(filepath_tmp)
 
     def to_string(self) -> bytes:
         """Returns bytes representing torrent file."""
         return Bencode.encode(self._struct)
 
+    @staticmethod
+    def _get_piece_size(size_data: int) -> int:
+        size_min = 32768  # 32 KiB
+        size_default = 262144  # 256 KiB
+        size_max = 1048576  # 1 MiB
+
+        # todo use those limits as advised
+        # chunks_min = 1000
+        # chunks_max = 2200
+
+        size_piece = size_min
+        if size_data > size_min:
+            size_piece = size_default
+
+        if size_piece > size_max:
+            size_piece = size_max
+
+        return size_piece
+
+    @classmethod
+    def _hash_chunks(cls, chunks: Iterable[bytes]) -> Tuple[int, bytes, int]:
+        # Hashes data of size unknown in advance in a single pass.
+        # Returns a tuple (piece size, pieces, data size).
+        # Piece size grows with data size, so while data is small
+        # it is additionally hashed with the smallest piece size.
+        size_piece_min = cls._get_piece_size(0)
+        hasher_min = PieceHasher(size_piece_min)
+        hasher = PieceHasher(cls._get_piece_size(size_piece_min + 1))
+        size_data = 0
+
+        for chunk in chunks:
+            size_data += len(chunk)
+
+            if hasher_min is not None and size_data > size_piece_min:
+                hasher_min = None
+
+            if hasher_min is not None:
+                hasher_min.update(chunk)
+
+            hasher.update(chunk)
+
+        hasher = hasher_min or hasher
+
+        return hasher.piece_size, hasher.finish(), size_data
+
+    @classmethod
+    def create_from_stream(cls, fileobj: BinaryIO, name: str, *, tee: BinaryIO = None) -> 'Torrent':
+        """Returns single file Torrent object created from a stream (e.g. stdin or a pipe)
+        which is read once till the end.
+
+        :param fileobj: Binary file object to read data from.
+
+        :param name: Torrent (file) name.
+
+        :param tee: Binary file object to additionally write data read into,
+            e.g. to store the data without reading it again.
+
+        """
+        def read_chunks():
+            for chunk in iter(partial(fileobj.read, BLOCK_SIZE), b''):
+
+                if tee is not None:
+                    tee.write(chunk)
+
+                yield chunk
+
+        size_piece, pieces, size_data = cls._hash_chunks(read_chunks())
+
+        if not size_data:
+            raise TorrentError('Unable to create torrent for an empty stream.')
+
+        torrent = cls({'info': {
+            'name': name,
+            'length': size_data,
+            'pieces': pieces,
+            'piece length': size_piece,
+        }})
+        torrent.created_by = get_app_version()
+        torrent.creation_date = datetime.utcnow()
+
+        return torrent
+
+    @classmethod
+    def create_from_archive(cls, src_path: Union[str, Path]) -> 'Torrent':
+        """Returns Torrent object created from a tar (possibly compressed) or zip archive
+        contents without extracting it. Files layout matches the extracted archive.
+
+        Archive is read once in streaming mode, files are hashed in archive members order.
+
+        Torrent name is the name of a single top level directory (or a file)
+        in the archive if any, otherwise it's the archive file name without suffix.
+
+        :param src_path:
+
+        """
+        # Archive modules are heavy to import and are rarely needed.
+        from .archives import get_archive_name, iter_archive_files
+
+        files = []
+
+        def read_chunks():
+            for path, size, f in iter_archive_files(src_path):
+                if not size:
+                    # Empty files are skipped as in .create_from().
+                    continue
+
+                files.append({'length': size, 'path': path})
+
+                for chunk in iter(partial(f.read, BLOCK_SIZE), b''):
+                    yield chunk
+
+        size_piece, pieces, _ = cls._hash_chunks(read_chunks())
+
+        if not files:
+            raise TorrentError('Unable to create torrent for an empty archive.')
+
+        info = {
+            'pieces': pieces,
+            'piece length': size_piece,
+        }
+
+        top_level = {file['path'][0] for file in files}
+
+        if len(files) == 1 and len(files[0]['path']) == 1:
+            info['name'] = files[0]['path'][0]
+            info['length'] = files[0]['length']
+
+        elif len(top_level) == 1 and all(len(file['path']) > 1 for file in files):
+            info['name'] = top_level.pop()
+            info['files'] = [{'length': file['length'], 'path': file['path'][1:]} for file in files]
+
+        else:
+            info['name'] = get_archive_name(src_path)
+            info['files'] = files
+
+        torrent = cls({'info': info})
+        torrent.created_by = get_app_version()
+        torrent.creation_date = datetime.utcnow()
+
+        return torrent
+
     @classmethod
     def _get_target_files_info(cls, src_path: Path) -> Tuple[List[Tuple[str, int, List[str]]], int]:
         is_dir = src_path.is_dir()
@@ -339,67 +660,94 @@ class Torrent:
         return target_files_, total_size
 
     @classmethod
-    def create_from(cls, src_path: Union[str, Path]) -> 'Torrent':
+    def create_from(
+            cls,
+            src_path: Union[str, Path],
+            *,
+            checkpoint: Union[str, Path] = None,
+            io_policy: IOPolicy = None,
+            padding: bool = False,
+            workers: int = 1,
+            progress: Callable[[int, int], None] = None,
+            cancel: Event = None,
+            device_slots: DeviceSlots = None
+    ) -> 'Torrent':
         """Returns Torrent object created from a file or a directory.
 
         :param src_path:
 
+        :param checkpoint: File to periodically store hashing progress into.
+            If hashing is interrupted, the next call with the same checkpoint
+            resumes from the last completed piece given that the source is unchanged.
+
+        :param io_policy: Hints and limits for reading files (e.g. to spare page cache).
+
+        :param padding: Insert padding files (BEP 47) so that every file starts at a piece boundary.
+            This allows files to be hashed independently (see `workers`) and pieces
+            to be shared across torrents containing the same files.
+
+        :param workers: Number of threads to hash files in parallel.
+            Only files starting at piece boundaries are hashed in parallel (see `padding`).
+
+        :param progress: Callable accepting the number of bytes hashed so far and the total number of bytes.
+
+        :param cancel: Event to be set (e.g. from another thread) to stop hashing.
+            HashingCancelled is raised then.
+
+        :param device_slots: Limits for files read at once per device, e.g. shared
+            with other jobs (see HashingScheduler) or to keep `workers` from competing for a disk.
+
         """
         if isinstance(src_path, str):
             src_path = Path(src_path)
 
         target_files, size_data = cls._get_target_files_info(src_path)
+        size_piece = cls._get_piece_size(size_data)
 
-        size_min = 32768  # 32 KiB
-        size_default = 262144  # 256 KiB
-        size_max = 1048576  # 1 MiB
+        is_dir = src_path.is_dir()
 
-        # todo use those limits as advised
-        # chunks_min = 1000
-        # chunks_max = 2200
+        if padding and is_dir:
+            target_files_padded = []
+            offset = 0
 
-        size_piece = size_min
-        if size_data > size_min:
-            size_piece = size_default
+            for target_file in target_files:
+                pad = -offset % size_piece
 
-        if size_piece > size_max:
-            size_piece = size_max
+                if pad:
+                    target_files_padded.append((None, pad, ['.pad', f'{pad}']))
 
-        def read(filepath):
-            with open(filepath, 'rb') as f:
-                while True:
-                    chunk = f.read(size_piece - len(pieces_buffer))
-                    chunk_size = len(chunk)
-                    if chunk_size == 0:
-                        break
-                    yield chunk
+                target_files_padded.append(target_file)
+                offset += pad + target_file[1]
 
-        pieces = bytearray()
-        pieces_buffer = bytearray()
+            target_files = target_files_padded
 
-        for fpath, _, _ in target_files:
-            for chunk in read(fpath):
-                pieces_buffer += chunk
+        files_sizes = [(fpath, size) for fpath, size, _ in target_files]
 
-                if len(pieces_buffer) == size_piece:
-                    pieces += sha1(pieces_buffer).digest()[:20]
-                    pieces_buffer = bytearray()
+        checkpoint_ = None
+        if checkpoint:
+            checkpoint_ = HashingCheckpoint(checkpoint, files=files_sizes, piece_size=size_piece)
 
-        if len(pieces_buffer):
-            pieces += sha1(pieces_buffer).digest()[:20]
-            pieces_buffer = bytearray()
+        pieces = hash_files(
+            files_sizes, size_piece,
+            checkpoint=checkpoint_, io_policy=io_policy, workers=workers, progress=progress, cancel=cancel,
+            device_slots=device_slots)
 
         info = {
             'name': src_path.name,
-            'pieces': bytes(pieces),
+            'pieces': pieces,
             'piece length': size_piece,
         }
 
-        if src_path.is_dir():
+        if is_dir:
             files = []
 
-            for _, length, path in target_files:
-                files.append({'length': length, 'path': path})
+            for fpath, length, path in target_files:
+                file = {'length': length, 'path': path}
+
+                if fpath is None:
+                    file['attr'] = 'p'
+
+                files.append(file)
 
             info['files'] = files
 
@@ -418,24 +766,246 @@ class Torrent:
         return torrent
 
     @classmethod
-    def from_string(cls, string: str) -> 'Torrent':
+    def create_sharded(
+            cls,
+            src_path: Union[str, Path],
+            *,
+            max_size: int = None,
+            max_files: int = None,
+            io_policy: IOPolicy = None,
+            workers: int = 1,
+            progress: Callable[[int, int], None] = None,
+            cancel: Event = None,
+            device_slots: DeviceSlots = None
+    ) -> List['Torrent']:
+        """Returns Torrent objects (shards) created from a directory split into parts
+        each within the given limits, keeping subdirectories whole where possible (see split_files()).
+
+        Every shard is named after the directory and contains paths relative to it,
+        so data of all shards downloaded into the same place makes up the directory.
+
+        Data is read once. Use write_manifest() to list shards magnet links.
+
+        :param src_path:
+
+        :param max_size: Maximum total size of files in a shard in bytes.
+
+        :param max_files: Maximum number of files in a shard.
+
+        :param io_policy: Hints and limits for reading files (e.g. to spare page cache).
+            Rate limit applies to all the shards together.
+
+        :param workers: Number of threads to hash shards in parallel.
+
+        :param progress: Callable accepting the number of bytes hashed so far and the total number of bytes
+            of all shards.
+
+        :param cancel: Event to be set (e.g. from another thread) to stop hashing.
+            HashingCancelled is raised then.
+
+        :param device_slots: Limits for files read at once per device (e.g. to keep
+            shards hashed in parallel from interleaving reads on the same disk).
+
+        """
+        from .shards import split_files
+
+        if isinstance(src_path, str):
+            src_path = Path(src_path)
+
+        if not src_path.is_dir():
+            raise TorrentError('Only a directory can be split into shards.')
+
+        target_files, size_data = cls._get_target_files_info(src_path)
+        shards = split_files(target_files, max_size=max_size, max_files=max_files)
+
+        if not shards:
+            raise TorrentError('Unable to create torrent for an empty directory.')
+
+        shards_done = [0] * len(shards)
+        lock = Lock()
+        throttle = io_policy.get_throttle() if io_policy else None
+
+        def hash_shard(idx: int) -> 'Torrent':
+            files = shards[idx]
+            size_piece = cls._get_piece_size(sum(size for _, size, _ in files))
+
+            def progress_shard(done: int, total: int):
+                with lock:
+                    shards_done[idx] = done
+                    done_all = sum(shards_done)
+
+                progress(done_all, size_data)
+
+            pieces = hash_files(
+                [(fpath, size) for fpath, size, _ in files], size_piece,
+                io_policy=io_policy, progress=progress_shard if progress else None, cancel=cancel,
+                device_slots=device_slots, throttle=throttle)
+
+            torrent = cls({'info': {
+                'name': src_path.name,
+                'pieces': pieces,
+                'piece length': size_piece,
+                'files': [{'length': size, 'path': path} for _, size, path in files],
+            }})
+            torrent.created_by = get_app_version()
+            torrent.creation_date = datetime.utcnow()
+
+            return torrent
+
+        if workers > 1 and len(shards) > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(hash_shard, range(len(shards))))
+
+        return [hash_shard(idx) for idx in range(len(shards))]
+
+    @staticmethod
+    def _get_decode_options(
+            *,
+            limits: DecodeLimits = None,
+            strict: bool = False,
+            lazy_text: bool = False,
+            compact: bool = False
+    ) -> dict:
+        return {
+            'byte_keys': {'pieces'},
+            'text_keys': set() if lazy_text else None,
+            'limits': limits,
+            'strict': strict,
+            'intern': compact,
+            # File entries are put into compact storage as they are decoded.
+            'list_factories': {'files': FileList} if compact else None,
+        }
+
+    @classmethod
+    def from_string(
+            cls,
+            string: str,
+            *,
+            limits: DecodeLimits = None,
+            strict: bool = False,
+            lazy_text: bool = False,
+            raw_info: bool = False,
+            compact: bool = False
+    ) -> 'Torrent':
         """Alternative constructor to get Torrent object from string.
 
         :param string:
 
+        :param limits: Resource limits to apply while decoding.
+            Use those for data from untrusted sources.
+
+        :param strict: Require data to be in canonical form, so that
+            info hash is guaranteed to be the same as other clients compute.
+
+        :param lazy_text: Do not decode strings while reading. Textual fields
+            are decoded on access, binary ones (e.g. `pieces`) are never decoded.
+            This speeds up reading and keeps non UTF-8 strings intact.
+
+        :param raw_info: Do not decode info dictionary while reading, but keep it
+            as raw bencoded data which is decoded on access and is written back intact
+            (unless info is changed). This speeds up editing of other fields.
+
+        :param compact: Save memory for torrents with many files: share equal
+            keys and path components, keep file entries in a compact storage (FileList)
+            which behaves like a read-only list of dictionaries.
+
         """
-        return cls(Bencode.read_string(string, byte_keys={'pieces'}))
+        options = cls._get_decode_options(limits=limits, strict=strict, lazy_text=lazy_text, compact=compact)
+        torrent = cls(Bencode.read_string(string, raw_keys={'info'} if raw_info else None, **options))
+        torrent._decode_options = options
+
+        return torrent
 
     @classmethod
-    def from_file(cls, filepath: Union[str, Path]) -> 'Torrent':
+    def from_file(
+            cls,
+            filepath: Union[str, Path],
+            *,
+            limits: DecodeLimits = None,
+            strict: bool = False,
+            lazy_text: bool = False,
+            raw_info: bool = False,
+            compact: bool = False
+    ) -> 'Torrent':
         """Alternative constructor to get Torrent object from file.
 
         :param filepath:
 
+        :param limits: Resource limits to apply while decoding.
+            Use those for data from untrusted sources.
+
+        :param strict: Require data to be in canonical form, so that
+            info hash is guaranteed to be the same as other clients compute.
+
+        :param lazy_text: Do not decode strings while reading. Textual fields
+            are decoded on access, binary ones (e.g. `pieces`) are never decoded.
+            This speeds up reading and keeps non UTF-8 strings intact.
+
+        :param raw_info: Do not decode info dictionary while reading, but keep it
+            as raw bencoded data which is decoded on access and is written back intact
+            (unless info is changed). This speeds up editing of other fields.
+
+        :param compact: Save memory for torrents with many files: share equal
+            keys and path components, keep file entries in a compact storage (FileList)
+            which behaves like a read-only list of dictionaries.
+
         """
         if isinstance(filepath, str):
             filepath = Path(filepath)
 
-        torrent = cls(Bencode.read_file(filepath, byte_keys={'pieces'}))
+        options = cls._get_decode_options(limits=limits, strict=strict, lazy_text=lazy_text, compact=compact)
+        torrent = cls(Bencode.read_file(filepath, raw_keys={'info'} if raw_info else None, **options))
+        torrent._decode_options = options
         torrent._filepath = filepath
+
         return torrent
+
+    @classmethod
+    async def afrom_file(cls, filepath: Union[str, Path], *, executor: 'Executor' = None, **kwargs) -> 'Torrent':
+        """Asynchronous variant of .from_file(): reading and decoding is done in an executor
+        without blocking the event loop.
+
+        :param filepath:
+
+        :param executor: Executor to run in. Default: the event loop default executor.
+            A process pool executor can be used as well, since Torrent objects are pickled cheaply.
+
+        :param kwargs: Keyword arguments for .from_file().
+
+        """
+        import asyncio
+
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, partial(cls.from_file, filepath, **kwargs))
+
+    @classmethod
+    def acreate_from(
+            cls,
+            src_path: Union[str, Path],
+            *,
+            executor: 'Executor' = None,
+            **kwargs
+    ) -> 'HashingTask[Torrent]':
+        """Asynchronous variant of .create_from(): hashing is done in an executor
+        without blocking the event loop. Must be called in a running event loop.
+
+        Returns a task to be awaited for Torrent object. Iterate over it with `async for`
+        to get progress. Cancelling the task stops hashing.
+
+        .. code-block:: python
+
+            torrent = await Torrent.acreate_from('/srv/data')
+
+        :param src_path:
+
+        :param executor: Thread pool executor to run in. Default: the event loop default executor.
+
+        :param kwargs: Keyword arguments for .create_from().
+
+        """
+        from .aio import HashingTask
+
+        return HashingTask(partial(cls.create_from, src_path, **kwargs), executor=executor)
+
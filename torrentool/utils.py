@@ -2,7 +2,7 @@ import math
 from os import path
 from typing import List
 
-from .exceptions import RemoteUploadError, RemoteDownloadError
+from .exceptions import RemoteUploadError, RemoteDownloadError, TorrentError
 
 
 OPEN_TRACKERS_FILENAME = 'open_trackers.ini'
@@ -18,6 +18,31 @@ def get_app_version() -> str:
     return f'torrentool/{VERSION_STR}'
 
 
+def get_safe_path(root_path: str, name: str) -> str:
+    """Returns a path of a torrent file (see TorrentFile.name) within the given directory.
+
+    Torrents may come from untrusted sources, so TorrentError is raised for names
+    which could point outside the directory: absolute, having empty, '.' or '..' parts.
+
+    :param root_path:
+    :param name:
+
+    """
+    parts = name.replace(path.altsep, path.sep).split(path.sep) if path.altsep else name.split(path.sep)
+
+    if path.isabs(name) or path.splitdrive(name)[0] or any(part in {'', '.', '..'} for part in parts):
+        raise TorrentError(f'Unsafe file path in torrent: {name}')
+
+    root_path = path.realpath(root_path)
+    target = path.join(root_path, *parts)
+
+    if path.commonpath([root_path, path.realpath(target)]) != root_path:
+        # E.g. a symbolic link within the directory.
+        raise TorrentError(f'File path in torrent points outside of {root_path}: {name}')
+
+    return target
+
+
 def humanize_filesize(bytes_size: int) -> str:
     """Returns human readable filesize.
 
@@ -0,0 +1,503 @@
+import errno
+import os
+import sqlite3
+import struct
+from concurrent.futures import Future, ThreadPoolExecutor
+from hashlib import sha1
+from pathlib import Path
+from select import select
+from threading import Event
+from time import monotonic, sleep, time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from .exceptions import HashingCancelled
+from .torrent import Torrent
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_INOTIFY_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF)
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+MAX_RETRY_DELAY = 3600
+"""Maximum number of seconds to wait before retrying to create a torrent for a failed item."""
+
+
+def get_fingerprint(path: Union[str, Path]) -> str:
+    """Returns a fingerprint of a file or a directory tree changing
+    whenever files are added, removed, renamed or modified.
+
+    :param path:
+
+    """
+    path = str(path)
+    entries = []
+
+    if os.path.isdir(path):
+        for base, dirs, files in os.walk(path):
+            dirs.sort()
+
+            for name in sorted(files):
+                fpath = os.path.join(base, name)
+
+                try:
+                    fstat = os.stat(fpath)
+
+                except OSError:
+                    # Removed while walking.
+                    continue
+
+                entries.append(f'{os.path.relpath(fpath, path)}:{fstat.st_size}:{fstat.st_mtime_ns}')
+
+    else:
+        fstat = os.stat(path)
+        entries.append(f':{fstat.st_size}:{fstat.st_mtime_ns}')
+
+    return sha1('\n'.join(entries).encode(errors='surrogateescape')).hexdigest()
+
+
+class PollingWatcher:
+    """Reports that anything could have changed after a timeout (requires a rescan)."""
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        """Waits for changes. Returns names of changed top level entries or None if unknown.
+
+        :param timeout: Seconds to wait.
+
+        """
+        sleep(timeout)
+        return None
+
+    def close(self):
+        """Frees resources."""
+
+
+class InotifyWatcher:
+    """Watches a directory tree for changes with Linux inotify (via ctypes).
+
+    Changes are reported by names of top level entries (files and directories) they happen in.
+
+    """
+    def __init__(self, root_path: Union[str, Path]):
+        """
+        :param root_path:
+
+        """
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+
+        try:
+            self._add_watch_func = libc.inotify_add_watch
+
+        except AttributeError:
+            raise OSError(errno.ENOSYS, 'inotify is not supported')
+
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+
+        if fd < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+
+        self._get_errno = ctypes.get_errno
+        self._fd = fd
+        self._watches: Dict[int, Tuple[str, str]] = {}  # Watch descriptor -> (top level name, directory path).
+        self.root_path = str(root_path)
+
+        try:
+            self._add_watch(self.root_path, '')
+
+            for entry in os.scandir(self.root_path):
+                if entry.is_dir(follow_symlinks=False):
+                    self._add_tree(entry.path, entry.name)
+
+        except OSError:
+            self.close()
+            raise
+
+    def _add_tree(self, path: str, top: str):
+        for base, _, _ in os.walk(path):
+            self._add_watch(base, top)
+
+    def _add_watch(self, path: str, top: str):
+        wd = self._add_watch_func(self._fd, os.fsencode(path), _INOTIFY_MASK | IN_ONLYDIR)
+
+        if wd < 0:
+            code = self._get_errno()
+
+            if code in {errno.ENOENT, errno.ENOTDIR}:
+                # Removed in the meantime.
+                return
+
+            raise OSError(code, f'Unable to watch {path}: {os.strerror(code)}')
+
+        self._watches[wd] = (top, path)
+
+    def wait(self, timeout: float) -> Optional[Set[str]]:
+        """Waits for changes. Returns names of changed top level entries
+        (empty on timeout) or None if events were lost and a rescan is required.
+
+        :param timeout: Seconds to wait.
+
+        """
+        if not select([self._fd], [], [], timeout)[0]:
+            return set()
+
+        changed = set()
+        header_size = _EVENT_HEADER.size
+
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+
+            except BlockingIOError:
+                break
+
+            offset = 0
+
+            while offset < len(data):
+                wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                name = os.fsdecode(data[offset + header_size:offset + header_size + name_len].rstrip(b'\0'))
+                offset += header_size + name_len
+
+                if mask & IN_Q_OVERFLOW:
+                    return None
+
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+
+                watch = self._watches.get(wd)
+
+                if watch is None:
+                    continue
+
+                top, path = watch
+                top = top or name
+
+                if not top:
+                    continue
+
+                changed.add(top)
+
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    self._add_tree(os.path.join(path, name), top)
+
+        return changed
+
+    def close(self):
+        """Stops watching."""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class WatchState:
+    """On-disk (SQLite) state of items handled by FolderWatcher."""
+
+    def __init__(self, filepath: Union[str, Path] = ':memory:'):
+        """
+        :param filepath: State database file path. Defaults to in-memory database.
+
+        """
+        # Used by one thread at a time (a watcher may be run in a thread other than created in).
+        self._conn = conn = sqlite3.connect(str(filepath), check_same_thread=False)
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS items (
+                name TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                info_hash TEXT NOT NULL,
+                torrent_path TEXT NOT NULL,
+                created REAL NOT NULL
+            );
+        ''')
+
+    def close(self):
+        """Closes the database."""
+        self._conn.close()
+
+    def get_fingerprint(self, name: str) -> Optional[str]:
+        """Returns a fingerprint of a handled item or None if not handled.
+
+        :param name: Top level entry name.
+
+        """
+        row = self._conn.execute('SELECT fingerprint FROM items WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_done(self, name: str, *, fingerprint: str, info_hash: str, torrent_path: str):
+        """Marks an item as handled.
+
+        :param name: Top level entry name.
+        :param fingerprint: Item fingerprint at the moment of handling.
+        :param info_hash: Info hash of the torrent created.
+        :param torrent_path: Path of the torrent file created.
+
+        """
+        with self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO items (name, fingerprint, info_hash, torrent_path, created) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (name, fingerprint, info_hash, torrent_path, time()))
+
+
+class FolderWatcher:
+    """Watches a folder and creates torrents for new or changed top level entries
+    (files and directories) once writes into them settle.
+
+    Handled items are remembered in a state database, so they are not rehashed after restart.
+    Hidden entries (starting with a dot) are ignored.
+
+    .. code-block:: python
+
+        with FolderWatcher('/srv/incoming', '/srv/torrents', trackers=['udp://tracker.example.com']) as watcher:
+            watcher.run()
+
+    """
+    def __init__(
+            self,
+            src_path: Union[str, Path],
+            dest_path: Union[str, Path],
+            *,
+            state_path: Union[str, Path] = None,
+            trackers: List[str] = None,
+            settle: float = 10,
+            interval: float = 60,
+            workers: int = 2,
+            inotify: bool = True,
+            on_created: Callable[[str, Torrent], None] = None,
+            on_failed: Callable[[str, Exception], None] = None,
+            retry_delay: float = 60
+    ):
+        """
+        :param src_path: Directory to watch.
+
+        :param dest_path: Directory to put .torrent files into.
+            Must not be within `src_path`, otherwise torrent files would be taken for new items.
+
+        :param state_path: State database file path. Default: .torrentool_watch.sqlite in `dest_path`.
+
+        :param trackers: Tracker announce URLs to put into torrents.
+
+        :param settle: Seconds without changes after which an item is considered complete.
+
+        :param interval: Seconds between full rescans when polling.
+
+        :param workers: Maximum number of torrents created at once.
+
+        :param inotify: Use inotify to detect changes if available. Otherwise folder is polled.
+
+        :param on_created: Callable to be called with item name and a torrent created.
+
+        :param on_failed: Callable to be called with item name and an exception on failure.
+
+        :param retry_delay: Seconds to wait before retrying to create a torrent for a failed item
+            (e.g. on a transient error such as no space left in `dest_path`). Doubled on every
+            consecutive failure up to MAX_RETRY_DELAY. Changed items are retried once settled.
+
+        """
+        self.src_path = Path(src_path)
+        self.dest_path = Path(dest_path)
+
+        src_real = os.path.realpath(str(src_path))
+
+        if os.path.commonpath([src_real, os.path.realpath(str(dest_path))]) == src_real:
+            raise ValueError(f'Destination {dest_path} must not be within the watched directory {src_path}.')
+
+        self.trackers = trackers or []
+        self.settle = settle
+        self.interval = interval
+        self.on_created = on_created
+        self.on_failed = on_failed
+        self.retry_delay = retry_delay
+
+        self._state = WatchState(state_path or self.dest_path / '.torrentool_watch.sqlite')
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._cancel = Event()
+        self._pending: Dict[str, Tuple[str, float]] = {}  # Name -> (fingerprint, time of the last change).
+        self._running: Dict[str, Tuple[str, Future]] = {}  # Name -> (fingerprint, future).
+        self._failed: Dict[str, Tuple[int, float]] = {}  # Name -> (consecutive failures, time to retry at).
+
+        watcher = None
+
+        if inotify:
+            try:
+                watcher = InotifyWatcher(self.src_path)
+
+            except OSError:
+                # Not supported or watches limit reached.
+                pass
+
+        self._watcher = watcher or PollingWatcher()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def is_polling(self) -> bool:
+        """Whether the folder is polled for changes (inotify is not used)."""
+        return isinstance(self._watcher, PollingWatcher)
+
+    def close(self):
+        """Cancels torrents being created and frees resources.
+        Cancelled items are handled again on the next run.
+
+        """
+        self._cancel.set()
+        self._executor.shutdown()
+        self._collect()
+        self._watcher.close()
+        self._state.close()
+
+    def run(self, stop: Event = None):
+        """Watches the folder blocking the current thread.
+
+        :param stop: Event to be set (e.g. from another thread) to stop watching.
+
+        """
+        stop = stop or Event()
+        self.check()
+
+        while not stop.is_set():
+            timeout = self.settle if (self._pending or self._running) else self.interval
+            changed = self._watcher.wait(min(timeout, self.interval))
+            self.check(changed)
+
+    def check(self, names: Iterable[str] = None) -> List[Future]:
+        """Registers changes of the given items, starts creating torrents
+        for items settled, collects results of those finished.
+        Returns futures of torrents creation started.
+
+        :param names: Names of top level entries changed. Default: rescan all.
+
+        """
+        # Results are collected first, so that items just done are not taken for changed.
+        self._collect()
+
+        now = monotonic()
+        pending = self._pending
+
+        if names is None:
+            names = [name for name in os.listdir(str(self.src_path)) if not name.startswith('.')]
+
+        for name in set(names).union(pending):
+            if name.startswith('.'):
+                continue
+
+            try:
+                fingerprint = get_fingerprint(self.src_path / name)
+
+            except OSError:
+                # Removed.
+                pending.pop(name, None)
+                self._failed.pop(name, None)
+                continue
+
+            current = pending.get(name)
+
+            if current is not None:
+                if current[0] != fingerprint:
+                    pending[name] = (fingerprint, now)
+                    # Changed after a failure: retried once settled.
+                    self._failed.pop(name, None)
+
+            else:
+                running = self._running.get(name)
+                known = running[0] if running else self._state.get_fingerprint(name)
+
+                if known != fingerprint:
+                    pending[name] = (fingerprint, now)
+
+        started = []
+
+        for name, (fingerprint, changed) in list(pending.items()):
+            if now - changed < self.settle or name in self._running:
+                continue
+
+            failed = self._failed.get(name)
+
+            if failed and now < failed[1]:
+                continue
+
+            del pending[name]
+            future = self._executor.submit(self._create, name)
+            self._running[name] = (fingerprint, future)
+            started.append(future)
+
+        return started
+
+    def _create(self, name: str) -> Tuple[Torrent, str]:
+        src_path = self.src_path / name
+        torrent = Torrent.create_from(src_path, cancel=self._cancel)
+
+        if self.trackers:
+            torrent.announce_urls = self.trackers
+
+        torrent_path = str(self.dest_path / f'{name}.torrent')
+        torrent.to_file(torrent_path)
+
+        return torrent, torrent_path
+
+    def _collect(self):
+        # Records results of torrents creation finished.
+        for name, (fingerprint, future) in list(self._running.items()):
+            if not future.done():
+                continue
+
+            del self._running[name]
+
+            try:
+                torrent, torrent_path = future.result()
+
+            except HashingCancelled:
+                continue
+
+            except Exception as e:
+                pending = self._pending.setdefault(name, (fingerprint, monotonic()))
+
+                if pending[0] == fingerprint:
+                    # Retried later, unless changed (see .check()).
+                    failures = self._failed.get(name, (0, 0))[0] + 1
+                    delay = min(self.retry_delay * 2 ** (failures - 1), MAX_RETRY_DELAY)
+                    self._failed[name] = (failures, monotonic() + delay)
+
+                if self.on_failed:
+                    self.on_failed(name, e)
+                continue
+
+            self._failed.pop(name, None)
+
+            try:
+                fingerprint_now = get_fingerprint(self.src_path / name)
+
+            except OSError:
+                # Removed while hashing.
+                continue
+
+            if fingerprint_now != fingerprint:
+                # Changed while hashing: to be created again once settled.
+                # A newer change might have been registered already.
+                self._pending.setdefault(name, (fingerprint_now, monotonic()))
+                continue
+
+            self._state.set_done(name, fingerprint=fingerprint, info_hash=torrent.info_hash, torrent_path=torrent_path)
+
+            if self.on_created:
+                self.on_created(name, torrent)
@@ -0,0 +1,242 @@
+import asyncio
+from os import fstat, sep
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import unquote, urlsplit
+
+from .torrent import Torrent
+from .utils import get_safe_path
+
+STATUSES = {
+    200: 'OK',
+    206: 'Partial Content',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    416: 'Range Not Satisfiable',
+}
+
+SEND_CHUNK_SIZE = 4 * 1024 * 1024
+"""File contents is sent in chunks of this size, so that sending timeout applies to each of them."""
+
+
+def parse_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """Returns (start, end) byte positions (end is exclusive) from HTTP Range header value.
+
+    None is returned if the whole content should be served (no or unsupported range).
+    ValueError is raised for unsatisfiable ranges.
+
+    :param value: Range header value, e.g. `bytes=0-99`.
+    :param size: Content size.
+
+    """
+    unit, _, spec = value.partition('=')
+
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        # Multiple ranges are not supported: serving the whole content is allowed.
+        return None
+
+    first, dash, last = spec.strip().partition('-')
+
+    if not dash or not (first or last) or not (first + last).isdigit():
+        return None
+
+    if first:
+        start = int(first)
+
+        if last and int(last) < start:
+            return None
+
+        end = min(int(last) + 1, size) if last else size
+
+    else:
+        start, end = max(size - int(last), 0), size
+
+    if start >= end:
+        raise ValueError(f'Unsatisfiable range: {value}')
+
+    return start, end
+
+
+class WebseedServer:
+    """HTTP server exposing torrents data for BEP 19 (GetRight style) webseeding.
+
+    URL paths follow torrent files layout (see TorrentFile.name), so for a server
+    at `http://example.com/seed/` the same URL is to be put into torrent's `webseeds`.
+
+    File contents is sent with zero-copy `sendfile` where available.
+
+    .. code-block:: python
+
+        server = WebseedServer()
+        server.add(Torrent.from_file('my.torrent'), '/srv/data')
+        server.run(port=8080)
+
+    """
+    def __init__(self, *, max_requests: int = 100, timeout: float = 15, max_header_size: int = 8192):
+        """
+        :param max_requests: Maximum number of requests served over a single (keep-alive) connection.
+
+        :param timeout: Seconds to wait for a request on a connection before closing it.
+            Also seconds to wait for a client to receive a chunk of data (see SEND_CHUNK_SIZE)
+            before the connection is closed.
+
+        :param max_header_size: Maximum size of request head in bytes. Connection is closed if exceeded.
+
+        """
+        self.max_requests = max_requests
+        self.timeout = timeout
+        self.max_header_size = max_header_size
+        self._files: Dict[str, Tuple[str, int]] = {}
+
+    def add(self, torrent: Torrent, root_path: Union[str, Path]):
+        """Exposes torrent data.
+
+        Raises TorrentError if torrent file paths point outside the given directory.
+
+        :param torrent:
+        :param root_path: Directory containing torrent data (torrent name is a subpath here).
+
+        """
+        root_path = str(root_path)
+
+        # Validate all the paths before exposing any.
+        files = {
+            file.name.replace(sep, '/'): (get_safe_path(root_path, file.name), file.length)
+            for file in torrent.files
+            if not file.is_padding
+        }
+
+        self._files.update(files)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 8080) -> asyncio.AbstractServer:
+        """Starts serving in the running event loop. Returns asyncio server object.
+
+        :param host:
+        :param port:
+
+        """
+        return await asyncio.start_server(self._handle, host, port, limit=self.max_header_size)
+
+    def run(self, host: str = '127.0.0.1', port: int = 8080):
+        """Serves forever blocking the current thread.
+
+        :param host:
+        :param port:
+
+        """
+        async def serve():
+            server = await self.start(host, port)
+            async with server:
+                await server.serve_forever()
+
+        asyncio.run(serve())
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            for _ in range(self.max_requests):
+
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.timeout)
+
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                    break
+
+                if not await self._respond(head, writer):
+                    break
+
+        except (ConnectionError, asyncio.TimeoutError):
+            # Timeout here means a client doesn't receive data.
+            pass
+
+        finally:
+            writer.close()
+
+    async def _respond(self, head: bytes, writer: asyncio.StreamWriter) -> bool:
+        # Returns a flag whether connection should be kept alive.
+        request_line, *header_lines = head.decode('latin-1').split('\r\n')
+
+        try:
+            method, target, version = request_line.split(' ')
+
+        except ValueError:
+            await self._send_head(writer, 400, keep_alive=False)
+            return False
+
+        headers = {}
+
+        for line in header_lines:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        connection = headers.get('connection', '').lower()
+
+        if version == 'HTTP/1.1':
+            keep_alive = connection != 'close'
+        else:
+            keep_alive = connection == 'keep-alive'
+
+        if method not in {'GET', 'HEAD'}:
+            await self._send_head(writer, 405, keep_alive=keep_alive, extra={'Allow': 'GET, HEAD'})
+            return keep_alive
+
+        file = self._files.get(unquote(urlsplit(target).path).lstrip('/'))
+
+        try:
+            f = open(file[0], 'rb') if file else None
+
+        except OSError:
+            f = None
+
+        if f is None:
+            await self._send_head(writer, 404, keep_alive=keep_alive)
+            return keep_alive
+
+        with f:
+            # Actual size may differ from the expected if data is incomplete.
+            size = fstat(f.fileno()).st_size
+            status, start, end = 200, 0, size
+            extra = {'Accept-Ranges': 'bytes', 'Content-Type': 'application/octet-stream'}
+
+            try:
+                range_ = parse_range(headers.get('range', ''), size)
+
+            except ValueError:
+                extra['Content-Range'] = f'bytes */{size}'
+                await self._send_head(writer, 416, keep_alive=keep_alive, extra=extra)
+                return keep_alive
+
+            if range_:
+                status, (start, end) = 206, range_
+                extra['Content-Range'] = f'bytes {start}-{end - 1}/{size}'
+
+            await self._send_head(writer, status, keep_alive=keep_alive, length=end - start, extra=extra)
+
+            if method == 'GET' and end > start:
+                loop = asyncio.get_running_loop()
+
+                for offset in range(start, end, SEND_CHUNK_SIZE):
+                    await asyncio.wait_for(
+                        loop.sendfile(writer.transport, f, offset, min(SEND_CHUNK_SIZE, end - offset)),
+                        self.timeout)
+
+        return keep_alive
+
+    async def _send_head(
+            self,
+            writer: asyncio.StreamWriter,
+            status: int,
+            *,
+            keep_alive: bool,
+            length: int = 0,
+            extra: dict = None
+    ):
+        lines = [
+            f'HTTP/1.1 {status} {STATUSES[status]}',
+            f'Content-Length: {length}',
+            f'Connection: {"keep-alive" if keep_alive else "close"}',
+        ]
+        lines.extend(f'{name}: {value}' for name, value in (extra or {}).items())
+
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await asyncio.wait_for(writer.drain(), self.timeout)